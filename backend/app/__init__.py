@@ -2,6 +2,7 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_migrate import Migrate
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
 
 db = SQLAlchemy()
@@ -12,6 +13,12 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Behind a proxy, request.remote_addr (login throttling, the download log)
+    # must be the client's address, not the proxy's
+    hops = app.config['TRUSTED_PROXY_HOPS']
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
@@ -19,6 +26,22 @@ def create_app(config_class=Config):
     login_manager.login_view = 'auth.login'
     login_manager.login_message_category = 'info'
     
+    from app.utils.download_log import download_log
+    download_log.init_app(app)
+    
+    from app.utils.login_limiter import login_limiter
+    login_limiter.init_app(app)
+    
+    from app.utils.events import event_broker
+    event_broker.init_app(app)
+    
+    from app.utils.serializers import init_json
+    init_json(app)
+    
+    # Register the invalidation listeners for the user and catalogue caches,
+    # and the hooks that keep resource_listing and the suggest index in step
+    from app.utils import catalogue_cache, listings, suggest, user_cache  # noqa: F401
+    
     # Register blueprints
     from app.auth.routes import auth_bp
     from app.student.routes import student_bp
@@ -30,6 +53,9 @@ def create_app(config_class=Config):
     from app.student.api import student_api_bp
     from app.lecturer.api import lecturer_api_bp
     from app.resources.api import resources_api_bp
+    from app.events.api import events_api_bp
+    from app.exports.api import exports_api_bp
+    from app.stats.api import stats_api_bp
     
     # Register HTML routes (for web interface)
     app.register_blueprint(auth_bp)
@@ -42,6 +68,13 @@ def create_app(config_class=Config):
     app.register_blueprint(student_api_bp, url_prefix='/api/student')
     app.register_blueprint(lecturer_api_bp, url_prefix='/api/lecturer')
     app.register_blueprint(resources_api_bp, url_prefix='/api/resources')
+    app.register_blueprint(events_api_bp, url_prefix='/api/events')
+    app.register_blueprint(exports_api_bp, url_prefix='/api/exports')
+    app.register_blueprint(stats_api_bp, url_prefix='/api/stats')
+    
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
     
     # Add a simple root route for testing
     @app.route('/')
@@ -55,6 +88,8 @@ def create_app(config_class=Config):
             <li>POST /api/auth/login - Login</li>
             <li>POST /api/auth/logout - Logout</li>
             <li>GET /api/auth/me - Get current user</li>
+            <li>POST /api/auth/token - Get bearer tokens</li>
+            <li>POST /api/auth/token/refresh - Refresh access token</li>
         </ul>
         <h4>Student API:</h4>
         <ul>
@@ -67,15 +102,43 @@ def create_app(config_class=Config):
             <li>GET /api/lecturer/dashboard - Lecturer dashboard</li>
             <li>GET /api/lecturer/review/&lt;id&gt; - Get resource for review</li>
             <li>POST /api/lecturer/review/&lt;id&gt; - Review resource</li>
+            <li>POST /api/lecturer/review/batch - Review many resources</li>
+            <li>GET /api/lecturer/queue - My claimed review items</li>
+            <li>POST /api/lecturer/queue/claim - Claim the next pending items</li>
+            <li>POST /api/lecturer/queue/release - Return claimed items to the queue</li>
             <li>GET /api/lecturer/profile - Lecturer profile</li>
         </ul>
         <h4>Resources API:</h4>
         <ul>
             <li>POST /api/resources/upload - Upload resource</li>
+            <li>POST /api/resources/upload/init - Start chunked upload</li>
+            <li>PUT /api/resources/upload/&lt;upload_id&gt; - Upload chunk</li>
+            <li>POST /api/resources/upload/&lt;upload_id&gt;/finalize - Finish chunked upload</li>
             <li>GET /api/resources/download/&lt;id&gt; - Download resource</li>
+            <li>GET /api/resources/download/&lt;id&gt;/link - Signed download link</li>
+            <li>GET /api/resources/files/&lt;path&gt; - Signed download link, served by the app</li>
+            <li>GET /api/resources/download/served - Count a download served by the front proxy</li>
             <li>GET /api/resources/categories - Get categories</li>
+            <li>GET /api/resources/suggest?q= - Title and category autocomplete</li>
             <li>GET /api/resources/my-uploads - My uploads</li>
         </ul>
+        <h4>Events API:</h4>
+        <ul>
+            <li>GET /api/events - Live status updates (server-sent events)</li>
+        </ul>
+        <h4>Exports API (lecturers, CSV or NDJSON):</h4>
+        <ul>
+            <li>GET /api/exports/resources - Resources by status</li>
+            <li>GET /api/exports/reviews - My review history</li>
+            <li>GET /api/exports/downloads - Download log</li>
+        </ul>
+        <h4>Stats API:</h4>
+        <ul>
+            <li>GET /api/stats/downloads - Downloads per day</li>
+            <li>GET /api/stats/top-resources - Most downloaded resources</li>
+            <li>GET /api/stats/categories - Downloads per category</li>
+            <li>GET /api/stats/me - My download activity</li>
+        </ul>
         <p><a href="/auth/login">Web Login</a></p>
         '''
     
@@ -1,10 +1,30 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from flask_login import login_user, logout_user, current_user
 from app.models.user import User
+from app.utils.login_limiter import login_limiter
+from app.utils.tokens import issue_access_token, issue_tokens, user_for_refresh_token
 from app import db
 
 auth_api_bp = Blueprint('auth_api', __name__)
 
+def _throttled(username):
+    # Checked before the user is looked up, so rejected attempts cost no hashing
+    retry_after = login_limiter.retry_after(request.remote_addr, username)
+    if not retry_after:
+        return None
+    response = jsonify({
+        'success': False,
+        'message': f'Too many failed login attempts. Try again in {retry_after} seconds.'
+    })
+    response.headers['Retry-After'] = str(retry_after)
+    return response, 429
+
+def _login_succeeded(user, password):
+    login_limiter.succeeded(request.remote_addr, user.username)
+    if user.password_needs_rehash():
+        user.rehash_password(password)
+        db.session.commit()
+
 @auth_api_bp.route('/login', methods=['POST'])
 def login():
     if current_user.is_authenticated:
@@ -30,9 +50,14 @@ def login():
     username = data.get('username')
     password = data.get('password')
     
+    blocked = _throttled(username)
+    if blocked:
+        return blocked
+    
     user = User.query.filter_by(username=username).first()
     
     if user and user.check_password(password):
+        _login_succeeded(user, password)
         login_user(user)
         return jsonify({
             'success': True,
@@ -47,6 +72,7 @@ def login():
             }
         })
     else:
+        login_limiter.failed(request.remote_addr, username)
         return jsonify({
             'success': False,
             'message': 'Invalid username or password'
@@ -114,3 +140,70 @@ def get_current_user():
             'success': False,
             'message': 'Not authenticated'
         }), 401
+
+def _tokens_disabled():
+    return jsonify({
+        'success': False,
+        'message': 'Token authentication is not enabled'
+    }), 404
+
+@auth_api_bp.route('/token', methods=['POST'])
+def token():
+    if not current_app.config['AUTH_TOKENS_ENABLED']:
+        return _tokens_disabled()
+    
+    data = request.get_json(silent=True)
+    
+    if not data or not data.get('username') or not data.get('password'):
+        return jsonify({
+            'success': False,
+            'message': 'Username and password are required'
+        }), 400
+    
+    username = data.get('username')
+    password = data.get('password')
+    
+    blocked = _throttled(username)
+    if blocked:
+        return blocked
+    
+    user = User.query.filter_by(username=username).first()
+    
+    if user and user.is_active and user.check_password(password):
+        _login_succeeded(user, password)
+        return jsonify({
+            'success': True,
+            'message': 'Login successful!',
+            'data': issue_tokens(user)
+        })
+    else:
+        login_limiter.failed(request.remote_addr, username)
+        return jsonify({
+            'success': False,
+            'message': 'Invalid username or password'
+        }), 401
+
+@auth_api_bp.route('/token/refresh', methods=['POST'])
+def refresh_token():
+    if not current_app.config['AUTH_TOKENS_ENABLED']:
+        return _tokens_disabled()
+    
+    data = request.get_json(silent=True) or {}
+    user = user_for_refresh_token(data.get('refresh_token') or '')
+    
+    if user is None:
+        return jsonify({
+            'success': False,
+            'message': 'Invalid or expired refresh token'
+        }), 401
+    
+    # Re-reads role and can_upload, so permission changes reach the client here
+    access_token, expires_in = issue_access_token(user)
+    return jsonify({
+        'success': True,
+        'data': {
+            'token_type': 'Bearer',
+            'access_token': access_token,
+            'expires_in': expires_in
+        }
+    })
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, current_user, login_required
 from app.models.user import User
+from app.utils.login_limiter import login_limiter
 from app import db
 
 auth_bp = Blueprint('auth', __name__)
@@ -17,9 +18,19 @@ def login():
     if request.method == 'POST':
         username = request.form.get('username')
         password = request.form.get('password')
+        
+        retry_after = login_limiter.retry_after(request.remote_addr, username)
+        if retry_after:
+            flash(f'Too many failed login attempts. Try again in {retry_after} seconds.', 'error')
+            return render_template('auth/login.html'), 429, {'Retry-After': str(retry_after)}
+        
         user = User.query.filter_by(username=username).first()
         
         if user and user.check_password(password):
+            login_limiter.succeeded(request.remote_addr, username)
+            if user.password_needs_rehash():
+                user.rehash_password(password)
+                db.session.commit()
             login_user(user)
             flash('Login successful!', 'success')
             
@@ -29,6 +40,7 @@ def login():
             else:
                 return redirect(url_for('lecturer.dashboard'))
         else:
+            login_limiter.failed(request.remote_addr, username)
             flash('Invalid username or password', 'error')
     
     return render_template('auth/login.html')
@@ -0,0 +1,133 @@
+import click
+from flask.cli import AppGroup
+
+blobs_cli = AppGroup('blobs', help='Maintain the content-addressed file store.')
+search_cli = AppGroup('search', help='Maintain the resource full-text search index.')
+indexes_cli = AppGroup('indexes', help='Check that listing queries are served by indexes.')
+listings_cli = AppGroup('listings', help='Maintain the resource_listing read table.')
+downloads_cli = AppGroup('downloads', help='Roll up and prune the download log.')
+trending_cli = AppGroup('trending', help='Maintain the trending scores used by sort=trending.')
+
+@blobs_cli.command('gc')
+def blobs_gc():
+    """Remove stored files that no resource references any more.
+
+    Also removes files left by uploads that never committed, once they are
+    older than BLOB_ORPHAN_GRACE.
+    """
+    from app.utils.file_store import collect_garbage
+    removed = collect_garbage()
+    click.echo(f'Removed {removed} unreferenced file(s).')
+
+@blobs_cli.command('migrate-layout')
+@click.option('--batch-size', default=200, show_default=True, help='Files moved per transaction.')
+def blobs_migrate_layout(batch_size):
+    """Move stored files into the sharded layout (STORAGE_SHARD_DEPTH/WIDTH).
+
+    Also adopts uploads from before deduplication into the blob store. Safe
+    to run while the app is serving, and to re-run after an interruption.
+    """
+    from app.utils.file_store import migrate_layout
+    stats = migrate_layout(batch_size=batch_size, echo=click.echo)
+    click.echo(f"Done: {stats['moved']} blob(s) moved, {stats['adopted']} legacy upload(s) adopted, "
+               f"{stats['missing']} missing file(s) skipped.")
+
+@search_cli.command('rebuild')
+@click.option('--batch-size', default=500, show_default=True)
+def search_rebuild(batch_size):
+    """Create the search index if missing and re-index all approved resources."""
+    from app.utils.search import rebuild_search_index
+    indexed = rebuild_search_index(batch_size=batch_size)
+    click.echo(f'Indexed {indexed} approved resource(s).')
+
+@indexes_cli.command('check')
+@click.option('--verbose', '-v', is_flag=True, help='Print every query plan.')
+def indexes_check(verbose):
+    """EXPLAIN each listing query; exit 1 if any needs a full scan or a sort."""
+    from app.utils.query_plans import check_query_plans
+    failed = 0
+    for name, plan, problems in check_query_plans():
+        click.echo(f"{'FAIL' if problems else 'ok  '} {name}")
+        for step in (plan if verbose or problems else []):
+            click.echo(f"       {'!' if step in problems else ' '} {step}")
+        failed += bool(problems)
+    if failed:
+        raise click.ClickException(f'{failed} listing query plan(s) fall back to a scan or sort')
+
+@listings_cli.command('rebuild')
+@click.option('--batch-size', default=1000, show_default=True, help='Resources copied per statement.')
+def listings_rebuild(batch_size):
+    """Refill resource_listing from resources, categories and students.
+
+    For backfills and repairs; normal writes keep the table in step.
+    """
+    from app.utils.listings import rebuild_listings
+    copied = rebuild_listings(batch_size=batch_size)
+    click.echo(f'Rebuilt {copied} listing row(s).')
+
+@downloads_cli.command('rollup')
+@click.option('--no-settle', is_flag=True, help='Also take rows written since the last run (only safe when no downloads are being logged).')
+def downloads_rollup(no_settle):
+    """Add new download log rows to the daily stats tables.
+
+    Run it regularly (e.g. every 10 minutes from cron); each run picks up
+    where the last one stopped.
+    """
+    from flask import current_app
+    from app.utils.download_stats import roll_up
+    try:
+        rolled = roll_up(batch_size=current_app.config['DOWNLOAD_ROLLUP_BATCH_SIZE'], settle=not no_settle)
+    except RuntimeError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Rolled up {rolled} download(s).')
+
+@downloads_cli.command('prune')
+@click.option('--days', type=int, help='Keep this many days of raw rows (default DOWNLOAD_LOG_RETENTION_DAYS).')
+@click.option('--archive-dir', help='Write pruned rows here first (default DOWNLOAD_LOG_ARCHIVE_DIR).')
+def downloads_prune(days, archive_dir):
+    """Delete raw download rows past the retention period.
+
+    Only rows already in the daily stats are removed.
+    """
+    from flask import current_app
+    from app.utils.download_stats import prune
+    days = days if days is not None else current_app.config['DOWNLOAD_LOG_RETENTION_DAYS']
+    if days <= 0:
+        click.echo('Retention is off (DOWNLOAD_LOG_RETENTION_DAYS is 0); nothing pruned.')
+        return
+    deleted, path = prune(days, archive_dir or current_app.config['DOWNLOAD_LOG_ARCHIVE_DIR'])
+    click.echo(f'Pruned {deleted} download row(s) older than {days} day(s).' + (f' Archived to {path}.' if path else ''))
+
+@downloads_cli.command('retry-failed')
+def downloads_retry_failed():
+    """Write download events from the dead-letter file again.
+
+    Events land there when a batch keeps failing to flush (see
+    DOWNLOAD_LOG_MAX_RETRIES); those that fail again stay there.
+    """
+    from app.utils.download_log import download_log
+    written, failed = download_log.retry_dead_letters()
+    click.echo(f'Wrote {written} download event(s).')
+    if failed:
+        raise click.ClickException(f'{failed} download event(s) still fail; they stay in the dead-letter file')
+
+@trending_cli.command('rebuild')
+def trending_rebuild():
+    """Recompute trending scores from the download log.
+
+    Scores are otherwise kept up to date by `flask downloads rollup`. Use
+    this after upgrading, or after changing TRENDING_HALF_LIFE.
+    """
+    from flask import current_app
+    from app.utils.download_stats import rollup_watermark
+    from app.utils.trending import rebuild_scores
+    read = rebuild_scores(rollup_watermark(), batch_size=current_app.config['DOWNLOAD_ROLLUP_BATCH_SIZE'])
+    click.echo(f'Scored {read} download(s).')
+
+def register_commands(app):
+    app.cli.add_command(blobs_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(indexes_cli)
+    app.cli.add_command(listings_cli)
+    app.cli.add_command(downloads_cli)
+    app.cli.add_command(trending_cli)
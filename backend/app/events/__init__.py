@@ -0,0 +1 @@
+# Initialize events blueprint
@@ -0,0 +1,29 @@
+from flask import Blueprint, Response, request
+from flask_login import login_required, current_user
+from app import db
+from app.utils.events import LECTURERS_CHANNEL, event_broker, student_channel
+
+events_api_bp = Blueprint('events_api', __name__)
+
+@events_api_bp.route('', methods=['GET'])
+@login_required
+def stream():
+    # Students hear about their own uploads, lecturers about the review queue
+    if current_user.role.value == 'student':
+        channels = [student_channel(current_user.student_profile.id)]
+    else:
+        channels = [LECTURERS_CHANNEL]
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription = event_broker.subscribe(
+        channels, int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    )
+    
+    # The stream can stay open for EVENTS_STREAM_MAX_AGE seconds and needs no
+    # request context or database; hand the connection back to the pool now
+    db.session.remove()
+    response = Response(event_broker.stream(subscription), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1 @@
+# Initialize exports blueprint
@@ -0,0 +1,125 @@
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from app.utils.decorators import lecturer_required
+from app.utils.exports import FORMATS, InvalidExport, export_response, parse_date
+from app.models import ResourceDownload, ResourceListing
+from app.models.resource import ResourceStatus
+
+exports_api_bp = Blueprint('exports_api', __name__)
+
+_L = ResourceListing
+
+RESOURCE_COLUMNS = [
+    ('id', _L.id), ('title', _L.title), ('description', _L.description), ('file_name', _L.file_name),
+    ('file_type', _L.file_type), ('file_size', _L.file_size), ('upload_date', _L.upload_date),
+    ('status', _L.status), ('download_count', _L.download_count), ('category_id', _L.category_id),
+    ('category_name', _L.category_name), ('student_id', _L.student_id), ('uploader_name', _L.uploader_name),
+    ('uploader_registration_number', _L.uploader_registration_number)
+]
+
+REVIEW_COLUMNS = [
+    ('id', _L.id), ('title', _L.title), ('file_name', _L.file_name), ('upload_date', _L.upload_date),
+    ('status', _L.status), ('review_date', _L.review_date), ('review_comments', _L.review_comments),
+    ('rejection_reason', _L.rejection_reason), ('category_name', _L.category_name),
+    ('uploader_name', _L.uploader_name), ('uploader_registration_number', _L.uploader_registration_number)
+]
+
+DOWNLOAD_COLUMNS = [
+    ('id', ResourceDownload.id), ('resource_id', ResourceDownload.resource_id),
+    ('user_id', ResourceDownload.user_id), ('download_date', ResourceDownload.download_date),
+    ('ip_address', ResourceDownload.ip_address)
+]
+
+def _format():
+    fmt = request.args.get('format', 'csv')
+    if fmt not in FORMATS:
+        raise InvalidExport('format must be csv or ndjson')
+    return fmt
+
+def _filename(name):
+    return f"{name}-{datetime.utcnow().strftime('%Y%m%d')}"
+
+def _invalid(e):
+    return jsonify({
+        'success': False,
+        'message': str(e)
+    }), 400
+
+@exports_api_bp.route('/resources', methods=['GET'])
+@login_required
+@lecturer_required
+def export_resources():
+    try:
+        fmt = _format()
+        status = request.args.get('status', 'approved')
+        if status not in [s.value for s in ResourceStatus]:
+            raise InvalidExport('status must be pending, approved or rejected')
+        
+        query = ResourceListing.query.filter_by(status=status)
+        category_id = request.args.get('category', type=int)
+        if category_id:
+            query = query.filter_by(category_id=category_id)
+        
+        return export_response(query, RESOURCE_COLUMNS, ResourceListing.id, fmt, _filename(f'resources-{status}'))
+        
+    except InvalidExport as e:
+        return _invalid(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error exporting resources: {str(e)}'
+        }), 500
+
+@exports_api_bp.route('/reviews', methods=['GET'])
+@login_required
+@lecturer_required
+def export_reviews():
+    try:
+        fmt = _format()
+        since = parse_date(request.args.get('since'), 'since')
+        until = parse_date(request.args.get('until'), 'until')
+        
+        query = ResourceListing.query.filter_by(reviewed_by_lecturer_id=current_user.lecturer_profile.id)
+        if since:
+            query = query.filter(ResourceListing.review_date >= since)
+        if until:
+            query = query.filter(ResourceListing.review_date < until)
+        
+        return export_response(query, REVIEW_COLUMNS, ResourceListing.id, fmt, _filename('reviews'))
+        
+    except InvalidExport as e:
+        return _invalid(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error exporting reviews: {str(e)}'
+        }), 500
+
+@exports_api_bp.route('/downloads', methods=['GET'])
+@login_required
+@lecturer_required
+def export_downloads():
+    try:
+        fmt = _format()
+        since = parse_date(request.args.get('since'), 'since')
+        until = parse_date(request.args.get('until'), 'until')
+        
+        query = ResourceDownload.query
+        resource_id = request.args.get('resource_id', type=int)
+        if resource_id:
+            query = query.filter_by(resource_id=resource_id)
+        if since:
+            query = query.filter(ResourceDownload.download_date >= since)
+        if until:
+            query = query.filter(ResourceDownload.download_date < until)
+        
+        return export_response(query, DOWNLOAD_COLUMNS, ResourceDownload.id, fmt, _filename('downloads'))
+        
+    except InvalidExport as e:
+        return _invalid(e)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error exporting downloads: {str(e)}'
+        }), 500
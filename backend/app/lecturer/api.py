@@ -1,7 +1,18 @@
-from flask import Blueprint, request, jsonify
+from collections import defaultdict
+from flask import Blueprint, current_app, request, jsonify
 from flask_login import login_required, current_user
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.orm.exc import StaleDataError
+from app.signals import send_reviewed
+from app.utils.catalogue_cache import mark_catalogue_changed
 from app.utils.decorators import lecturer_required
-from app.models import Resource, Category
+from app.utils.listings import refresh_listings
+from app.utils.pagination import InvalidCursor, keyset_paginate, pagination_data
+from app.utils.review_queue import available_count, claim, claimed_by_other, held_query, release
+from app.utils.serializers import PENDING, QUEUE, REVIEWED, InvalidFields, dump, pick, project, requested_fields
+from app.utils.suggest import mark_suggestions_changed
+from app.models import Resource, ResourceListing
+from app.models.resource import ResourceStatus
 from app import db
 from datetime import datetime
 
@@ -12,68 +23,55 @@ lecturer_api_bp = Blueprint('lecturer_api', __name__)
 @lecturer_required
 def dashboard():
     try:
-        # Get pending resources for review
-        pending_resources = Resource.query.filter_by(status='pending').order_by(Resource.upload_date.desc()).all()
+        wanted = requested_fields()
+        
+        # Get pending resources for review; a `cursor` argument pages through
+        # them instead of returning the whole queue
+        cursor = request.args.get('cursor')
+        pending_fields = pick(PENDING, wanted)
+        pending_query = project(ResourceListing.query.filter_by(status='pending'), pending_fields)
+        pending_page = None
+        if cursor is not None:
+            count_key = ('pending',) if request.args.get('with_total', type=int) else None
+            pending_page = keyset_paginate(
+                pending_query, ResourceListing.upload_date, ResourceListing.id, cursor,
+                request.args.get('per_page', 20, type=int), count_key=count_key
+            )
+            pending_resources = pending_page.items
+        else:
+            pending_resources = pending_query.order_by(ResourceListing.upload_date.desc()).all()
+        pending_data = dump(pending_resources, pending_fields)
         
         # Get resources reviewed by this lecturer
-        reviewed_resources = Resource.query.filter_by(
+        reviewed_fields = pick(REVIEWED, wanted)
+        reviewed_resources = project(ResourceListing.query.filter_by(
             reviewed_by_lecturer_id=current_user.lecturer_profile.id
-        ).order_by(Resource.review_date.desc()).limit(10).all()
-        
-        pending_data = [{
-            'id': r.id,
-            'title': r.title,
-            'description': r.description,
-            'file_name': r.file_name,
-            'file_type': r.file_type,
-            'file_size': r.file_size,
-            'upload_date': r.upload_date.isoformat(),
-            'category': {
-                'id': r.category.id,
-                'name': r.category.name
-            } if r.category else None,
-            'uploader': {
-                'full_name': r.student_uploader.full_name if r.student_uploader else 'Unknown',
-                'registration_number': r.student_uploader.registration_number if r.student_uploader else 'Unknown'
-            } if r.student_uploader else None
-        } for r in pending_resources]
-        
-        reviewed_data = [{
-            'id': r.id,
-            'title': r.title,
-            'description': r.description,
-            'file_name': r.file_name,
-            'file_type': r.file_type,
-            'file_size': r.file_size,
-            'upload_date': r.upload_date.isoformat(),
-            'status': r.status.value,
-            'review_date': r.review_date.isoformat() if r.review_date else None,
-            'review_comments': r.review_comments,
-            'rejection_reason': r.rejection_reason,
-            'category': {
-                'id': r.category.id,
-                'name': r.category.name
-            } if r.category else None,
-            'uploader': {
-                'full_name': r.student_uploader.full_name if r.student_uploader else 'Unknown',
-                'registration_number': r.student_uploader.registration_number if r.student_uploader else 'Unknown'
-            } if r.student_uploader else None
-        } for r in reviewed_resources]
+        ), reviewed_fields).order_by(ResourceListing.review_date.desc()).limit(10).all()
+        reviewed_data = dump(reviewed_resources, reviewed_fields)
+        
+        data = {
+            'pending_resources': pending_data,
+            'reviewed_resources': reviewed_data,
+            'lecturer_info': {
+                'full_name': current_user.lecturer_profile.full_name,
+                'employee_id': current_user.lecturer_profile.employee_id,
+                'position': current_user.lecturer_profile.position.value,
+                'department': current_user.lecturer_profile.department
+            }
+        }
+        if pending_page is not None:
+            data['pending_pagination'] = pagination_data(pending_page)
         
         return jsonify({
             'success': True,
-            'data': {
-                'pending_resources': pending_data,
-                'reviewed_resources': reviewed_data,
-                'lecturer_info': {
-                    'full_name': current_user.lecturer_profile.full_name,
-                    'employee_id': current_user.lecturer_profile.employee_id,
-                    'position': current_user.lecturer_profile.position.value,
-                    'department': current_user.lecturer_profile.department
-                }
-            }
+            'data': data
         })
         
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -96,6 +94,9 @@ def get_resource_for_review(resource_id):
             'file_size': resource.file_size,
             'upload_date': resource.upload_date.isoformat(),
             'status': resource.status.value,
+            'version': resource.version,
+            'claimed_by_lecturer_id': resource.claimed_by_lecturer_id,
+            'claim_expires_at': resource.claim_expires_at.isoformat() if resource.claim_expires_at else None,
             'category': {
                 'id': resource.category.id,
                 'name': resource.category.name
@@ -134,7 +135,22 @@ def review_resource(resource_id):
             }), 400
         
         action = data.get('action')
-        comments = data.get('comments', '')
+        comments = data.get('comments') or ''
+        if not isinstance(comments, str):
+            return jsonify({
+                'success': False,
+                'message': 'Comments must be a string'
+            }), 400
+        
+        # Optimistic check: the version the lecturer was shown must still be current
+        if 'version' in data and data.get('version') != resource.version:
+            return _conflict('Resource was changed by someone else; reload it and review again')
+        
+        if claimed_by_other(resource, current_user.lecturer_profile.id):
+            return _conflict('Resource is claimed by another lecturer')
+        
+        resource.claimed_by_lecturer_id = None
+        resource.claim_expires_at = None
         
         if action == 'approve':
             resource.status = 'approved'
@@ -144,6 +160,7 @@ def review_resource(resource_id):
             resource.rejection_reason = None
             
             db.session.commit()
+            _send_reviewed([(resource.id, 'approved', resource.uploaded_by_student_id)])
             
             return jsonify({
                 'success': True,
@@ -151,6 +168,7 @@ def review_resource(resource_id):
                 'data': {
                     'id': resource.id,
                     'status': resource.status.value,
+                    'version': resource.version,
                     'review_date': resource.review_date.isoformat()
                 }
             })
@@ -163,6 +181,7 @@ def review_resource(resource_id):
             resource.rejection_reason = comments
             
             db.session.commit()
+            _send_reviewed([(resource.id, 'rejected', resource.uploaded_by_student_id)])
             
             return jsonify({
                 'success': True,
@@ -170,6 +189,7 @@ def review_resource(resource_id):
                 'data': {
                     'id': resource.id,
                     'status': resource.status.value,
+                    'version': resource.version,
                     'review_date': resource.review_date.isoformat()
                 }
             })
@@ -179,12 +199,270 @@ def review_resource(resource_id):
                 'message': 'Invalid action. Must be approve or reject.'
             }), 400
             
+    except StaleDataError:
+        # Another review of this resource committed between our read and write
+        db.session.rollback()
+        return _conflict('Resource was changed by someone else; reload it and review again')
     except Exception as e:
         return jsonify({
             'success': False,
             'message': f'Error reviewing resource: {str(e)}'
         }), 500
 
+def _conflict(message):
+    return jsonify({
+        'success': False,
+        'message': message
+    }), 409
+
+def _send_reviewed(reviews):
+    send_reviewed(current_user.lecturer_profile.id, reviews)
+
+def _batch_items(data):
+    # Either {"items": [{"id", "action", "comments", "version"?}, ...]} or one decision
+    # for many resources: {"ids": [...], "action": ..., "comments": ...}
+    if isinstance(data.get('items'), list):
+        return data['items']
+    if isinstance(data.get('ids'), list):
+        return [{'id': rid, 'action': data.get('action'), 'comments': data.get('comments', '')} for rid in data['ids']]
+    return None
+
+@lecturer_api_bp.route('/review/batch', methods=['POST'])
+@login_required
+@lecturer_required
+def review_batch():
+    try:
+        data = request.get_json(silent=True) or {}
+        items = _batch_items(data)
+        
+        if not isinstance(data.get('comments') or '', str):
+            return jsonify({
+                'success': False,
+                'message': 'Comments must be a string'
+            }), 400
+        
+        if not items:
+            return jsonify({
+                'success': False,
+                'message': 'Provide items (id, action, comments) or ids with an action'
+            }), 400
+        
+        limit = current_app.config['REVIEW_BATCH_MAX_ITEMS']
+        if len(items) > limit:
+            return jsonify({
+                'success': False,
+                'message': f'At most {limit} resources can be reviewed per request'
+            }), 400
+        
+        # Validate everything up front, then apply the valid decisions
+        results = []
+        decisions = {}  # resource id -> (action, comments)
+        for item in items:
+            item = item if isinstance(item, dict) else {}
+            resource_id = item.get('id')
+            action = item.get('action')
+            comments = item.get('comments') or ''
+            version = item.get('version')
+            result = {'id': resource_id, 'success': False}
+            results.append(result)
+            if not isinstance(resource_id, int) or isinstance(resource_id, bool):
+                result['message'] = 'Invalid resource id'
+            elif action not in ('approve', 'reject'):
+                result['message'] = 'Invalid action. Must be approve or reject.'
+            elif not isinstance(comments, str):
+                result['message'] = 'Comments must be a string'
+            elif version is not None and (not isinstance(version, int) or isinstance(version, bool)):
+                result['message'] = 'Invalid version'
+            elif resource_id in decisions:
+                result['message'] = 'Resource appears more than once in the batch'
+            else:
+                decisions[resource_id] = (action, comments, version)
+        
+        # Lock the rows (PostgreSQL) so leases and versions cannot change under us
+        lecturer_id = current_user.lecturer_profile.id
+        review_date = datetime.utcnow()
+        found = {
+            row.id: row for row in db.session.execute(
+                select(
+                    Resource.id, Resource.uploaded_by_student_id, Resource.version,
+                    Resource.claimed_by_lecturer_id, Resource.claim_expires_at
+                ).where(Resource.id.in_(list(decisions))).with_for_update()
+            )
+        } if decisions else {}
+        
+        failures = {}
+        for resource_id, (_, _, version) in decisions.items():
+            row = found.get(resource_id)
+            if row is None:
+                failures[resource_id] = 'Resource not found'
+            elif claimed_by_other(row, lecturer_id, review_date):
+                failures[resource_id] = 'Resource is claimed by another lecturer'
+            elif version is not None and version != row.version:
+                failures[resource_id] = 'Resource was changed by someone else; reload it and review again'
+        
+        # One UPDATE per distinct (action, comments) rather than per resource
+        groups = defaultdict(list)
+        for resource_id, (action, comments, _) in decisions.items():
+            if resource_id not in failures:
+                groups[(action, comments)].append(resource_id)
+        
+        for (action, comments), ids in groups.items():
+            # Matching on (id, version) makes the whole batch one optimistic
+            # check; a row changed since we read it leaves the count short
+            updated = db.session.execute(
+                update(Resource)
+                .where(tuple_(Resource.id, Resource.version).in_([(rid, found[rid].version) for rid in ids]))
+                .values(
+                    status=ResourceStatus.approved if action == 'approve' else ResourceStatus.rejected,
+                    reviewed_by_lecturer_id=lecturer_id,
+                    review_date=review_date,
+                    review_comments=comments,
+                    rejection_reason=comments if action == 'reject' else None,
+                    claimed_by_lecturer_id=None,
+                    claim_expires_at=None,
+                    version=Resource.version + 1
+                )
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            if updated != len(ids):
+                db.session.rollback()
+                return _conflict('Some resources changed while the batch was applied; nothing was saved, please retry')
+        
+        approved_ids = [rid for (action, _), ids in groups.items() if action == 'approve' for rid in ids]
+        rejected_ids = [rid for (action, _), ids in groups.items() if action == 'reject' for rid in ids]
+        approved_rows = []
+        if approved_ids:
+            approved_rows = db.session.execute(
+                select(Resource.id, Resource.title).where(Resource.id.in_(approved_ids))
+            ).all()
+        if groups:
+            refresh_listings(db.session.connection(), approved_ids + rejected_ids)
+            mark_catalogue_changed()
+            mark_suggestions_changed(approved=[(r.id, r.title) for r in approved_rows], removed=rejected_ids)
+        db.session.commit()
+        
+        reviews = []
+        for result in results:
+            resource_id = result['id']
+            if 'message' in result:
+                continue
+            if resource_id in failures:
+                result['message'] = failures[resource_id]
+                continue
+            status = 'approved' if decisions[resource_id][0] == 'approve' else 'rejected'
+            result.update(success=True, status=status, version=found[resource_id].version + 1,
+                          review_date=review_date.isoformat())
+            reviews.append((resource_id, status, found[resource_id].uploaded_by_student_id))
+        if reviews:
+            _send_reviewed(reviews)
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(approved_ids)} approved, {len(rejected_ids)} rejected, {len(results) - len(reviews)} failed.',
+            'data': {
+                'results': results,
+                'approved': len(approved_ids),
+                'rejected': len(rejected_ids),
+                'failed': len(results) - len(reviews)
+            }
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error reviewing resources: {str(e)}'
+        }), 500
+
+def _queue_data(lecturer_id, fields=QUEUE):
+    held = project(
+        held_query(lecturer_id).join(ResourceListing, ResourceListing.id == Resource.id), fields
+    ).all()
+    return {
+        'items': dump(held, fields),
+        'available': available_count()
+    }
+
+@lecturer_api_bp.route('/queue', methods=['GET'])
+@login_required
+@lecturer_required
+def queue():
+    try:
+        fields = pick(QUEUE, requested_fields())
+        return jsonify({
+            'success': True,
+            'data': _queue_data(current_user.lecturer_profile.id, fields)
+        })
+        
+    except InvalidFields as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching review queue: {str(e)}'
+        }), 500
+
+@lecturer_api_bp.route('/queue/claim', methods=['POST'])
+@login_required
+@lecturer_required
+def queue_claim():
+    try:
+        data = request.get_json(silent=True) or {}
+        count = data.get('count', current_app.config['REVIEW_CLAIM_DEFAULT'])
+        
+        if not isinstance(count, int) or isinstance(count, bool) or count < 1:
+            return jsonify({
+                'success': False,
+                'message': 'count must be a positive integer'
+            }), 400
+        
+        count = min(count, current_app.config['REVIEW_CLAIM_MAX'])
+        claim(current_user.lecturer_profile.id, count)
+        
+        return jsonify({
+            'success': True,
+            'data': _queue_data(current_user.lecturer_profile.id)
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error claiming resources: {str(e)}'
+        }), 500
+
+@lecturer_api_bp.route('/queue/release', methods=['POST'])
+@login_required
+@lecturer_required
+def queue_release():
+    try:
+        data = request.get_json(silent=True) or {}
+        ids = data.get('ids')
+        
+        if ids is not None and not (isinstance(ids, list) and all(isinstance(i, int) for i in ids)):
+            return jsonify({
+                'success': False,
+                'message': 'ids must be a list of resource ids'
+            }), 400
+        
+        released = release(current_user.lecturer_profile.id, ids)
+        
+        return jsonify({
+            'success': True,
+            'message': f'Released {released} resource(s).',
+            'data': {'released': released}
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error releasing resources: {str(e)}'
+        }), 500
+
 @lecturer_api_bp.route('/profile', methods=['GET'])
 @login_required
 @lecturer_required
@@ -1,7 +1,12 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.exc import StaleDataError
 from app.utils.decorators import lecturer_required
+from app.signals import send_reviewed
+from app.utils.review_queue import claimed_by_other
 from app.models import Resource, Category
+from app import db
 from datetime import datetime
 
 lecturer_bp = Blueprint('lecturer', __name__)
@@ -11,10 +16,10 @@ lecturer_bp = Blueprint('lecturer', __name__)
 @lecturer_required
 def dashboard():
     # Get pending resources for review
-    pending_resources = Resource.query.filter_by(status='pending').order_by(Resource.upload_date.desc()).all()
+    pending_resources = Resource.query.options(joinedload(Resource.category), joinedload(Resource.student_uploader)).filter_by(status='pending').order_by(Resource.upload_date.desc()).all()
     
     # Get resources reviewed by this lecturer
-    reviewed_resources = Resource.query.filter_by(
+    reviewed_resources = Resource.query.options(joinedload(Resource.category), joinedload(Resource.student_uploader)).filter_by(
         reviewed_by_lecturer_id=current_user.lecturer_profile.id
     ).order_by(Resource.review_date.desc()).limit(10).all()
     
@@ -31,22 +36,48 @@ def review_resource(resource_id):
     if request.method == 'POST':
         action = request.form.get('action')
         comments = request.form.get('comments', '')
+        lecturer_id = current_user.lecturer_profile.id
+        
+        # Same checks as POST /api/lecturer/review/<id>: the version the form
+        # was rendered with (if it sends one) and other lecturers' claims
+        version = request.form.get('version', type=int)
+        if 'version' in request.form and version != resource.version:
+            flash('This resource was changed by someone else; review it again.', 'error')
+            return redirect(url_for('lecturer.review_resource', resource_id=resource.id))
+        if claimed_by_other(resource, lecturer_id):
+            flash('This resource is claimed by another lecturer.', 'error')
+            return redirect(url_for('lecturer.dashboard'))
         
         if action == 'approve':
             resource.status = 'approved'
-            resource.reviewed_by_lecturer_id = current_user.lecturer_profile.id
+            resource.reviewed_by_lecturer_id = lecturer_id
             resource.review_date = datetime.utcnow()
             resource.review_comments = comments
-            flash('Resource approved successfully!', 'success')
+            resource.rejection_reason = None
+            message = ('Resource approved successfully!', 'success')
         elif action == 'reject':
             resource.status = 'rejected'
-            resource.reviewed_by_lecturer_id = current_user.lecturer_profile.id
+            resource.reviewed_by_lecturer_id = lecturer_id
             resource.review_date = datetime.utcnow()
             resource.review_comments = comments
             resource.rejection_reason = comments
-            flash('Resource rejected.', 'info')
+            message = ('Resource rejected.', 'info')
+        else:
+            flash('Invalid action. Must be approve or reject.', 'error')
+            return redirect(url_for('lecturer.review_resource', resource_id=resource.id))
+        
+        resource.claimed_by_lecturer_id = None
+        resource.claim_expires_at = None
+        try:
+            db.session.commit()
+        except StaleDataError:
+            # Another review of this resource committed between our read and write
+            db.session.rollback()
+            flash('This resource was changed by someone else; review it again.', 'error')
+            return redirect(url_for('lecturer.review_resource', resource_id=resource.id))
         
-        db.session.commit()
+        flash(*message)
+        send_reviewed(lecturer_id, [(resource.id, resource.status.value, resource.uploaded_by_student_id)])
         return redirect(url_for('lecturer.dashboard'))
     
     return render_template('lecturer/review.html', resource=resource)
@@ -4,5 +4,11 @@ from app.models.lecturer import Lecturer
 from app.models.resource import Resource
 from app.models.category import Category
 from app.models.resource_download import ResourceDownload
+from app.models.upload_session import UploadSession
+from app.models.file_blob import FileBlob
+from app.models.resource_listing import ResourceListing
+from app.models.download_stats import DailyResourceDownloads, DailyCategoryDownloads, DailyUserDownloads, DownloadRollupState
+from app.models.resource_facets import ResourceFacetCount
 
-__all__ = ['User', 'Student', 'Lecturer', 'Resource', 'Category', 'ResourceDownload']
+__all__ = ['User', 'Student', 'Lecturer', 'Resource', 'Category', 'ResourceDownload', 'UploadSession', 'FileBlob', 'ResourceListing',
+           'DailyResourceDownloads', 'DailyCategoryDownloads', 'DailyUserDownloads', 'DownloadRollupState', 'ResourceFacetCount']
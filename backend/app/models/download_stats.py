@@ -0,0 +1,48 @@
+from app import db
+
+# Daily download totals, rolled up from resource_downloads by
+# app/utils/download_stats.py. They carry no foreign keys, so history
+# survives resources, categories and users being deleted.
+
+class DailyResourceDownloads(db.Model):
+    __tablename__ = 'daily_resource_downloads'
+
+    day = db.Column(db.Date, primary_key=True)
+    resource_id = db.Column(db.Integer, primary_key=True)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyResourceDownloads {self.day} Resource:{self.resource_id} {self.downloads}>'
+
+class DailyCategoryDownloads(db.Model):
+    __tablename__ = 'daily_category_downloads'
+
+    day = db.Column(db.Date, primary_key=True)
+    category_id = db.Column(db.Integer, primary_key=True)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyCategoryDownloads {self.day} Category:{self.category_id} {self.downloads}>'
+
+class DailyUserDownloads(db.Model):
+    __tablename__ = 'daily_user_downloads'
+
+    # User first: the only query is one user's recent days
+    user_id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    downloads = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DailyUserDownloads {self.day} User:{self.user_id} {self.downloads}>'
+
+class DownloadRollupState(db.Model):
+    """Single row recording how far the raw log has been rolled up."""
+    __tablename__ = 'download_rollup_state'
+
+    id = db.Column(db.Integer, primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)  # rolled up through this resource_downloads.id
+    horizon_id = db.Column(db.Integer, nullable=False, default=0)  # highest id seen by the previous run
+    updated_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<DownloadRollupState {self.last_id}/{self.horizon_id}>'
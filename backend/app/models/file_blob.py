@@ -0,0 +1,18 @@
+from app import db
+from datetime import datetime
+
+class FileBlob(db.Model):
+    __tablename__ = 'file_blobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    sha256 = db.Column(db.String(64), unique=True, nullable=False, index=True)
+    size = db.Column(db.Integer, nullable=False)  # in bytes
+    path = db.Column(db.String(500), nullable=False)
+    ref_count = db.Column(db.Integer, default=0, nullable=False)  # -1 while `flask blobs gc` deletes it
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    resources = db.relationship('Resource', backref='blob', lazy='dynamic')
+    
+    def __repr__(self):
+        return f'<FileBlob {self.sha256[:12]} refs={self.ref_count}>'
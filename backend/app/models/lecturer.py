@@ -25,7 +25,8 @@ class Lecturer(db.Model):
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     
     # Relationships
-    reviewed_resources = db.relationship('Resource', backref='lecturer_reviewer', lazy='dynamic')
+    reviewed_resources = db.relationship('Resource', backref='lecturer_reviewer', lazy='dynamic',
+                                         foreign_keys='Resource.reviewed_by_lecturer_id')
     
     def __repr__(self):
         return f'<Lecturer {self.full_name} ({self.employee_id}) - {self.position.value}>'
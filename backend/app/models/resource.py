@@ -1,5 +1,5 @@
 from app import db
-from sqlalchemy import Enum
+from sqlalchemy import DDL, Enum
 import enum
 from datetime import datetime
 
@@ -10,6 +10,14 @@ class ResourceStatus(enum.Enum):
 
 class Resource(db.Model):
     __tablename__ = 'resources'
+    __table_args__ = (
+        # One per listing query: equality columns first, then the sort. Ending
+        # in id lets keyset pages on (upload_date, id) read the index in order.
+        db.Index('ix_resources_status_upload_date', 'status', 'upload_date', 'id'),
+        db.Index('ix_resources_status_category_upload_date', 'status', 'category_id', 'upload_date', 'id'),
+        db.Index('ix_resources_student_upload_date', 'uploaded_by_student_id', 'upload_date', 'id'),
+        db.Index('ix_resources_reviewer_review_date', 'reviewed_by_lecturer_id', 'review_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False, index=True)
@@ -21,19 +29,80 @@ class Resource(db.Model):
     upload_date = db.Column(db.DateTime, server_default=db.func.now())
     status = db.Column(Enum(ResourceStatus), default=ResourceStatus.pending, nullable=False)
     download_count = db.Column(db.Integer, default=0)
+    trending_score = db.Column(db.Float, nullable=False, default=0.0, server_default='0')  # see app/utils/trending.py
     
     # Foreign Keys
     category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
     uploaded_by_student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
     reviewed_by_lecturer_id = db.Column(db.Integer, db.ForeignKey('lecturers.id'))
+    blob_id = db.Column(db.Integer, db.ForeignKey('file_blobs.id'), index=True)  # NULL for pre-dedup uploads
     
     # Additional fields for review process
     review_date = db.Column(db.DateTime)
     review_comments = db.Column(db.Text)
     rejection_reason = db.Column(db.Text)
     
+    # Review queue lease (see app/utils/review_queue.py)
+    claimed_by_lecturer_id = db.Column(db.Integer, db.ForeignKey('lecturers.id'), index=True)
+    claim_expires_at = db.Column(db.DateTime)
+    
+    # Bumped by every ORM update, which also checks it, so two reviews of the
+    # same resource cannot both succeed (StaleDataError for the loser)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
+    
+    __mapper_args__ = {'version_id_col': version}
+    
     # Relationships
     download_logs = db.relationship('ResourceDownload', backref='resource', lazy='dynamic', cascade='all, delete-orphan')
     
+    @property
+    def storage_key(self):
+        # The blob row is authoritative; file_path mirrors it for older readers
+        return self.blob.path if self.blob_id else self.file_path
+    
     def __repr__(self):
         return f'<Resource {self.title} ({self.status.value})>'
+
+@db.event.listens_for(Resource, 'after_delete')
+def release_blob(mapper, connection, target):
+    # Drop this resource's reference; unreferenced blobs are removed by `flask blobs gc`
+    if target.blob_id is not None:
+        from app.models.file_blob import FileBlob
+        blobs = FileBlob.__table__
+        connection.execute(
+            blobs.update()
+            .where(blobs.c.id == target.blob_id)
+            .values(ref_count=blobs.c.ref_count - 1)
+        )
+
+# Full-text search over approved resources (queried by app/utils/search.py).
+# SQLite keeps a separate FTS5 table keyed by resource id that the review
+# flow maintains; Postgres uses a GIN expression index kept up to date by
+# the database itself.
+SQLITE_SEARCH_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts "
+    "USING fts5(title, description, tokenize='unicode61 remove_diacritics 2')"
+)
+POSTGRES_SEARCH_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_resources_search ON resources USING gin "
+    "(to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '')))"
+)
+# Keep resources_fts (rowid == resources.id) holding exactly the approved
+# resources, whichever code path writes them
+SQLITE_SEARCH_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS resources_fts_insert AFTER INSERT ON resources "
+    "WHEN new.status = 'approved' BEGIN "
+    "INSERT INTO resources_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, coalesce(new.description, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS resources_fts_update AFTER UPDATE OF title, description, status ON resources "
+    "BEGIN DELETE FROM resources_fts WHERE rowid = old.id; "
+    "INSERT INTO resources_fts(rowid, title, description) "
+    "SELECT new.id, new.title, coalesce(new.description, '') WHERE new.status = 'approved'; END",
+    "CREATE TRIGGER IF NOT EXISTS resources_fts_delete AFTER DELETE ON resources "
+    "BEGIN DELETE FROM resources_fts WHERE rowid = old.id; END",
+)
+db.event.listen(Resource.__table__, 'after_create', DDL(SQLITE_SEARCH_DDL).execute_if(dialect='sqlite'))
+for _trigger in SQLITE_SEARCH_TRIGGERS:
+    db.event.listen(Resource.__table__, 'after_create', DDL(_trigger).execute_if(dialect='sqlite'))
+db.event.listen(Resource.__table__, 'after_create', DDL(POSTGRES_SEARCH_DDL).execute_if(dialect='postgresql'))
+db.event.listen(Resource.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS resources_fts').execute_if(dialect='sqlite'))
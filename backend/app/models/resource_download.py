@@ -3,6 +3,10 @@ from datetime import datetime
 
 class ResourceDownload(db.Model):
     __tablename__ = 'resource_downloads'
+    __table_args__ = (
+        db.Index('ix_resource_downloads_resource_date', 'resource_id', 'download_date'),
+        db.Index('ix_resource_downloads_user_date', 'user_id', 'download_date'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     resource_id = db.Column(db.Integer, db.ForeignKey('resources.id'), nullable=False)
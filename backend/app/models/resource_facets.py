@@ -0,0 +1,18 @@
+from app import db
+
+class ResourceFacetCount(db.Model):
+    """Number of approved resources per (category, file type, upload year).
+
+    Kept in step with resource_listing by app/utils/listings.py, in the same
+    transaction. Browse facet counts without a search are sums over this
+    small table rather than a GROUP BY over every approved resource.
+    """
+    __tablename__ = 'resource_facet_counts'
+
+    category_id = db.Column(db.Integer, primary_key=True)
+    file_type = db.Column(db.String(50), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)  # 0 when upload_date is unset
+    resources = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<ResourceFacetCount Category:{self.category_id} {self.file_type} {self.year} {self.resources}>'
@@ -0,0 +1,58 @@
+from app import db
+from sqlalchemy import DDL, Enum
+from app.models.resource import ResourceStatus
+
+class ResourceListing(db.Model):
+    """Flat copy of each resource with its category and uploader inlined.
+
+    Listings read this table alone instead of joining resources, categories
+    and students. Rows are written in the same transaction as the change
+    they mirror (see app/utils/listings.py); ``flask listings rebuild``
+    refills the table from scratch.
+    """
+    __tablename__ = 'resource_listing'
+    __table_args__ = (
+        # Same shapes as the indexes on resources, for the same listing queries
+        db.Index('ix_resource_listing_status_upload_date', 'status', 'upload_date', 'id'),
+        db.Index('ix_resource_listing_status_category_upload_date', 'status', 'category_id', 'upload_date', 'id'),
+        db.Index('ix_resource_listing_student_upload_date', 'student_id', 'upload_date', 'id'),
+        db.Index('ix_resource_listing_reviewer_review_date', 'reviewed_by_lecturer_id', 'review_date'),
+        # sort=trending and sort=popular read the top of these
+        db.Index('ix_resource_listing_status_trending', 'status', 'trending_score', 'id'),
+        db.Index('ix_resource_listing_status_downloads', 'status', 'download_count', 'id'),
+    )
+
+    # Same value as resources.id, so cursors and search hits work unchanged
+    id = db.Column(db.Integer, db.ForeignKey('resources.id', ondelete='CASCADE'), primary_key=True, autoincrement=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    file_name = db.Column(db.String(255), nullable=False)
+    file_type = db.Column(db.String(50), nullable=False)
+    file_size = db.Column(db.Integer, nullable=False)
+    upload_date = db.Column(db.DateTime)
+    status = db.Column(Enum(ResourceStatus), nullable=False)
+    download_count = db.Column(db.Integer, default=0)
+    trending_score = db.Column(db.Float, nullable=False, default=0.0, server_default='0')
+
+    category_id = db.Column(db.Integer, nullable=False)
+    category_name = db.Column(db.String(100))
+
+    student_id = db.Column(db.Integer, nullable=False)
+    uploader_name = db.Column(db.String(100))
+    uploader_registration_number = db.Column(db.String(50))
+
+    reviewed_by_lecturer_id = db.Column(db.Integer)
+    review_date = db.Column(db.DateTime)
+    review_comments = db.Column(db.Text)
+    rejection_reason = db.Column(db.Text)
+
+    def __repr__(self):
+        return f'<ResourceListing {self.title} ({self.status.value})>'
+
+# Postgres search over the listing; the expression must match _pg_document
+# in app/utils/search.py. SQLite shares resources_fts, which is keyed by id.
+POSTGRES_LISTING_SEARCH_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_resource_listing_search ON resource_listing USING gin "
+    "(to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '')))"
+)
+db.event.listen(ResourceListing.__table__, 'after_create', DDL(POSTGRES_LISTING_SEARCH_DDL).execute_if(dialect='postgresql'))
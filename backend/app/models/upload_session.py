@@ -0,0 +1,36 @@
+from app import db
+from datetime import datetime
+
+class UploadSession(db.Model):
+    __tablename__ = 'upload_sessions'
+    
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex, also names the staging file
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, index=True)
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    title = db.Column(db.String(200), nullable=False)
+    description = db.Column(db.Text)
+    file_name = db.Column(db.String(255), nullable=False)
+    file_type = db.Column(db.String(50), nullable=False)
+    file_size = db.Column(db.Integer, nullable=False)  # declared total, in bytes
+    received_size = db.Column(db.Integer, default=0, nullable=False)
+    sha256 = db.Column(db.String(64))  # declared at init for direct uploads, else set on finalize
+    direct = db.Column(db.Boolean, default=False, nullable=False)  # client PUTs straight to object storage
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    completed_at = db.Column(db.DateTime)
+    resource_id = db.Column(db.Integer, db.ForeignKey('resources.id'))
+    
+    # Relationships
+    student = db.relationship('Student', backref=db.backref('upload_sessions', lazy='dynamic'))
+    category = db.relationship('Category')
+    
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+    
+    def is_expired(self, now=None):
+        return (now or datetime.utcnow()) >= self.expires_at
+    
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.received_size}/{self.file_size}>'
@@ -1,6 +1,7 @@
 from app import db, login_manager
+from flask import current_app
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash, check_password_hash
 from sqlalchemy import Enum
 import enum
 
@@ -8,31 +9,63 @@ class UserRole(enum.Enum):
     student = 'student'
     lecturer = 'lecturer'
 
+def hash_method_prefix(method):
+    """The prefix ``generate_password_hash(method=method)`` writes, with
+    werkzeug's defaults filled in (``'scrypt'`` -> ``'scrypt:32768:8:1'``)."""
+    name, *args = method.strip().split(':')
+    if name == 'scrypt' and not args:
+        return 'scrypt:32768:8:1'
+    if name == 'pbkdf2' and len(args) < 2:
+        return f"pbkdf2:{args[0] if args else 'sha256'}:{DEFAULT_PBKDF2_ITERATIONS}"
+    return ':'.join([name, *args])
+
 class User(UserMixin, db.Model):
     __tablename__ = 'users'
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), unique=True, nullable=False, index=True)
     email = db.Column(db.String(120), unique=True, nullable=False, index=True)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(256), nullable=False)  # scrypt hashes are ~160 chars
     role = db.Column(Enum(UserRole), nullable=False)
     created_at = db.Column(db.DateTime, server_default=db.func.now())
     last_login = db.Column(db.DateTime)
     is_active = db.Column(db.Boolean, default=True)
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # bumped by password changes; see app/utils/tokens.py
     
     # Relationships
     student_profile = db.relationship('Student', backref='user', uselist=False, lazy='joined', cascade='all, delete-orphan')
     lecturer_profile = db.relationship('Lecturer', backref='user', uselist=False, lazy='joined', cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        # A new password voids the refresh tokens issued for the old one
+        self.token_version = (self.token_version or 0) + 1
+        self.rehash_password(password)
+    
+    def rehash_password(self, password):
+        """Store ``password`` (already checked) with the current PASSWORD_HASH_METHOD."""
+        self.password_hash = generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
     
+    def password_needs_rehash(self):
+        # Hashes start with their parameters, e.g. 'scrypt:32768:8:1$salt$hash'
+        return self.password_hash.split('$', 1)[0] != hash_method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
+    
     def __repr__(self):
         return f'<User {self.username} ({self.role.value})>'
 
 @login_manager.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    # Runs on every authenticated request, so serve a cached snapshot
+    from app.utils.user_cache import user_cache
+    user = user_cache.get(int(id))
+    if user is None or not user.is_active:
+        return None
+    return user
+
+@login_manager.request_loader
+def load_user_from_request(request):
+    # Bearer tokens (AUTH_TOKENS_ENABLED); tried when there is no session login
+    from app.utils.tokens import user_from_request
+    return user_from_request(request)
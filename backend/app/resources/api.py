@@ -1,14 +1,73 @@
-from flask import Blueprint, request, jsonify, send_file, current_app
+from flask import Blueprint, request, jsonify, current_app
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
+from app.utils.catalogue_cache import catalogue_cache
 from app.utils.decorators import student_required, upload_permission_required
-from app.models import Resource, Category, ResourceDownload
+from app.utils.download_log import download_log
+from app.utils.downloads import counts_as_download, send_resource, signed_download_url, starts_download, verified_link
+from app.storage import get_storage
+from app.utils.file_store import store_file, store_object
+from app.utils.pagination import InvalidCursor, keyset_paginate, pagination_data
+from app.utils.serializers import MY_UPLOADS, InvalidFields, dump, pick, project, requested_fields
+from app.utils.suggest import suggest_index
+from app.utils.uploads import (
+    UploadBusy, UploadTooLarge, chunk_hasher, copy_stream, open_for_append, save_stream,
+    staging_key, staging_path
+)
+from app.models import Resource, Category, ResourceListing, UploadSession
+from app.models.resource import ResourceStatus
 from app import db
 from datetime import datetime
+import hashlib
 import os
+import re
+import uuid
+from urllib.parse import unquote
 
 resources_api_bp = Blueprint('resources_api', __name__)
 
+def _upload_data(resource):
+    return {
+        'id': resource.id,
+        'title': resource.title,
+        'description': resource.description,
+        'file_name': resource.file_name,
+        'file_type': resource.file_type,
+        'file_size': resource.file_size,
+        'upload_date': resource.upload_date.isoformat(),
+        'status': resource.status.value,
+        'category': {
+            'id': resource.category.id,
+            'name': resource.category.name
+        }
+    }
+
+def _upload_session_data(upload):
+    return {
+        'upload_id': upload.id,
+        'file_name': upload.file_name,
+        'file_size': upload.file_size,
+        'offset': upload.received_size,
+        'chunk_size': current_app.config['UPLOAD_CHUNK_SIZE'],
+        'expires_at': upload.expires_at.isoformat(),
+        'completed': upload.is_complete,
+        'resource_id': upload.resource_id,
+        'direct': upload.direct
+    }
+
+def _discard_staged(upload):
+    if upload.direct:
+        get_storage().delete(staging_key(upload.id))
+    elif os.path.exists(staging_path(upload.id)):
+        os.remove(staging_path(upload.id))
+    chunk_hasher.discard(upload.id)
+
+def _get_upload_session(upload_id):
+    upload = UploadSession.query.get(upload_id)
+    if not upload or upload.student_id != current_user.student_profile.id:
+        return None
+    return upload
+
 @resources_api_bp.route('/upload', methods=['POST'])
 @login_required
 @student_required
@@ -48,14 +107,12 @@ def upload():
                 'message': 'Invalid category'
             }), 400
         
-        # Save file
+        # Stream to a staging file, measuring and hashing as the bytes go
+        # through, then hand it to the content-addressed store
         filename = secure_filename(file.filename)
-        file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        
-        # Ensure upload directory exists
-        os.makedirs(current_app.config['UPLOAD_FOLDER'], exist_ok=True)
-        
-        file.save(file_path)
+        staged = staging_path(uuid.uuid4().hex)
+        file_size, sha256 = save_stream(file.stream, staged)
+        blob = store_file(staged, sha256, file_size)
         
         # Create resource record
         resource = Resource(
@@ -63,10 +120,11 @@ def upload():
             description=description,
             category_id=category_id,
             uploaded_by_student_id=current_user.student_profile.id,
-            file_path=file_path,
+            file_path=blob.path,
+            blob_id=blob.id,
             file_name=filename,
             file_type=file.filename.rsplit('.', 1)[1].lower(),
-            file_size=os.path.getsize(file_path)
+            file_size=file_size
         )
         
         db.session.add(resource)
@@ -75,20 +133,7 @@ def upload():
         return jsonify({
             'success': True,
             'message': 'Resource uploaded successfully! It will be reviewed by a lecturer.',
-            'data': {
-                'id': resource.id,
-                'title': resource.title,
-                'description': resource.description,
-                'file_name': resource.file_name,
-                'file_type': resource.file_type,
-                'file_size': resource.file_size,
-                'upload_date': resource.upload_date.isoformat(),
-                'status': resource.status.value,
-                'category': {
-                    'id': category.id,
-                    'name': category.name
-                }
-            }
+            'data': _upload_data(resource)
         })
         
     except Exception as e:
@@ -98,31 +143,374 @@ def upload():
             'message': f'Error uploading resource: {str(e)}'
         }), 500
 
+@resources_api_bp.route('/upload/init', methods=['POST'])
+@login_required
+@student_required
+@upload_permission_required
+def upload_init():
+    try:
+        data = request.get_json()
+        
+        if not data or not all([data.get('title'), data.get('category'), data.get('file_name')]):
+            return jsonify({
+                'success': False,
+                'message': 'Title, category and file_name are required'
+            }), 400
+        
+        file_size = data.get('file_size')
+        if not isinstance(file_size, int) or file_size <= 0:
+            return jsonify({
+                'success': False,
+                'message': 'file_size must be a positive number of bytes'
+            }), 400
+        
+        if file_size > current_app.config['UPLOAD_MAX_FILE_SIZE']:
+            return jsonify({
+                'success': False,
+                'message': f"File exceeds the {current_app.config['UPLOAD_MAX_FILE_SIZE']} byte limit"
+            }), 413
+        
+        filename = secure_filename(data.get('file_name'))
+        if '.' not in filename:
+            return jsonify({
+                'success': False,
+                'message': 'File name must have an extension'
+            }), 400
+        
+        # Validate category
+        category = Category.query.get(data.get('category'))
+        if not category or not category.is_active:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid category'
+            }), 400
+        
+        # Direct mode: the client PUTs the whole file to a presigned storage
+        # URL, so the bytes never pass through this app's workers. The size
+        # and declared SHA-256 are signed into the URL, so finalize can trust
+        # the store's checksum instead of reading the object back.
+        presigned = None
+        sha256 = None
+        upload_id = uuid.uuid4().hex
+        if data.get('direct'):
+            sha256 = data.get('sha256')
+            if not isinstance(sha256, str) or not re.fullmatch(r'[0-9a-fA-F]{64}', sha256):
+                return jsonify({
+                    'success': False,
+                    'message': 'Direct uploads need the sha256 of the file (64 hex digits)'
+                }), 400
+            sha256 = sha256.lower()
+            presigned = get_storage().presign_upload(
+                staging_key(upload_id), file_size, sha256,
+                expires_in=current_app.config['STORAGE_PRESIGN_EXPIRES']
+            )
+            if presigned is None:
+                return jsonify({
+                    'success': False,
+                    'message': 'Direct uploads are not supported by this storage backend'
+                }), 400
+        
+        now = datetime.utcnow()
+        upload = UploadSession(
+            id=upload_id,
+            student_id=current_user.student_profile.id,
+            category_id=category.id,
+            title=data.get('title'),
+            description=data.get('description'),
+            file_name=filename,
+            file_type=filename.rsplit('.', 1)[1].lower(),
+            file_size=file_size,
+            received_size=0,
+            sha256=sha256,
+            direct=presigned is not None,
+            expires_at=now + current_app.config['UPLOAD_SESSION_LIFETIME']
+        )
+        db.session.add(upload)
+        
+        # Clear out this student's abandoned sessions while we are here
+        expired = UploadSession.query.filter(
+            UploadSession.student_id == current_user.student_profile.id,
+            UploadSession.completed_at.is_(None),
+            UploadSession.expires_at < now
+        ).all()
+        for stale in expired:
+            _discard_staged(stale)
+            db.session.delete(stale)
+        
+        db.session.commit()
+        
+        data = _upload_session_data(upload)
+        if upload.direct:
+            data['upload_url'], data['upload_headers'] = presigned
+        else:
+            # Create the empty staging file so offsets always come from disk
+            open(staging_path(upload.id), 'wb').close()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Upload started',
+            'data': data
+        }), 201
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error starting upload: {str(e)}'
+        }), 500
+
+@resources_api_bp.route('/upload/<upload_id>', methods=['GET'])
+@login_required
+@student_required
+def upload_status(upload_id):
+    upload = _get_upload_session(upload_id)
+    if not upload:
+        return jsonify({
+            'success': False,
+            'message': 'Upload not found'
+        }), 404
+    
+    # The staged file is the source of truth for how much has arrived
+    path = staging_path(upload.id)
+    if not upload.is_complete and not upload.direct and os.path.exists(path):
+        upload.received_size = os.path.getsize(path)
+    
+    return jsonify({
+        'success': True,
+        'data': _upload_session_data(upload)
+    })
+
+@resources_api_bp.route('/upload/<upload_id>', methods=['PUT', 'PATCH'])
+@login_required
+@student_required
+@upload_permission_required
+def upload_chunk(upload_id):
+    try:
+        upload = _get_upload_session(upload_id)
+        if not upload:
+            return jsonify({
+                'success': False,
+                'message': 'Upload not found'
+            }), 404
+        
+        if upload.is_complete or upload.is_expired():
+            return jsonify({
+                'success': False,
+                'message': 'Upload is already finalized' if upload.is_complete else 'Upload has expired'
+            }), 410
+        
+        if upload.direct:
+            return jsonify({
+                'success': False,
+                'message': 'This upload goes directly to storage; PUT the file to its upload_url'
+            }), 409
+        
+        offset = request.headers.get('Upload-Offset', request.args.get('offset'), type=int)
+        if offset is None:
+            return jsonify({
+                'success': False,
+                'message': 'Upload-Offset header is required'
+            }), 400
+        
+        path = staging_path(upload.id)
+        if not os.path.exists(path):
+            return jsonify({
+                'success': False,
+                'message': 'Upload data is no longer available, please start again'
+            }), 410
+        
+        try:
+            with open_for_append(path) as f:
+                current = os.fstat(f.fileno()).st_size
+                if offset != current:
+                    # Client is out of sync (e.g. resuming after a dropped
+                    # connection); tell it where to continue from
+                    return jsonify({
+                        'success': False,
+                        'message': 'Offset mismatch',
+                        'data': {'offset': current}
+                    }), 409
+                
+                hasher = chunk_hasher.get(upload.id, path, current)
+                written = 0
+                try:
+                    written = copy_stream(request.stream, f, hasher, limit=upload.file_size - current)
+                finally:
+                    f.flush()
+                    received = os.fstat(f.fileno()).st_size
+                    if received == current + written:
+                        chunk_hasher.put(upload.id, received, hasher)
+        except UploadBusy:
+            return jsonify({
+                'success': False,
+                'message': 'Another chunk for this upload is still being written'
+            }), 409
+        except UploadTooLarge:
+            db.session.rollback()
+            return jsonify({
+                'success': False,
+                'message': 'Chunk goes past the declared file size'
+            }), 413
+        
+        upload.received_size = received
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'data': _upload_session_data(upload)
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error receiving chunk: {str(e)}'
+        }), 500
+
+@resources_api_bp.route('/upload/<upload_id>/finalize', methods=['POST'])
+@login_required
+@student_required
+@upload_permission_required
+def upload_finalize(upload_id):
+    try:
+        upload = _get_upload_session(upload_id)
+        if not upload:
+            return jsonify({
+                'success': False,
+                'message': 'Upload not found'
+            }), 404
+        
+        # Finalize is idempotent so a client can safely retry it
+        if upload.is_complete:
+            resource = Resource.query.get(upload.resource_id)
+            return jsonify({
+                'success': True,
+                'message': 'Resource uploaded successfully! It will be reviewed by a lecturer.',
+                'data': _upload_data(resource)
+            })
+        
+        storage = get_storage()
+        path = staging_path(upload.id)
+        if upload.direct:
+            key = staging_key(upload.id)
+            received = storage.size(key) if storage.exists(key) else 0
+        else:
+            received = os.path.getsize(path) if os.path.exists(path) else 0
+        if received != upload.file_size:
+            return jsonify({
+                'success': False,
+                'message': f'Upload incomplete: received {received} of {upload.file_size} bytes',
+                'data': {'offset': received}
+            }), 409
+        
+        category = Category.query.get(upload.category_id)
+        if not category or not category.is_active:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid category'
+            }), 400
+        
+        # Identical content already stored means the staged copy is just dropped
+        if upload.direct:
+            stored = storage.checksum(key)
+            if stored is None:
+                # The store keeps no checksum; read the object back instead
+                hasher = hashlib.sha256()
+                for buf in storage.stream(key):
+                    hasher.update(buf)
+                stored = hasher.hexdigest()
+            if stored != upload.sha256:
+                storage.delete(key)
+                return jsonify({
+                    'success': False,
+                    'message': 'Uploaded file does not match the declared sha256; upload it again',
+                    'data': {'offset': 0}
+                }), 409
+            blob = store_object(key, upload.sha256, received)
+        else:
+            upload.sha256 = chunk_hasher.get(upload.id, path, received).hexdigest()
+            chunk_hasher.discard(upload.id)
+            blob = store_file(path, upload.sha256, received)
+        
+        resource = Resource(
+            title=upload.title,
+            description=upload.description,
+            category_id=upload.category_id,
+            uploaded_by_student_id=upload.student_id,
+            file_path=blob.path,
+            blob_id=blob.id,
+            file_name=upload.file_name,
+            file_type=upload.file_type,
+            file_size=received
+        )
+        db.session.add(resource)
+        db.session.flush()
+        
+        upload.received_size = received
+        upload.completed_at = datetime.utcnow()
+        upload.resource_id = resource.id
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Resource uploaded successfully! It will be reviewed by a lecturer.',
+            'data': _upload_data(resource)
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error finalizing upload: {str(e)}'
+        }), 500
+
+@resources_api_bp.route('/upload/<upload_id>', methods=['DELETE'])
+@login_required
+@student_required
+def upload_abort(upload_id):
+    try:
+        upload = _get_upload_session(upload_id)
+        if not upload or upload.is_complete:
+            return jsonify({
+                'success': False,
+                'message': 'Upload not found'
+            }), 404
+        
+        _discard_staged(upload)
+        db.session.delete(upload)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Upload cancelled'
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'message': f'Error cancelling upload: {str(e)}'
+        }), 500
+
 @resources_api_bp.route('/download/<int:resource_id>', methods=['GET'])
 @login_required
 def download(resource_id):
     try:
         resource = Resource.query.get_or_404(resource_id)
         
-        if resource.status != 'approved':
+        if resource.status != ResourceStatus.approved:
             return jsonify({
                 'success': False,
                 'message': 'This resource is not available for download'
             }), 403
         
-        # Log the download
-        download_log = ResourceDownload(
-            resource_id=resource_id,
-            user_id=current_user.id,
-            ip_address=request.remote_addr
-        )
-        db.session.add(download_log)
+        response = send_resource(resource)
         
-        # Increment download count
-        resource.download_count += 1
-        db.session.commit()
+        # Log the download; the row and the counter are written in batches
+        if counts_as_download(response):
+            download_log.record(resource.id, current_user.id, request.remote_addr)
         
-        return send_file(resource.file_path, as_attachment=True, download_name=resource.file_name)
+        return response
         
     except Exception as e:
         return jsonify({
@@ -130,18 +518,105 @@ def download(resource_id):
             'message': f'Error downloading resource: {str(e)}'
         }), 500
 
+@resources_api_bp.route('/download/<int:resource_id>/link', methods=['GET'])
+@login_required
+def download_link(resource_id):
+    try:
+        if not current_app.config['DOWNLOAD_SIGNING_KEY']:
+            return jsonify({
+                'success': False,
+                'message': 'Signed download links are not enabled'
+            }), 404
+        
+        resource = Resource.query.get_or_404(resource_id)
+        
+        if resource.status != ResourceStatus.approved:
+            return jsonify({
+                'success': False,
+                'message': 'This resource is not available for download'
+            }), 403
+        
+        # Counted when the link is used, not here (see download_served)
+        url, expires = signed_download_url(resource, current_user.id)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'url': url,
+                'expires_at': datetime.utcfromtimestamp(expires).isoformat(),
+                'file_name': resource.file_name,
+                'file_size': resource.file_size
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error creating download link: {str(e)}'
+        }), 500
+
+@resources_api_bp.route('/files/<path:key>', methods=['GET'])
+def signed_file(key):
+    # Signed links the front proxy does not check: object storage, or
+    # DOWNLOAD_SIGNED_URL_BASE pointed here when no proxy is set up
+    try:
+        link = verified_link(request.path, request.query_string) if current_app.config['DOWNLOAD_SIGNING_KEY'] else None
+        resource = Resource.query.get(link[0]) if link else None
+        if not resource or resource.status != ResourceStatus.approved:
+            return jsonify({
+                'success': False,
+                'message': 'This download link is invalid or has expired'
+            }), 403
+        
+        response = send_resource(resource)
+        if counts_as_download(response):
+            download_log.record(resource.id, link[1], request.remote_addr)
+        return response
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error downloading resource: {str(e)}'
+        }), 500
+
+@resources_api_bp.route('/download/served', methods=['GET'])
+def download_served():
+    # Called by the front proxy (nginx ``mirror``) for every request it serves
+    # on a signed link; X-Original-URI is the link as requested. Anyone can
+    # call it, so the client address comes only from TRUSTED_PROXY_HOPS
+    try:
+        path, _, query = request.headers.get('X-Original-URI', '').partition('?')
+        link = verified_link(unquote(path), query) if current_app.config['DOWNLOAD_SIGNING_KEY'] else None
+        if not link or not db.session.get(Resource, link[0]):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid or expired download link'
+            }), 403
+        
+        if starts_download():
+            download_log.record(link[0], link[1], request.remote_addr)
+        return '', 204
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error recording download: {str(e)}'
+        }), 500
+
+def _categories_data():
+    categories = Category.query.filter_by(is_active=True).all()
+    return [{
+        'id': c.id,
+        'name': c.name,
+        'description': c.description,
+        'created_at': c.created_at.isoformat() if c.created_at else None
+    } for c in categories]
+
 @resources_api_bp.route('/categories', methods=['GET'])
 @login_required
 def get_categories():
     try:
-        categories = Category.query.filter_by(is_active=True).all()
-        
-        categories_data = [{
-            'id': c.id,
-            'name': c.name,
-            'description': c.description,
-            'created_at': c.created_at.isoformat() if c.created_at else None
-        } for c in categories]
+        categories_data = catalogue_cache.get_or_set(('categories',), _categories_data)
         
         return jsonify({
             'success': True,
@@ -154,6 +629,25 @@ def get_categories():
             'message': f'Error fetching categories: {str(e)}'
         }), 500
 
+@resources_api_bp.route('/suggest', methods=['GET'])
+@login_required
+def suggest():
+    try:
+        q = request.args.get('q', '')
+        limit = request.args.get('limit', 10, type=int)
+        limit = max(1, min(limit, current_app.config['SUGGEST_MAX_RESULTS']))
+        
+        return jsonify({
+            'success': True,
+            'data': suggest_index.suggest(q, limit)
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching suggestions: {str(e)}'
+        }), 500
+
 @resources_api_bp.route('/my-uploads', methods=['GET'])
 @login_required
 @student_required
@@ -162,52 +656,46 @@ def my_uploads():
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 10, type=int)
         status_filter = request.args.get('status', '')
+        cursor = request.args.get('cursor')  # present (even empty) selects cursor pagination
+        
+        fields = pick(MY_UPLOADS, requested_fields())
         
         # Build query
-        query = Resource.query.filter_by(uploaded_by_student_id=current_user.student_profile.id)
+        query = ResourceListing.query.filter_by(student_id=current_user.student_profile.id)
         
         if status_filter:
             query = query.filter_by(status=status_filter)
         
+        query = project(query, fields)
+        
         # Paginate
-        resources = query.order_by(Resource.upload_date.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
-        )
+        if cursor is not None:
+            count_key = None
+            if request.args.get('with_total', type=int):
+                count_key = ('my-uploads', current_user.student_profile.id, status_filter)
+            resources = keyset_paginate(
+                query, ResourceListing.upload_date, ResourceListing.id, cursor, per_page, count_key=count_key
+            )
+        else:
+            resources = query.order_by(ResourceListing.upload_date.desc()).paginate(
+                page=page, per_page=per_page, error_out=False
+            )
         
-        resources_data = [{
-            'id': r.id,
-            'title': r.title,
-            'description': r.description,
-            'file_name': r.file_name,
-            'file_type': r.file_type,
-            'file_size': r.file_size,
-            'upload_date': r.upload_date.isoformat(),
-            'status': r.status.value,
-            'download_count': r.download_count,
-            'review_date': r.review_date.isoformat() if r.review_date else None,
-            'review_comments': r.review_comments,
-            'rejection_reason': r.rejection_reason,
-            'category': {
-                'id': r.category.id,
-                'name': r.category.name
-            } if r.category else None
-        } for r in resources.items]
+        resources_data = dump(resources.items, fields)
         
         return jsonify({
             'success': True,
             'data': {
                 'resources': resources_data,
-                'pagination': {
-                    'page': resources.page,
-                    'pages': resources.pages,
-                    'per_page': resources.per_page,
-                    'total': resources.total,
-                    'has_next': resources.has_next,
-                    'has_prev': resources.has_prev
-                }
+                'pagination': pagination_data(resources)
             }
         })
         
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -1,11 +1,17 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, send_file, current_app
+from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from app.utils.decorators import student_required, upload_permission_required
-from app.models import Resource, Category, ResourceDownload
+from app.utils.download_log import download_log
+from app.utils.downloads import counts_as_download, send_resource
+from app.utils.file_store import store_file
+from app.utils.uploads import save_stream, staging_path
+from app.models import Resource, Category
+from app.models.resource import ResourceStatus
 from app import db
 from datetime import datetime
 import os
+import uuid
 
 resources_bp = Blueprint('resources', __name__)
 
@@ -30,18 +36,20 @@ def upload():
         
         if file:
             filename = secure_filename(file.filename)
-            file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(file_path)
+            staged = staging_path(uuid.uuid4().hex)
+            file_size, sha256 = save_stream(file.stream, staged)
+            blob = store_file(staged, sha256, file_size)
             
             resource = Resource(
                 title=title,
                 description=description,
                 category_id=category_id,
                 uploaded_by_student_id=current_user.student_profile.id,
-                file_path=file_path,
+                file_path=blob.path,
+                blob_id=blob.id,
                 file_name=filename,
                 file_type=file.filename.rsplit('.', 1)[1].lower(),
-                file_size=os.path.getsize(file_path)
+                file_size=file_size
             )
             
             db.session.add(resource)
@@ -58,20 +66,14 @@ def upload():
 def download(resource_id):
     resource = Resource.query.get_or_404(resource_id)
     
-    if resource.status != 'approved':
+    if resource.status != ResourceStatus.approved:
         flash('This resource is not available for download.', 'error')
         return redirect(url_for('student.browse'))
     
-    # Log the download
-    download_log = ResourceDownload(
-        resource_id=resource_id,
-        user_id=current_user.id,
-        ip_address=request.remote_addr
-    )
-    db.session.add(download_log)
+    response = send_resource(resource)
     
-    # Increment download count
-    resource.download_count += 1
-    db.session.commit()
+    # Log the download; the row and the counter are written in batches
+    if counts_as_download(response):
+        download_log.record(resource.id, current_user.id, request.remote_addr)
     
-    return send_file(resource.file_path, as_attachment=True, download_name=resource.file_name)
+    return response
@@ -0,0 +1,18 @@
+from blinker import Namespace
+from flask import current_app
+
+_signals = Namespace()
+
+# Sent after a review decision is committed, once per request whether it
+# covered one resource or a whole batch:
+#   resources_reviewed.send(app, lecturer_id=..., reviews=[{'id', 'status', 'student_id'}, ...])
+resources_reviewed = _signals.signal('resources-reviewed')
+
+
+def send_reviewed(lecturer_id, reviews):
+    """Send ``resources_reviewed`` for committed ``(id, status, student_id)`` decisions."""
+    resources_reviewed.send(
+        current_app._get_current_object(),
+        lecturer_id=lecturer_id,
+        reviews=[{'id': rid, 'status': status, 'student_id': student_id} for rid, status, student_id in reviews]
+    )
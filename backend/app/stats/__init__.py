@@ -0,0 +1 @@
+# Initialize stats blueprint
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, current_app, request, jsonify
+from flask_login import login_required, current_user
+from app.utils.download_stats import (
+    category_totals, daily_totals, rolled_up_at, top_resources, uploads_daily, user_daily
+)
+
+stats_api_bp = Blueprint('stats_api', __name__)
+
+# All of these read the daily rollup tables, never the raw download log,
+# so they cost the same however large the log grows. Figures are as of the
+# last `flask downloads rollup`.
+
+def _period():
+    days = request.args.get('days', 30, type=int)
+    days = max(1, min(days, current_app.config['STATS_MAX_DAYS']))
+    # Download dates are UTC, so days are too
+    return days, datetime.utcnow().date() - timedelta(days=days - 1)
+
+def _as_of():
+    updated_at = rolled_up_at()
+    return updated_at.isoformat() if updated_at else None
+
+@stats_api_bp.route('/downloads', methods=['GET'])
+@login_required
+def downloads():
+    try:
+        days, since = _period()
+        per_day = daily_totals(since)
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'days': days,
+                'per_day': per_day,
+                'total': sum(d['downloads'] for d in per_day),
+                'as_of': _as_of()
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching download stats: {str(e)}'
+        }), 500
+
+@stats_api_bp.route('/top-resources', methods=['GET'])
+@login_required
+def top():
+    try:
+        days, since = _period()
+        limit = max(1, min(request.args.get('limit', 10, type=int), 100))
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'days': days,
+                'resources': top_resources(since, limit),
+                'as_of': _as_of()
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching top resources: {str(e)}'
+        }), 500
+
+@stats_api_bp.route('/categories', methods=['GET'])
+@login_required
+def categories():
+    try:
+        days, since = _period()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'days': days,
+                'categories': category_totals(since),
+                'as_of': _as_of()
+            }
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching category stats: {str(e)}'
+        }), 500
+
+@stats_api_bp.route('/me', methods=['GET'])
+@login_required
+def me():
+    try:
+        days, since = _period()
+        data = {
+            'days': days,
+            'my_downloads': user_daily(current_user.id, since),
+            'as_of': _as_of()
+        }
+        # Students also see how often their own uploads were downloaded
+        if current_user.role.value == 'student':
+            data['downloads_of_my_uploads'] = uploads_daily(current_user.student_profile.id, since)
+        
+        return jsonify({
+            'success': True,
+            'data': data
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error fetching your stats: {str(e)}'
+        }), 500
@@ -0,0 +1,31 @@
+from flask import current_app
+from app.storage.base import StorageBackend, StorageError
+from app.storage.local import LocalStorage
+
+
+def create_storage(config):
+    backend = config['STORAGE_BACKEND']
+    if backend == 'local':
+        return LocalStorage(config['UPLOAD_FOLDER'])
+    if backend == 's3':
+        from app.storage.s3 import S3Storage
+        return S3Storage(
+            bucket=config['S3_BUCKET'],
+            prefix=config['S3_KEY_PREFIX'],
+            endpoint_url=config['S3_ENDPOINT_URL'],
+            region=config['S3_REGION'],
+            access_key_id=config['S3_ACCESS_KEY_ID'],
+            secret_access_key=config['S3_SECRET_ACCESS_KEY']
+        )
+    raise StorageError(f'Unknown STORAGE_BACKEND: {backend}')
+
+
+def get_storage():
+    """The storage backend configured for the current app."""
+    storage = current_app.extensions.get('storage')
+    if storage is None:
+        storage = current_app.extensions['storage'] = create_storage(current_app.config)
+    return storage
+
+
+__all__ = ['StorageBackend', 'StorageError', 'LocalStorage', 'create_storage', 'get_storage']
@@ -0,0 +1,64 @@
+class StorageError(Exception):
+    pass
+
+
+class StorageBackend:
+    """Where uploaded files live, addressed by relative keys such as ``blobs/<sha256>``.
+
+    Backends that keep files on this machine return a path from
+    ``local_path()`` so downloads can use ``send_file`` or proxy offloading.
+    Remote backends return ``None`` there and hand out presigned URLs so
+    clients transfer bytes directly with the store.
+    """
+
+    def put_file(self, key, path):
+        """Store the local file at ``path`` under ``key``; the local file is consumed."""
+        raise NotImplementedError
+
+    def open(self, key):
+        """Return a readable binary file object for ``key``."""
+        raise NotImplementedError
+
+    def stream(self, key, chunk_size=64 * 1024):
+        with self.open(key) as f:
+            for buf in iter(lambda: f.read(chunk_size), b''):
+                yield buf
+
+    def size(self, key):
+        raise NotImplementedError
+
+    def exists(self, key):
+        raise NotImplementedError
+
+    def delete(self, key):
+        """Remove ``key``; removing a missing key is not an error."""
+        raise NotImplementedError
+
+    def move(self, src_key, dst_key):
+        raise NotImplementedError
+
+    def list(self, prefix):
+        """Yield ``(key, modified)`` for every key under ``prefix``; ``modified`` is naive UTC."""
+        raise NotImplementedError
+
+    def copy(self, src_key, dst_key):
+        raise NotImplementedError
+
+    def presign(self, key, method='GET', expires_in=600, download_name=None):
+        """URL a client can use to GET ``key`` directly, or ``None`` if unsupported."""
+        return None
+
+    def presign_upload(self, key, content_length, sha256, expires_in=600):
+        """``(url, headers)`` for a client to PUT ``key`` directly, or ``None`` if unsupported.
+
+        The size and hex ``sha256`` are signed into the URL: the client must
+        send ``headers`` with the PUT, and the store refuses any other body.
+        """
+        return None
+
+    def checksum(self, key):
+        """Hex SHA-256 of ``key`` as recorded by the store, or ``None`` if it keeps none."""
+        return None
+
+    def local_path(self, key):
+        return None
@@ -0,0 +1,70 @@
+import os
+import shutil
+from datetime import datetime
+from app.storage.base import StorageBackend, StorageError
+
+
+class LocalStorage(StorageBackend):
+    """Files under one directory on local disk (``UPLOAD_FOLDER``)."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+
+    def local_path(self, key):
+        # Rows written before storage keys existed hold absolute paths
+        if os.path.isabs(key):
+            return key
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f'Key escapes storage root: {key}')
+        return path
+
+    def put_file(self, key, path):
+        target = self.local_path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(path, target)
+
+    def open(self, key):
+        return open(self.local_path(key), 'rb')
+
+    def size(self, key):
+        return os.path.getsize(self.local_path(key))
+
+    def exists(self, key):
+        return os.path.exists(self.local_path(key))
+
+    def delete(self, key):
+        try:
+            os.remove(self.local_path(key))
+        except FileNotFoundError:
+            pass
+
+    def move(self, src_key, dst_key):
+        target = self.local_path(dst_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(self.local_path(src_key), target)
+
+    def copy(self, src_key, dst_key):
+        target = self.local_path(dst_key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            # A hard link shares the bytes, so "copying" costs no I/O
+            os.link(self.local_path(src_key), target)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copy2(self.local_path(src_key), target)
+        # A new key looks new, like an upload, until its row commits (see
+        # the orphan sweep in collect_garbage)
+        os.utime(target)
+
+    def list(self, prefix):
+        base = self.local_path(prefix)
+        for directory, _, files in os.walk(base):
+            for name in files:
+                path = os.path.join(directory, name)
+                try:
+                    modified = datetime.utcfromtimestamp(os.path.getmtime(path))
+                except FileNotFoundError:
+                    continue
+                yield os.path.relpath(path, self.root).replace(os.sep, '/'), modified
@@ -0,0 +1,113 @@
+import base64
+import binascii
+import os
+from app.storage.base import StorageBackend, StorageError
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # only needed when STORAGE_BACKEND = 's3'
+    boto3 = None
+
+
+class S3Storage(StorageBackend):
+    """Objects in an S3-compatible bucket (AWS S3, MinIO, Ceph RGW, ...).
+
+    Point ``S3_ENDPOINT_URL`` at a local MinIO to develop and test against
+    it, e.g. ``docker run -p 9000:9000 minio/minio server /data``.
+    """
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None,
+                 access_key_id=None, secret_access_key=None):
+        if boto3 is None:
+            raise StorageError('boto3 is required for the s3 storage backend (pip install boto3)')
+        if not bucket:
+            raise StorageError('S3_BUCKET must be set for the s3 storage backend')
+        self.bucket = bucket
+        self.prefix = prefix.strip('/') + '/' if prefix.strip('/') else ''
+        self.client = boto3.client(
+            's3',
+            endpoint_url=endpoint_url,
+            region_name=region,
+            aws_access_key_id=access_key_id,
+            aws_secret_access_key=secret_access_key
+        )
+
+    def _key(self, key):
+        return self.prefix + key
+
+    def put_file(self, key, path):
+        self.client.upload_file(path, self.bucket, self._key(key))
+        os.remove(path)
+
+    def open(self, key):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))['Body']
+        except ClientError as e:
+            raise StorageError(str(e))
+
+    def size(self, key):
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._key(key))['ContentLength']
+        except ClientError as e:
+            raise StorageError(str(e))
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('404', 'NoSuchKey', 'NotFound'):
+                return False
+            raise StorageError(str(e))
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def move(self, src_key, dst_key):
+        self.copy(src_key, dst_key)
+        self.delete(src_key)
+
+    def copy(self, src_key, dst_key):
+        # Server-side copy; the bytes never pass through the app
+        self.client.copy({'Bucket': self.bucket, 'Key': self._key(src_key)}, self.bucket, self._key(dst_key))
+
+    def list(self, prefix):
+        pages = self.client.get_paginator('list_objects_v2').paginate(Bucket=self.bucket, Prefix=self._key(prefix))
+        for page in pages:
+            for item in page.get('Contents', []):
+                yield item['Key'][len(self.prefix):], item['LastModified'].replace(tzinfo=None)
+
+    def presign(self, key, method='GET', expires_in=600, download_name=None):
+        if method != 'GET':
+            raise StorageError(f'Cannot presign {method} requests; use presign_upload()')
+        params = {'Bucket': self.bucket, 'Key': self._key(key)}
+        if download_name:
+            params['ResponseContentDisposition'] = f'attachment; filename="{download_name}"'
+        return self.client.generate_presigned_url('get_object', Params=params, ExpiresIn=int(expires_in))
+
+    def presign_upload(self, key, content_length, sha256, expires_in=600):
+        # Both become signed headers: S3 rejects a PUT whose body has another
+        # length or digest, and records the digest for checksum()
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url('put_object', Params={
+            'Bucket': self.bucket,
+            'Key': self._key(key),
+            'ContentLength': content_length,
+            'ChecksumSHA256': checksum
+        }, ExpiresIn=int(expires_in))
+        return url, {'Content-Length': str(content_length), 'x-amz-checksum-sha256': checksum}
+
+    def checksum(self, key):
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=self._key(key), ChecksumMode='ENABLED')
+        except ClientError as e:
+            raise StorageError(str(e))
+        value = head.get('ChecksumSHA256')
+        # Multipart uploads carry a checksum of part checksums ("...-<parts>")
+        if not value or '-' in value:
+            return None
+        try:
+            return base64.b64decode(value).hex()
+        except (binascii.Error, ValueError):
+            return None
@@ -1,66 +1,116 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
+from app.utils.catalogue_cache import catalogue_cache
 from app.utils.decorators import student_required
-from app.models import Resource, Category
+from app.utils.facets import facet_counts
+from app.utils.pagination import InvalidCursor, keyset_paginate, pagination_data
+from app.utils.search import apply_search, search_terms
+from app.utils.serializers import BROWSE, OWN_UPLOADS, InvalidFields, dump, pick, project, requested_fields
+from app.models import Category, ResourceListing
 from app import db
 
 student_api_bp = Blueprint('student_api', __name__)
 
+# Browse orders: newest uploads, most downloaded recently (time-decayed, see
+# app/utils/trending.py) and most downloaded overall. Each has an index.
+SORTS = {
+    'newest': ResourceListing.upload_date,
+    'trending': ResourceListing.trending_score,
+    'popular': ResourceListing.download_count
+}
+
+def _recent_resources_data(fields):
+    recent_resources = project(ResourceListing.query.filter_by(
+        status='approved'
+    ), fields).order_by(ResourceListing.upload_date.desc(), ResourceListing.id.desc()).limit(10).all()
+    return dump(recent_resources, fields)
+
+def _trending_resources_data(fields):
+    trending = project(ResourceListing.query.filter(
+        ResourceListing.status == 'approved', ResourceListing.trending_score > 0
+    ), fields).order_by(ResourceListing.trending_score.desc(), ResourceListing.id.desc()).limit(10).all()
+    return dump(trending, fields)
+
+def _browse_data(page, per_page, category_id, search, cursor, with_total, fields, sort='newest'):
+    # Build query
+    query = ResourceListing.query.filter_by(status='approved')
+    
+    if category_id:
+        query = query.filter_by(category_id=category_id)
+    
+    if search:
+        # Ranked full-text match unless another order was asked for; upload
+        # date below only breaks ties
+        query = apply_search(query, search, ranked=cursor is None and sort == 'newest', model=ResourceListing)
+    
+    sort_column = SORTS[sort]
+    query = project(query, fields, extra=(sort_column,))
+    
+    # Paginate
+    if cursor is not None:
+        count_key = None
+        if with_total:
+            count_key = ('browse', category_id, tuple(search_terms(search)))
+        resources = keyset_paginate(
+            query, sort_column, ResourceListing.id, cursor, per_page, count_key=count_key
+        )
+    else:
+        if sort == 'newest':
+            order = (ResourceListing.upload_date.desc(),)
+        else:
+            order = (sort_column.desc(), ResourceListing.id.desc())
+        resources = query.order_by(*order).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
+    
+    return {
+        'resources': dump(resources.items, fields),
+        'categories': catalogue_cache.get_or_set(('browse.categories',), _categories_data),
+        # The same for every page of a result set, so cached apart from it
+        'facets': catalogue_cache.get_or_set(
+            ('browse.facets', category_id or None, tuple(search_terms(search))),
+            lambda: facet_counts(category_id or None, search)
+        ),
+        'pagination': pagination_data(resources)
+    }
+
+def _categories_data():
+    categories = Category.query.filter_by(is_active=True).all()
+    return [{
+        'id': c.id,
+        'name': c.name,
+        'description': c.description
+    } for c in categories]
+
 @student_api_bp.route('/dashboard', methods=['GET'])
 @login_required
 @student_required
 def dashboard():
     try:
-        # Get student's uploaded resources
-        uploaded_resources = Resource.query.filter_by(
-            uploaded_by_student_id=current_user.student_profile.id
-        ).order_by(Resource.upload_date.desc()).limit(5).all()
-        
-        # Get recent approved resources
-        recent_resources = Resource.query.filter_by(
-            status='approved'
-        ).order_by(Resource.upload_date.desc()).limit(10).all()
+        wanted = requested_fields()
         
-        uploaded_data = [{
-            'id': r.id,
-            'title': r.title,
-            'description': r.description,
-            'file_name': r.file_name,
-            'file_type': r.file_type,
-            'file_size': r.file_size,
-            'upload_date': r.upload_date.isoformat(),
-            'status': r.status.value,
-            'download_count': r.download_count,
-            'category': {
-                'id': r.category.id,
-                'name': r.category.name
-            } if r.category else None
-        } for r in uploaded_resources]
-        
-        recent_data = [{
-            'id': r.id,
-            'title': r.title,
-            'description': r.description,
-            'file_name': r.file_name,
-            'file_type': r.file_type,
-            'file_size': r.file_size,
-            'upload_date': r.upload_date.isoformat(),
-            'download_count': r.download_count,
-            'category': {
-                'id': r.category.id,
-                'name': r.category.name
-            } if r.category else None,
-            'uploader': {
-                'full_name': r.student_uploader.full_name if r.student_uploader else 'Unknown',
-                'registration_number': r.student_uploader.registration_number if r.student_uploader else 'Unknown'
-            } if r.student_uploader else None
-        } for r in recent_resources]
+        # Get student's uploaded resources
+        uploaded_fields = pick(OWN_UPLOADS, wanted)
+        uploaded_resources = project(ResourceListing.query.filter_by(
+            student_id=current_user.student_profile.id
+        ), uploaded_fields).order_by(ResourceListing.upload_date.desc(), ResourceListing.id.desc()).limit(5).all()
+        uploaded_data = dump(uploaded_resources, uploaded_fields)
+        
+        # Recent approved resources are the same for every student
+        recent_fields = pick(BROWSE, wanted)
+        recent_data = catalogue_cache.get_or_set(
+            ('dashboard.recent', recent_fields), lambda: _recent_resources_data(recent_fields)
+        )
+        trending_data = catalogue_cache.get_or_set(
+            ('dashboard.trending', recent_fields), lambda: _trending_resources_data(recent_fields)
+        )
         
         return jsonify({
             'success': True,
             'data': {
                 'uploaded_resources': uploaded_data,
                 'recent_resources': recent_data,
+                'trending_resources': trending_data,
                 'student_info': {
                     'full_name': current_user.student_profile.full_name,
                     'registration_number': current_user.student_profile.registration_number,
@@ -69,6 +119,11 @@ def dashboard():
             }
         })
         
+    except InvalidFields as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -84,65 +139,35 @@ def browse():
         per_page = request.args.get('per_page', 12, type=int)
         category_id = request.args.get('category', type=int)
         search = request.args.get('search', '')
-        
-        # Build query
-        query = Resource.query.filter_by(status='approved')
-        
-        if category_id:
-            query = query.filter_by(category_id=category_id)
-        
-        if search:
-            query = query.filter(Resource.title.contains(search) | Resource.description.contains(search))
-        
-        # Paginate
-        resources = query.order_by(Resource.upload_date.desc()).paginate(
-            page=page, per_page=per_page, error_out=False
+        cursor = request.args.get('cursor')  # present (even empty) selects cursor pagination
+        
+        with_total = bool(request.args.get('with_total', type=int))
+        fields = pick(BROWSE, requested_fields())
+        sort = request.args.get('sort', 'newest')
+        
+        if sort not in SORTS:
+            return jsonify({
+                'success': False,
+                'message': 'Invalid sort. Must be newest, trending or popular.'
+            }), 400
+        
+        # Identical for every student, so cache on the normalized parameters
+        terms = tuple(search_terms(search))
+        key = ('browse', page, per_page, category_id, terms, cursor, with_total, fields, sort)
+        data = catalogue_cache.get_or_set(
+            key, lambda: _browse_data(page, per_page, category_id, ' '.join(terms), cursor, with_total, fields, sort)
         )
         
-        # Get categories
-        categories = Category.query.filter_by(is_active=True).all()
-        
-        resources_data = [{
-            'id': r.id,
-            'title': r.title,
-            'description': r.description,
-            'file_name': r.file_name,
-            'file_type': r.file_type,
-            'file_size': r.file_size,
-            'upload_date': r.upload_date.isoformat(),
-            'download_count': r.download_count,
-            'category': {
-                'id': r.category.id,
-                'name': r.category.name
-            } if r.category else None,
-            'uploader': {
-                'full_name': r.student_uploader.full_name if r.student_uploader else 'Unknown',
-                'registration_number': r.student_uploader.registration_number if r.student_uploader else 'Unknown'
-            } if r.student_uploader else None
-        } for r in resources.items]
-        
-        categories_data = [{
-            'id': c.id,
-            'name': c.name,
-            'description': c.description
-        } for c in categories]
-        
         return jsonify({
             'success': True,
-            'data': {
-                'resources': resources_data,
-                'categories': categories_data,
-                'pagination': {
-                    'page': resources.page,
-                    'pages': resources.pages,
-                    'per_page': resources.per_page,
-                    'total': resources.total,
-                    'has_next': resources.has_next,
-                    'has_prev': resources.has_prev
-                }
-            }
+            'data': data
         })
         
+    except (InvalidCursor, InvalidFields) as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
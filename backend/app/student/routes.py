@@ -1,5 +1,6 @@
 from flask import Blueprint, render_template, request, flash, redirect, url_for
 from flask_login import login_required, current_user
+from sqlalchemy.orm import joinedload
 from app.utils.decorators import student_required
 from app.models import Resource, Category
 
@@ -10,12 +11,12 @@ student_bp = Blueprint('student', __name__)
 @student_required
 def dashboard():
     # Get student's uploaded resources
-    uploaded_resources = Resource.query.filter_by(
+    uploaded_resources = Resource.query.options(joinedload(Resource.category)).filter_by(
         uploaded_by_student_id=current_user.student_profile.id
     ).order_by(Resource.upload_date.desc()).limit(5).all()
     
     # Get recent approved resources
-    recent_resources = Resource.query.filter_by(
+    recent_resources = Resource.query.options(joinedload(Resource.category), joinedload(Resource.student_uploader)).filter_by(
         status='approved'
     ).order_by(Resource.upload_date.desc()).limit(10).all()
     
@@ -30,7 +31,7 @@ def browse():
     page = request.args.get('page', 1, type=int)
     category_id = request.args.get('category', type=int)
     
-    query = Resource.query.filter_by(status='approved')
+    query = Resource.query.options(joinedload(Resource.category), joinedload(Resource.student_uploader)).filter_by(status='approved')
     
     if category_id:
         query = query.filter_by(category_id=category_id)
@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Category, Resource, Student
+from app.models.resource import ResourceStatus
+
+_PENDING_KEY = 'catalogue_changed'
+
+# Student columns shown as "uploader" in listings
+_UPLOADER_FIELDS = ('full_name', 'registration_number')
+
+
+class CatalogueCache:
+    """Per-process cache of listing data that is the same for every student.
+
+    Entries are keyed by the caller's normalized parameters together with a
+    catalogue version. Committing a change that can alter a listing (an
+    approved resource appearing, changing or disappearing, a category edit,
+    an uploader renamed) bumps the version, so this process stops serving
+    the old entries at once. Other processes stop within
+    ``CATALOGUE_CACHE_TTL`` seconds. Download counts in cached listings lag
+    by at most the TTL, since downloads do not bump the version.
+
+    Writes that skip the ORM unit of work (bulk ``update()``/``delete()``)
+    must call ``mark_catalogue_changed()`` before they commit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (version, key) -> (expires_at, value)
+        self.version = 0
+
+    def get_or_set(self, key, build):
+        """Cached value for ``key``, calling ``build()`` to make it on a miss."""
+        ttl = current_app.config['CATALOGUE_CACHE_TTL']
+        if ttl <= 0:
+            return build()
+        now = time.monotonic()
+        with self._lock:
+            version = self.version
+            hit = self._entries.get((version, key))
+            if hit and hit[0] > now:
+                self._entries.move_to_end((version, key))
+                return hit[1]
+
+        value = build()
+        with self._lock:
+            # Don't store a value that may predate a bump made while building
+            if version == self.version:
+                self._entries[(version, key)] = (now + ttl, value)
+                while len(self._entries) > current_app.config['CATALOGUE_CACHE_SIZE']:
+                    self._entries.popitem(last=False)
+        return value
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+
+catalogue_cache = CatalogueCache()
+
+
+def _mark(session):
+    session.info[_PENDING_KEY] = True
+
+
+def mark_catalogue_changed(session=None):
+    """Bump the version when ``session`` (default ``db.session``) commits.
+
+    For bulk statements, which the mapper events below do not see.
+    """
+    _mark(session or db.session)
+
+
+def _was_or_is_approved(target):
+    history = inspect(target).attrs.status.history
+    return any(
+        status in (ResourceStatus.approved, 'approved')
+        for status in (*history.added, *history.unchanged, *history.deleted)
+    )
+
+
+def _resource_changed(mapper, connection, target):
+    if _was_or_is_approved(target):
+        _mark(Session.object_session(target))
+
+
+def _category_changed(mapper, connection, target):
+    _mark(Session.object_session(target))
+
+
+def _student_changed(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _UPLOADER_FIELDS):
+        _mark(Session.object_session(target))
+
+
+for _event in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(Resource, _event, _resource_changed)
+    event.listen(Category, _event, _category_changed)
+event.listen(Student, 'after_update', _student_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_committed(session):
+    if session.info.pop(_PENDING_KEY, False):
+        catalogue_cache.bump()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
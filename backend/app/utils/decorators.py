@@ -5,7 +5,7 @@ from flask_login import current_user
 def student_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or current_user.role != 'student':
+        if not current_user.is_authenticated or current_user.role.value != 'student':
             flash('Student access required.', 'error')
             return redirect(url_for('auth.login'))
         return f(*args, **kwargs)
@@ -14,7 +14,7 @@ def student_required(f):
 def lecturer_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not current_user.is_authenticated or current_user.role != 'lecturer':
+        if not current_user.is_authenticated or current_user.role.value != 'lecturer':
             flash('Lecturer access required.', 'error')
             return redirect(url_for('auth.login'))
         return f(*args, **kwargs)
@@ -24,7 +24,8 @@ def upload_permission_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if (not current_user.is_authenticated or 
-            current_user.role != 'student' or 
+            current_user.role.value != 'student' or 
+            not current_user.student_profile or
             not current_user.student_profile.can_upload):
             flash('Upload permission required.', 'error')
             return redirect(url_for('student.dashboard'))
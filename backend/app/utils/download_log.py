@@ -0,0 +1,297 @@
+import atexit
+import glob
+import json
+import logging
+import os
+import re
+import threading
+import uuid
+from collections import Counter
+from datetime import datetime
+from sqlalchemy import insert, select, update
+from app import db
+from app.models import Resource, ResourceDownload, ResourceListing
+
+logger = logging.getLogger(__name__)
+
+# downloads-<pid>-<process token>-<sequence>.jsonl
+_SEGMENT_RE = re.compile(r'^downloads-(\d+)-([0-9a-f]+)-(\w+)\.jsonl$')
+# Events that could not be written; not a segment, so never replayed on start
+DEAD_LETTER_FILE = 'dead-letter.jsonl'
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class DownloadLog:
+    """Write-behind buffer for download events.
+
+    ``record()`` only appends to memory (and, when ``DOWNLOAD_LOG_JOURNAL_DIR``
+    is set, to an append-only journal file), so a download never waits on the
+    database. A background thread flushes the buffer every
+    ``DOWNLOAD_LOG_FLUSH_INTERVAL`` seconds, or sooner once
+    ``DOWNLOAD_LOG_BATCH_SIZE`` events are waiting. Each flush bulk-inserts the
+    ``resource_downloads`` rows and runs one ``download_count = download_count + n``
+    UPDATE per resource (and per listing row), all in one transaction.
+
+    Journal segments are deleted once their events are committed. Segments
+    left behind by a process that died are replayed by the next process to
+    start, so a crash loses nothing that reached the journal.
+
+    A batch that fails is put back and retried with the next flush. After
+    ``DOWNLOAD_LOG_MAX_RETRIES`` failed flushes in a row its events are
+    written one at a time, and those that still fail are moved to the
+    dead-letter file (``DEAD_LETTER_FILE`` in the journal directory, or
+    the error log without one), so one bad row cannot hold up the rest.
+    ``retry_dead_letters()`` (``flask downloads retry-failed``) tries them
+    again.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._events = []
+        self._thread = None
+        self._pid = None
+        self._segment = None  # (path, file) currently appended to
+        self._segment_seq = 0
+        self._token = None
+        self._token_pid = None
+        self._unflushed_segments = []  # closed segments whose events are not committed yet
+        self._failed_flushes = 0  # in a row, for the events at the front of the buffer
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['download_log'] = self
+        self.app = app
+        if app.config['DOWNLOAD_LOG_JOURNAL_DIR']:
+            os.makedirs(app.config['DOWNLOAD_LOG_JOURNAL_DIR'], exist_ok=True)
+            self._recover_journals()
+        atexit.register(self.flush)
+
+    # Recording
+
+    def record(self, resource_id, user_id, ip_address=None):
+        event = {
+            'resource_id': resource_id,
+            'user_id': user_id,
+            'ip_address': ip_address,
+            'download_date': datetime.utcnow()
+        }
+        if not self.app.config['DOWNLOAD_LOG_BUFFERED']:
+            self._write([event])
+            return
+
+        with self._lock:
+            self._events.append(event)
+            self._journal(event)
+            pending = len(self._events)
+        self._ensure_flusher()
+        if pending >= self.app.config['DOWNLOAD_LOG_BATCH_SIZE']:
+            self._wakeup.set()
+
+    def _segment_path(self, name):
+        # pids are reused across restarts (and shared state is copied by a
+        # fork), so segments also carry a token unique to this process
+        if self._token_pid != os.getpid():
+            self._token, self._token_pid = uuid.uuid4().hex[:12], os.getpid()
+        self._segment_seq += 1
+        return os.path.join(
+            self.app.config['DOWNLOAD_LOG_JOURNAL_DIR'],
+            f'downloads-{os.getpid()}-{self._token}-{name}{self._segment_seq}.jsonl'
+        )
+
+    def _journal(self, event):
+        if not self.app.config['DOWNLOAD_LOG_JOURNAL_DIR']:
+            return
+        if self._segment is None:
+            path = self._segment_path('s')
+            self._segment = (path, open(path, 'a', buffering=1))
+        line = dict(event, download_date=event['download_date'].isoformat())
+        self._segment[1].write(json.dumps(line) + '\n')
+
+    def _ensure_flusher(self):
+        # Threads do not survive a fork, so check the pid as well
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='download-log-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.app.config['DOWNLOAD_LOG_FLUSH_INTERVAL'])
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Flushing download log failed; will retry')
+
+    # Flushing
+
+    def flush(self):
+        """Write all buffered events now. Returns the number written."""
+        if self.app is None:
+            return 0
+        with self._lock:
+            events, self._events = self._events, []
+            if self._segment is not None:
+                self._segment[1].close()
+                self._unflushed_segments.append(self._segment[0])
+                self._segment = None
+            segments, self._unflushed_segments = self._unflushed_segments, []
+        if not events:
+            return 0
+
+        try:
+            with self.app.app_context():
+                if self._failed_flushes >= self.app.config['DOWNLOAD_LOG_MAX_RETRIES']:
+                    written = self._write_each(events)
+                else:
+                    self._write(events)
+                    written = len(events)
+        except Exception:
+            with self._lock:
+                self._events[:0] = events
+                self._unflushed_segments[:0] = segments
+                self._failed_flushes += 1
+            raise
+        self._failed_flushes = 0
+
+        for path in segments:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        return written
+
+    def _write(self, events):
+        try:
+            # Resources deleted since the download was recorded are skipped
+            resource_ids = {e['resource_id'] for e in events}
+            existing = set(db.session.scalars(select(Resource.id).where(Resource.id.in_(resource_ids))))
+            rows = [e for e in events if e['resource_id'] in existing]
+            if rows:
+                db.session.execute(insert(ResourceDownload), rows)
+            for resource_id, n in Counter(e['resource_id'] for e in rows).items():
+                db.session.execute(
+                    update(Resource)
+                    .where(Resource.id == resource_id)
+                    .values(download_count=Resource.download_count + n)
+                    .execution_options(synchronize_session=False)
+                )
+                db.session.execute(
+                    update(ResourceListing)
+                    .where(ResourceListing.id == resource_id)
+                    .values(download_count=ResourceListing.download_count + n)
+                    .execution_options(synchronize_session=False)
+                )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    def _write_each(self, events):
+        # Isolates the rows a whole batch failed on; returns how many were written
+        failed = []
+        for event in events:
+            try:
+                self._write([event])
+            except Exception as e:
+                failed.append((event, e))
+        if failed:
+            self._dead_letter(failed)
+        return len(events) - len(failed)
+
+    # Dead letters
+
+    def _dead_letter_path(self):
+        journal_dir = self.app.config['DOWNLOAD_LOG_JOURNAL_DIR']
+        return os.path.join(journal_dir, DEAD_LETTER_FILE) if journal_dir else None
+
+    def _dead_letter(self, failed):
+        lines = [
+            json.dumps(dict(event, download_date=event['download_date'].isoformat(), error=str(error)[:500]))
+            for event, error in failed
+        ]
+        path = self._dead_letter_path()
+        if path is None:
+            for line in lines:
+                logger.error('Dropping download event that could not be written: %s', line)
+            return
+        with open(path, 'a') as f:
+            f.write(''.join(line + '\n' for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        logger.error('Moved %d download event(s) that could not be written to %s', len(lines), path)
+
+    def retry_dead_letters(self):
+        """Write dead-lettered events again. Returns ``(written, failed)``;
+        the failed ones go back to the dead-letter file."""
+        path = self._dead_letter_path()
+        if path is None or not os.path.exists(path):
+            return 0, 0
+        # Claim the file, so events failing again start a new one
+        claimed = f'{path}.{os.getpid()}.retrying'
+        os.rename(path, claimed)
+        events = []
+        with open(claimed) as f:
+            for line in f:
+                event = json.loads(line)
+                event.pop('error', None)
+                event['download_date'] = datetime.fromisoformat(event['download_date'])
+                events.append(event)
+        with self.app.app_context():
+            written = self._write_each(events)
+        os.remove(claimed)
+        return written, len(events) - written
+
+    # Crash recovery
+
+    def _recover_journals(self):
+        journal_dir = self.app.config['DOWNLOAD_LOG_JOURNAL_DIR']
+        for path in sorted(glob.glob(os.path.join(journal_dir, 'downloads-*.jsonl'))):
+            match = _SEGMENT_RE.match(os.path.basename(path))
+            if not match:
+                continue
+            pid, token = int(match.group(1)), match.group(2)
+            if token == self._token or (pid != os.getpid() and _pid_alive(pid)):
+                continue  # ours, or owned by a running worker
+            # Renaming claims the segment for this process, so only one
+            # restarting worker replays it (and it is recovered again if we die)
+            claimed = self._segment_path('r')
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            events = []
+            with open(claimed) as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue  # torn final line from the crash
+                    event['download_date'] = datetime.fromisoformat(event['download_date'])
+                    events.append(event)
+            with self._lock:
+                self._events.extend(events)
+                self._unflushed_segments.append(claimed)
+            if events:
+                logger.info('Recovered %d download events from %s', len(events), path)
+        if self._events:
+            self._ensure_flusher()
+
+
+download_log = DownloadLog()
@@ -0,0 +1,251 @@
+import csv
+import gzip
+import os
+from collections import Counter
+from datetime import date, datetime, timedelta
+from sqlalchemy import and_, delete, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models import (
+    Category, DailyCategoryDownloads, DailyResourceDownloads, DailyUserDownloads,
+    DownloadRollupState, Resource, ResourceDownload, ResourceListing
+)
+from app.utils.trending import add_downloads
+
+ARCHIVE_COLUMNS = ['id', 'resource_id', 'user_id', 'download_date', 'ip_address']
+
+
+def _day(value):
+    # func.date() gives a date on PostgreSQL and 'YYYY-MM-DD' text on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+def _add_counts(model, keys, counts):
+    """Add ``counts`` ({key tuple: n}) onto ``model``'s rows, creating missing ones."""
+    if not counts:
+        return
+    rows = [dict(zip(keys, key), downloads=n) for key, n in counts.items()]
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        stmt = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(model)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={'downloads': model.downloads + stmt.excluded.downloads}
+        ), rows)
+        return
+    for row in rows:
+        updated = db.session.execute(
+            update(model)
+            .where(*[getattr(model, key) == row[key] for key in keys])
+            .values(downloads=model.downloads + row['downloads'])
+        ).rowcount
+        if not updated:
+            db.session.execute(insert(model), [row])
+
+
+def _state():
+    state = db.session.execute(
+        select(DownloadRollupState.last_id, DownloadRollupState.horizon_id, DownloadRollupState.updated_at)
+        .where(DownloadRollupState.id == 1)
+    ).first()
+    if state is None:
+        db.session.execute(insert(DownloadRollupState).values(id=1, last_id=0, horizon_id=0))
+        db.session.commit()
+        return 0, 0, None
+    return state
+
+
+def _roll_range(start, end):
+    """Add the downloads with ids in (start, end] to the daily tables."""
+    day = func.date(ResourceDownload.download_date)
+    groups = db.session.execute(
+        select(day, ResourceDownload.resource_id, ResourceDownload.user_id, Resource.category_id, func.count())
+        .select_from(ResourceDownload)
+        .outerjoin(Resource, Resource.id == ResourceDownload.resource_id)
+        .where(ResourceDownload.id > start, ResourceDownload.id <= end)
+        .group_by(day, ResourceDownload.resource_id, ResourceDownload.user_id, Resource.category_id)
+    ).all()
+
+    by_resource, by_category, by_user = Counter(), Counter(), Counter()
+    for raw_day, resource_id, user_id, category_id, n in groups:
+        day_value = _day(raw_day)
+        by_resource[(day_value, resource_id)] += n
+        by_user[(user_id, day_value)] += n
+        if category_id is not None:
+            by_category[(day_value, category_id)] += n
+
+    _add_counts(DailyResourceDownloads, ['day', 'resource_id'], by_resource)
+    _add_counts(DailyCategoryDownloads, ['day', 'category_id'], by_category)
+    _add_counts(DailyUserDownloads, ['user_id', 'day'], by_user)
+    return sum(by_resource.values())
+
+
+def rollup_watermark():
+    """The highest resource_downloads.id already rolled up."""
+    return _state()[0]
+
+
+def roll_up(batch_size=10000, settle=True):
+    """Fold new resource_downloads rows into the daily tables and trending
+    scores; returns rows added.
+
+    The log is consumed in id order, one transaction per ``batch_size`` ids,
+    and each run only touches rows it has not seen before. Rows written late
+    (journal replays) are still counted, on the day they happened.
+
+    A PostgreSQL transaction can commit a lower id after a higher one is
+    already visible, so a run only goes up to the highest id the previous
+    run saw, and those ids have long since committed. Rollups therefore lag
+    by one run interval. ``settle=False`` takes everything now, for a quiet
+    database.
+    """
+    last_id, horizon_id, _ = _state()
+    current_max = db.session.scalar(select(func.max(ResourceDownload.id))) or 0
+    target = horizon_id if settle else current_max
+
+    rolled = 0
+    start = last_id
+    while start < target:
+        end = min(start + batch_size, target)
+        rolled += _roll_range(start, end)
+        add_downloads(start, end)
+        # Moving the watermark only from where we read it means a second run
+        # started at the same time cannot count the same rows again
+        claimed = db.session.execute(
+            update(DownloadRollupState)
+            .where(DownloadRollupState.id == 1, DownloadRollupState.last_id == start)
+            .values(last_id=end, updated_at=datetime.utcnow())
+        ).rowcount
+        if not claimed:
+            db.session.rollback()
+            raise RuntimeError('Another rollup is running; try again later')
+        db.session.commit()
+        start = end
+
+    db.session.execute(
+        update(DownloadRollupState)
+        .where(DownloadRollupState.id == 1)
+        .values(horizon_id=max(horizon_id, current_max))
+    )
+    db.session.commit()
+    return rolled
+
+
+def prune(retention_days, archive_dir=None, batch_size=5000):
+    """Delete raw downloads older than ``retention_days`` that are rolled up.
+
+    With ``archive_dir`` the rows are first appended to a gzipped CSV there.
+    Returns ``(rows deleted, archive path or None)``.
+    """
+    last_id = _state()[0]
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    condition = and_(ResourceDownload.id <= last_id, ResourceDownload.download_date < cutoff)
+
+    archive = path = None
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        path = os.path.join(archive_dir, f"downloads-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.csv.gz")
+
+    deleted = 0
+    try:
+        while True:
+            ids = db.session.scalars(
+                select(ResourceDownload.id).where(condition).order_by(ResourceDownload.id).limit(batch_size)
+            ).all()
+            if not ids:
+                break
+            if path:
+                if archive is None:
+                    archive = gzip.open(path, 'wt', newline='')
+                    writer = csv.writer(archive)
+                    writer.writerow(ARCHIVE_COLUMNS)
+                rows = db.session.execute(
+                    select(*[getattr(ResourceDownload, c) for c in ARCHIVE_COLUMNS])
+                    .where(ResourceDownload.id.in_(ids)).order_by(ResourceDownload.id)
+                ).all()
+                writer.writerows(
+                    [r.id, r.resource_id, r.user_id, r.download_date.isoformat() if r.download_date else None, r.ip_address]
+                    for r in rows
+                )
+                archive.flush()
+            db.session.execute(delete(ResourceDownload).where(ResourceDownload.id.in_(ids)))
+            db.session.commit()
+            deleted += len(ids)
+    finally:
+        if archive is not None:
+            archive.close()
+    return deleted, (path if deleted else None)
+
+
+# Stats, read from the daily tables only
+
+def rolled_up_at():
+    return _state()[2]
+
+
+def daily_totals(since):
+    rows = db.session.execute(
+        select(DailyResourceDownloads.day, func.sum(DailyResourceDownloads.downloads))
+        .where(DailyResourceDownloads.day >= since)
+        .group_by(DailyResourceDownloads.day)
+        .order_by(DailyResourceDownloads.day)
+    ).all()
+    return [{'day': day.isoformat(), 'downloads': int(n)} for day, n in rows]
+
+
+def top_resources(since, limit):
+    totals = (
+        select(DailyResourceDownloads.resource_id, func.sum(DailyResourceDownloads.downloads).label('downloads'))
+        .where(DailyResourceDownloads.day >= since)
+        .group_by(DailyResourceDownloads.resource_id)
+        .order_by(func.sum(DailyResourceDownloads.downloads).desc(), DailyResourceDownloads.resource_id)
+        .limit(limit)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(totals.c.resource_id, totals.c.downloads, ResourceListing.title, ResourceListing.category_name)
+        .outerjoin(ResourceListing, ResourceListing.id == totals.c.resource_id)
+        .order_by(totals.c.downloads.desc(), totals.c.resource_id)
+    ).all()
+    return [{
+        'resource_id': r.resource_id,
+        'title': r.title,
+        'category_name': r.category_name,
+        'downloads': int(r.downloads)
+    } for r in rows]
+
+
+def category_totals(since):
+    totals = (
+        select(DailyCategoryDownloads.category_id, func.sum(DailyCategoryDownloads.downloads).label('downloads'))
+        .where(DailyCategoryDownloads.day >= since)
+        .group_by(DailyCategoryDownloads.category_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(totals.c.category_id, totals.c.downloads, Category.name)
+        .outerjoin(Category, Category.id == totals.c.category_id)
+        .order_by(totals.c.downloads.desc(), totals.c.category_id)
+    ).all()
+    return [{'category_id': r.category_id, 'name': r.name, 'downloads': int(r.downloads)} for r in rows]
+
+
+def user_daily(user_id, since):
+    rows = db.session.execute(
+        select(DailyUserDownloads.day, DailyUserDownloads.downloads)
+        .where(DailyUserDownloads.user_id == user_id, DailyUserDownloads.day >= since)
+        .order_by(DailyUserDownloads.day)
+    ).all()
+    return [{'day': day.isoformat(), 'downloads': n} for day, n in rows]
+
+
+def uploads_daily(student_id, since):
+    """Daily downloads of everything ``student_id`` uploaded."""
+    rows = db.session.execute(
+        select(DailyResourceDownloads.day, func.sum(DailyResourceDownloads.downloads))
+        .join(ResourceListing, ResourceListing.id == DailyResourceDownloads.resource_id)
+        .where(ResourceListing.student_id == student_id, DailyResourceDownloads.day >= since)
+        .group_by(DailyResourceDownloads.day)
+        .order_by(DailyResourceDownloads.day)
+    ).all()
+    return [{'day': day.isoformat(), 'downloads': int(n)} for day, n in rows]
@@ -0,0 +1,150 @@
+import mimetypes
+import os
+from urllib.parse import quote, unquote
+from flask import Response, current_app, redirect, request, url_for
+from werkzeug.utils import send_file
+from app.storage import get_storage
+from app.utils.signed_urls import raw_query_args, sign_path, signed_values, verify_path
+
+OFFLOAD_HEADERS = ('X-Accel-Redirect', 'X-Sendfile')
+
+
+def _relative_path(resource):
+    # Storage keys are already relative; older rows hold absolute paths
+    key = resource.storage_key
+    if not os.path.isabs(key):
+        return key
+    return os.path.relpath(key, current_app.config['UPLOAD_FOLDER']).replace(os.sep, '/')
+
+
+def _etag(resource):
+    return resource.blob.sha256 if resource.blob_id else None
+
+
+def send_resource(resource):
+    """Send a resource's file with validators for conditional and ranged requests.
+
+    Deduplicated files use their SHA-256 as a strong ETag, so it stays the
+    same for as long as the bytes do. ``Range``, ``If-Range`` and
+    ``If-None-Match`` get 206 and 304 responses, which lets an interrupted
+    download resume where it stopped.
+
+    With ``DOWNLOAD_OFFLOAD`` set the app only returns headers and the front
+    web server streams the file: ``'x-accel-redirect'`` (nginx, the file is
+    served from the internal location ``DOWNLOAD_ACCEL_PREFIX``) or
+    ``'x-sendfile'`` (Apache mod_xsendfile, lighttpd). The proxy then handles
+    ranges too.
+
+    Files in a remote storage backend are not proxied at all: the client is
+    redirected to a presigned URL and fetches (and resumes) from the store.
+    """
+    storage = get_storage()
+    path = storage.local_path(resource.storage_key)
+    offload = current_app.config['DOWNLOAD_OFFLOAD']
+    if path is None:
+        response = _presigned_redirect(resource, storage)
+    elif offload == 'x-accel-redirect':
+        response = _accel_redirect(resource)
+    else:
+        response = send_file(
+            path,
+            request.environ,
+            as_attachment=True,
+            download_name=resource.file_name,
+            conditional=True,
+            etag=_etag(resource) or True,
+            use_x_sendfile=offload == 'x-sendfile',
+            response_class=current_app.response_class
+        )
+    # Files sit behind a login, so shared caches must not keep them
+    response.cache_control.private = True
+    return response
+
+
+def _not_modified(resource):
+    etag = _etag(resource)
+    if etag and etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def _presigned_redirect(resource, storage):
+    not_modified = _not_modified(resource)
+    if not_modified is not None:
+        return not_modified
+    url = storage.presign(
+        resource.storage_key, 'GET',
+        expires_in=current_app.config['STORAGE_PRESIGN_EXPIRES'],
+        download_name=resource.file_name
+    )
+    return redirect(url)
+
+
+def _accel_redirect(resource):
+    not_modified = _not_modified(resource)
+    if not_modified is not None:
+        return not_modified
+
+    etag = _etag(resource)
+    response = Response(mimetype=mimetypes.guess_type(resource.file_name)[0] or 'application/octet-stream')
+    response.headers['X-Accel-Redirect'] = current_app.config['DOWNLOAD_ACCEL_PREFIX'].rstrip('/') + '/' + quote(_relative_path(resource))
+    response.headers.set('Content-Disposition', 'attachment', filename=resource.file_name)
+    if etag:
+        response.set_etag(etag)
+    return response
+
+
+def signed_download_url(resource, user_id):
+    """Time-limited URL for a resource, issued to ``user_id``.
+
+    Returns ``(url, expires)``. With local storage the link points at
+    ``DOWNLOAD_SIGNED_URL_BASE`` on the static file server, which checks it
+    with nginx's ``secure_link`` (see ``app.utils.signed_urls``) and never
+    calls the app for the bytes. An object store cannot check our signature,
+    so there the link points at this app, which checks it and redirects to
+    a presigned URL.
+    """
+    lifetime = current_app.config['DOWNLOAD_LINK_LIFETIME'].total_seconds()
+    key = _relative_path(resource)
+    if get_storage().local_path(resource.storage_key) is None:
+        path = unquote(url_for('resources_api.signed_file', key=key))
+    else:
+        path = current_app.config['DOWNLOAD_SIGNED_URL_BASE'].rstrip('/') + '/' + key
+    args = {'r': resource.id, 'u': user_id, 'filename': resource.file_name}
+    return sign_path(current_app.config['DOWNLOAD_SIGNING_KEY'], path, lifetime, args)
+
+
+def verified_link(path, query_string):
+    """``(resource_id, user_id, filename)`` for a signed link (decoded
+    ``path``, raw ``query_string``), or ``None`` if it is invalid or expired."""
+    args = raw_query_args(query_string)
+    if not verify_path(current_app.config['DOWNLOAD_SIGNING_KEY'], path, args):
+        return None
+    try:
+        return signed_values(args)
+    except (KeyError, ValueError):
+        return None
+
+
+def starts_download():
+    """Whether the current request asks for the start of a file, so a new
+    download rather than the continuation of one."""
+    return request.range is None or any(start == 0 for start, _ in request.range.ranges)
+
+
+def counts_as_download(response):
+    """Whether a download response starts a new download.
+
+    Revalidations (304), HEAD requests and ranged requests that continue
+    after the first byte are parts of a download already counted.
+    """
+    if request.method != 'GET' or response.status_code not in (200, 206, 302):
+        return False
+    # The proxy or object store answers ranges for offloaded files, so our
+    # response is a 200 or redirect there; look at what the client asked for
+    offloaded = response.status_code == 302 or any(header in response.headers for header in OFFLOAD_HEADERS)
+    if request.range is not None and (response.status_code == 206 or offloaded):
+        return starts_download()
+    return True
@@ -0,0 +1,242 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models import Resource
+from app.signals import resources_reviewed
+
+try:
+    import redis
+except ImportError:  # only needed when EVENTS_BACKEND is a redis:// URL
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+LECTURERS_CHANNEL = 'lecturers'
+
+
+def student_channel(student_id):
+    return f'student:{student_id}'
+
+
+class LocalBackend:
+    """Delivers events to subscribers in this process only."""
+
+    def __init__(self, dispatch):
+        self._dispatch = dispatch
+
+    def publish(self, event):
+        self._dispatch(event)
+
+    def start(self):
+        pass
+
+
+class RedisBackend:
+    """Relays events through Redis pub/sub so every worker and node sees them."""
+
+    CHANNEL = 'university-resource-events'
+
+    def __init__(self, url, dispatch):
+        if redis is None:
+            raise RuntimeError('redis is required for a redis:// EVENTS_BACKEND (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+        self._dispatch = dispatch
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def publish(self, event):
+        self.client.publish(self.CHANNEL, json.dumps(event))
+
+    def start(self):
+        # Threads do not survive a fork, so check the pid as well
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._listen, name='event-relay', daemon=True)
+            self._thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.CHANNEL)
+                for message in pubsub.listen():
+                    self._dispatch(json.loads(message['data']))
+            except Exception:
+                logger.exception('Event relay lost its Redis subscription; reconnecting')
+                time.sleep(1)
+
+
+class Subscription:
+    """One connected client: a bounded queue of events for its channels."""
+
+    def __init__(self, channels, maxsize):
+        self.channels = channels
+        self.queue = queue.Queue(maxsize)
+        self.overflowed = False
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            # A client this far behind is dropped; it reconnects and replays
+            self.overflowed = True
+
+
+class EventBroker:
+    """Fans published events out to the subscriptions of each channel.
+
+    ``publish()`` goes through the backend: ``LocalBackend`` delivers straight
+    to this process's subscribers, while ``RedisBackend`` (``EVENTS_BACKEND``
+    set to a redis:// URL) relays every event to all processes. Each process
+    keeps the last ``EVENTS_HISTORY_SIZE`` events per channel, so a client
+    that reconnects with ``Last-Event-ID`` gets what it missed.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.backend = None
+        self._lock = threading.Lock()
+        self._subscriptions = defaultdict(set)  # channel -> {Subscription}
+        self._history = {}  # channel -> deque of recent events
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['event_broker'] = self
+        self.app = app
+        url = app.config['EVENTS_BACKEND']
+        if url.startswith(('redis://', 'rediss://')):
+            self.backend = RedisBackend(url, self._dispatch)
+        else:
+            self.backend = LocalBackend(self._dispatch)
+
+    def publish(self, channel, event_type, data):
+        self.backend.publish({
+            'id': str(time.time_ns()),
+            'channel': channel,
+            'type': event_type,
+            'data': data
+        })
+
+    def _dispatch(self, event):
+        channel = event['channel']
+        with self._lock:
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.app.config['EVENTS_HISTORY_SIZE'])
+            history.append(event)
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, channels, last_event_id=None):
+        self.backend.start()
+        subscription = Subscription(channels, self.app.config['EVENTS_QUEUE_SIZE'])
+        with self._lock:
+            if last_event_id is not None:
+                missed = [
+                    e for channel in channels for e in self._history.get(channel, ())
+                    if int(e['id']) > last_event_id
+                ]
+                for e in sorted(missed, key=lambda e: int(e['id'])):
+                    subscription.put(e)
+            for channel in channels:
+                self._subscriptions[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscriptions.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[channel]
+
+    def stream(self, subscription):
+        """Server-sent event lines for ``subscription``, with keep-alives.
+
+        Ends after ``EVENTS_STREAM_MAX_AGE`` seconds (browsers reconnect on
+        their own, resuming from the last event id) or when the client falls
+        too far behind.
+        """
+        config = self.app.config
+        deadline = time.monotonic() + config['EVENTS_STREAM_MAX_AGE']
+        try:
+            yield f"retry: {config['EVENTS_RETRY_MS']}\n\n"
+            while not subscription.overflowed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                event = subscription.get(min(config['EVENTS_HEARTBEAT'], remaining))
+                if event is None:
+                    # Comment line: keeps proxies from timing out and lets us
+                    # notice a disconnected client
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"id: {event['id']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+        finally:
+            self.unsubscribe(subscription)
+
+
+event_broker = EventBroker()
+
+
+@resources_reviewed.connect
+def _publish_reviews(app, lecturer_id, reviews):
+    broker = app.extensions.get('event_broker')
+    if broker is None:
+        return
+    for review in reviews:
+        broker.publish(student_channel(review['student_id']), 'resource.status', {
+            'id': review['id'],
+            'status': review['status']
+        })
+    # One event per review request, so other lecturers drop the items from their lists
+    broker.publish(LECTURERS_CHANNEL, 'resources.reviewed', {
+        'ids': [review['id'] for review in reviews],
+        'lecturer_id': lecturer_id
+    })
+
+
+# New submissions are picked up from the ORM, whichever upload path created them
+
+_PENDING_KEY = 'events_submitted'
+
+
+@event.listens_for(Resource, 'after_insert')
+def _collect_submission(mapper, connection, target):
+    Session.object_session(target).info.setdefault(_PENDING_KEY, []).append({
+        'id': target.id,
+        'title': target.title,
+        'category_id': int(target.category_id),
+        'student_id': target.uploaded_by_student_id
+    })
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_submissions(session):
+    submitted = session.info.pop(_PENDING_KEY, None)
+    if submitted and event_broker.app is not None:
+        for data in submitted:
+            event_broker.publish(LECTURERS_CHANNEL, 'resource.submitted', data)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_submissions(session):
+    session.info.pop(_PENDING_KEY, None)
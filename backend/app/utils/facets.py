@@ -0,0 +1,118 @@
+from collections import Counter
+from flask import current_app
+from sqlalchemy import delete, extract, func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from app import db
+from app.models import Category, ResourceFacetCount, ResourceListing
+from app.models.resource import ResourceStatus
+from app.utils.search import apply_search, search_terms
+
+_counts = ResourceFacetCount.__table__
+_listing = ResourceListing.__table__
+_KEYS = ['category_id', 'file_type', 'year']
+
+
+# Counter maintenance, called from app/utils/listings.py on the connection
+# the listing rows are written with
+
+def approved_facets(connection, condition):
+    """Approved listing rows matching ``condition``, counted by
+    ``(category_id, file_type, year)``."""
+    rows = connection.execute(
+        select(_listing.c.category_id, _listing.c.file_type, _listing.c.upload_date)
+        .where(_listing.c.status == ResourceStatus.approved, condition)
+    )
+    return Counter((category_id, file_type, upload_date.year if upload_date else 0)
+                   for category_id, file_type, upload_date in rows)
+
+
+def add_facet_counts(connection, deltas):
+    """Add ``deltas`` (``{(category_id, file_type, year): n}``, n may be
+    negative) onto the counters, creating missing rows."""
+    rows = [dict(zip(_KEYS, key), resources=n) for key, n in deltas.items() if n]
+    if not rows:
+        return
+    dialect = connection.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        stmt = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(_counts)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=_KEYS,
+            set_={'resources': _counts.c.resources + stmt.excluded.resources}
+        ), rows)
+        return
+    for row in rows:
+        updated = connection.execute(
+            update(_counts)
+            .where(*[_counts.c[key] == row[key] for key in _KEYS])
+            .values(resources=_counts.c.resources + row['resources'])
+        ).rowcount
+        if not updated:
+            connection.execute(insert(_counts), [row])
+
+
+def clear_facet_counts(connection):
+    connection.execute(delete(_counts))
+
+
+# Reading
+
+def _counted():
+    return db.session.execute(
+        select(_counts.c.category_id, _counts.c.file_type, _counts.c.year, _counts.c.resources)
+        .where(_counts.c.resources > 0)
+    ).all()
+
+
+def _scanned(search, limit):
+    # At most ``limit`` matches are aggregated, so a broad search costs no
+    # more than a narrow one
+    matches = apply_search(
+        ResourceListing.query.filter_by(status='approved'), search, ranked=False, model=ResourceListing
+    ).with_entities(
+        ResourceListing.category_id, ResourceListing.file_type, ResourceListing.upload_date
+    ).limit(limit).subquery()
+    year = func.coalesce(extract('year', matches.c.upload_date), 0)
+    return db.session.execute(
+        select(matches.c.category_id, matches.c.file_type, year, func.count())
+        .group_by(matches.c.category_id, matches.c.file_type, year)
+    ).all()
+
+
+def _ranked(counts):
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+
+
+def facet_counts(category_id=None, search=''):
+    """Counts of approved resources by category, file type and upload year.
+
+    Each facet applies every browse filter except its own, so the category
+    counts show what picking another category would give. Without a search
+    the counts come from the counter table; with one, from the first
+    ``FACET_SCAN_LIMIT`` matches, and ``complete`` is False if there were
+    more.
+    """
+    complete = True
+    if search_terms(search):
+        limit = current_app.config['FACET_SCAN_LIMIT']
+        rows = _scanned(search, limit)
+        complete = sum(row[3] for row in rows) < limit
+    else:
+        rows = _counted()
+
+    by_category, by_type, by_year = Counter(), Counter(), Counter()
+    for row_category, file_type, year, n in rows:
+        by_category[row_category] += n
+        if category_id is None or row_category == category_id:
+            by_type[file_type] += n
+            if year:
+                by_year[int(year)] += n
+
+    names = dict(db.session.execute(
+        select(Category.id, Category.name).where(Category.id.in_(list(by_category)))
+    ).all()) if by_category else {}
+    return {
+        'category': [{'id': c, 'name': names.get(c), 'count': n} for c, n in _ranked(by_category)],
+        'file_type': [{'value': t, 'count': n} for t, n in _ranked(by_type)],
+        'year': [{'value': y, 'count': n} for y, n in sorted(by_year.items(), reverse=True)],
+        'complete': complete
+    }
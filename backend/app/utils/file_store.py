@@ -0,0 +1,270 @@
+import hashlib
+import os
+import uuid
+from collections import Counter
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import FileBlob, Resource
+from app.storage import get_storage
+
+
+def blob_key(sha256):
+    """Storage key for content, sharded by leading hash characters (``blobs/ab/cd/abcd...``)."""
+    depth = current_app.config['STORAGE_SHARD_DEPTH']
+    width = current_app.config['STORAGE_SHARD_WIDTH']
+    shards = [sha256[i * width:(i + 1) * width] for i in range(depth)]
+    return '/'.join(['blobs', *shards, sha256])
+
+
+# ref_count of a blob `flask blobs gc` has claimed and is deleting
+GC_CLAIMED = -1
+
+
+def _incref(blob_id):
+    """Take a reference to a live blob; returns 0 if it is gone or claimed by GC."""
+    return db.session.execute(
+        update(FileBlob)
+        .where(FileBlob.id == blob_id, FileBlob.ref_count >= 0)
+        .values(ref_count=FileBlob.ref_count + 1)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+
+def _adopt(sha256, size, put):
+    """Reference the blob for ``sha256``, calling ``put(key)`` only if its bytes are not stored yet.
+
+    Returns ``(blob, stored)`` where ``stored`` says whether ``put`` ran.
+    """
+    storage = get_storage()
+    blob = FileBlob.query.filter_by(sha256=sha256).first()
+    if blob and _incref(blob.id):
+        # Referenced from here on, so GC cannot claim it
+        db.session.refresh(blob)
+        if storage.exists(blob.path):
+            return blob, False
+        # Row survived but the file went missing; the bytes we are about to
+        # store hash the same, so the row can be reused as is
+        key = blob_key(sha256)
+        put(key)
+        blob.path = key
+        return blob, True
+
+    if blob:
+        # GC has claimed the blob and may be deleting its file right now.
+        # Store ours under a key of its own and take the row over, so GC's
+        # final DELETE (still expecting the claim) leaves it alone
+        key = f'{blob_key(sha256)}.{uuid.uuid4().hex[:12]}'
+        put(key)
+        taken = db.session.execute(
+            update(FileBlob)
+            .where(FileBlob.id == blob.id, FileBlob.ref_count == GC_CLAIMED)
+            .values(ref_count=1, path=key)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if taken:
+            db.session.refresh(blob)
+            return blob, True
+        # GC deleted the row meanwhile, or another upload took it over first
+    else:
+        key = blob_key(sha256)
+        put(key)
+
+    # Someone may be storing the same content concurrently: create the row
+    # unless it exists, then take a reference either way
+    row = {'sha256': sha256, 'size': size, 'path': key, 'ref_count': 0, 'created_at': datetime.utcnow()}
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        # Not a savepoint: on SQLite, releasing one that opened the
+        # transaction commits it, even if the upload then fails
+        stmt = (sqlite.insert if dialect == 'sqlite' else postgresql.insert)(FileBlob)
+        db.session.execute(stmt.values(**row).on_conflict_do_nothing(index_elements=['sha256']))
+    else:
+        try:
+            with db.session.begin_nested():
+                db.session.execute(insert(FileBlob).values(**row))
+        except IntegrityError:
+            pass
+    blob = FileBlob.query.filter_by(sha256=sha256).one()
+    if not _incref(blob.id):
+        raise RuntimeError('The stored copy of this file is being removed; try again')
+    db.session.refresh(blob)
+    if blob.path != key:
+        # The row another upload created wins; ours is not referenced
+        storage.delete(key)
+    return blob, True
+
+
+def store_file(staged_path, sha256, size):
+    """Adopt a fully written local file into the content-addressed store.
+
+    ``staged_path`` is consumed: when a blob with the same hash is already
+    stored the staged copy is simply deleted, otherwise it is handed to the
+    storage backend. Returns the ``FileBlob`` with one more reference, inside
+    the caller's transaction.
+    """
+    blob, stored = _adopt(sha256, size, lambda key: get_storage().put_file(key, staged_path))
+    if not stored:
+        os.remove(staged_path)
+    return blob
+
+
+def store_object(staged_key, sha256, size):
+    """Like ``store_file`` for an object a client already uploaded into the backend."""
+    storage = get_storage()
+    blob, stored = _adopt(sha256, size, lambda key: storage.move(staged_key, key))
+    if not stored:
+        storage.delete(staged_key)
+    return blob
+
+
+def collect_garbage():
+    """Delete blobs no resource points at any more, then stored files with no
+    blob row at all. Returns the number of files removed.
+
+    Each blob is first claimed (ref_count 0 -> ``GC_CLAIMED``) by a
+    conditional UPDATE. Uploads only take references to blobs with
+    ref_count >= 0, so one that got there first keeps the blob, and none can
+    reuse it once claimed. The file is deleted next and the row last, and
+    only while the claim still holds (an upload may have taken the row over
+    with a file of its own). Claims left by an interrupted run are finished.
+    """
+    storage = get_storage()
+    removed = 0
+    candidates = db.session.query(FileBlob.id, FileBlob.path, FileBlob.ref_count).filter(
+        FileBlob.ref_count <= 0
+    ).all()
+    db.session.rollback()
+    for blob_id, path, ref_count in candidates:
+        if ref_count == 0:
+            # Matching the path too, so we delete the file the claim is for
+            claimed = db.session.execute(
+                update(FileBlob)
+                .where(FileBlob.id == blob_id, FileBlob.ref_count == 0, FileBlob.path == path)
+                .values(ref_count=GC_CLAIMED)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.session.commit()
+            if not claimed:
+                continue
+        storage.delete(path)
+        deleted = db.session.execute(
+            FileBlob.__table__.delete()
+            .where(FileBlob.id == blob_id, FileBlob.ref_count == GC_CLAIMED)
+        ).rowcount
+        db.session.commit()
+        removed += 1
+        if not deleted:
+            current_app.logger.info('Blob %s was taken over by an upload while being collected', blob_id)
+    return removed + _sweep_orphans(storage)
+
+
+def _delete_unreferenced(storage, keys):
+    referenced = set(db.session.scalars(select(FileBlob.path).where(FileBlob.path.in_(keys))))
+    referenced.update(db.session.scalars(select(Resource.file_path).where(Resource.file_path.in_(keys))))
+    orphans = [key for key in keys if key not in referenced]
+    for key in orphans:
+        storage.delete(key)
+    return len(orphans)
+
+
+def _sweep_orphans(storage, batch_size=500):
+    """Delete files under ``blobs/`` that no row points at.
+
+    Uploads store their file before the transaction that records it
+    commits, so a rollback or a crashed worker leaves the file behind. Only
+    files older than ``BLOB_ORPHAN_GRACE`` are considered, so uploads still
+    in flight are left alone.
+    """
+    cutoff = datetime.utcnow() - current_app.config['BLOB_ORPHAN_GRACE']
+    removed = 0
+    batch = []
+    for key, modified in storage.list('blobs/'):
+        if modified < cutoff:
+            batch.append(key)
+        if len(batch) >= batch_size:
+            removed += _delete_unreferenced(storage, batch)
+            batch = []
+    if batch:
+        removed += _delete_unreferenced(storage, batch)
+    db.session.rollback()  # end the read transaction
+    return removed
+
+
+def migrate_layout(batch_size=200, echo=lambda message: None):
+    """Move stored files into the current blob layout, one committed batch at a time.
+
+    Covers blobs stored under another sharding layout and files uploaded
+    before deduplication (``blob_id IS NULL``), which are hashed and adopted
+    into the store. Each file is copied (a hard link on local disk) and its
+    rows repointed before the old copy is deleted, so downloads keep working
+    while this runs. Finished rows no longer match, so an interrupted run can
+    simply be started again. Returns counts of what was done.
+    """
+    storage = get_storage()
+    stats = Counter()
+
+    last_id = 0
+    while True:
+        # Blobs claimed by `flask blobs gc` are left to it
+        blobs = FileBlob.query.filter(
+            FileBlob.id > last_id, FileBlob.ref_count >= 0
+        ).order_by(FileBlob.id).limit(batch_size).all()
+        if not blobs:
+            break
+        last_id = blobs[-1].id
+        superseded = []
+        for blob in blobs:
+            key = blob_key(blob.sha256)
+            if blob.path == key:
+                continue
+            if not storage.exists(blob.path):
+                stats['missing'] += 1
+                echo(f'Blob {blob.id}: {blob.path} is missing, skipped')
+                continue
+            storage.copy(blob.path, key)
+            superseded.append(blob.path)
+            Resource.query.filter_by(blob_id=blob.id).update({Resource.file_path: key}, synchronize_session=False)
+            blob.path = key
+            stats['moved'] += 1
+        db.session.commit()
+        for path in superseded:
+            storage.delete(path)
+        echo(f"Blobs checked up to id {last_id}: {stats['moved']} moved")
+
+    last_id = 0
+    while True:
+        resources = Resource.query.filter(
+            Resource.blob_id.is_(None), Resource.id > last_id
+        ).order_by(Resource.id).limit(batch_size).all()
+        if not resources:
+            break
+        last_id = resources[-1].id
+        legacy_paths = set()
+        for resource in resources:
+            path = resource.file_path
+            if not storage.exists(path):
+                stats['missing'] += 1
+                echo(f'Resource {resource.id}: {path} is missing, skipped')
+                continue
+            hasher = hashlib.sha256()
+            size = 0
+            for buf in storage.stream(path):
+                hasher.update(buf)
+                size += len(buf)
+            blob, _ = _adopt(hasher.hexdigest(), size, lambda key: storage.copy(path, key))
+            resource.blob_id = blob.id
+            resource.file_path = blob.path
+            legacy_paths.add(path)
+            stats['adopted'] += 1
+        db.session.commit()
+        # Flat uploads could be shared by several rows (same file name)
+        for path in legacy_paths:
+            if not Resource.query.filter_by(file_path=path).first():
+                storage.delete(path)
+        echo(f"Legacy uploads checked up to resource {last_id}: {stats['adopted']} adopted")
+
+    return stats
@@ -0,0 +1,125 @@
+from sqlalchemy import delete, event, inspect, insert, select, update
+from app import db
+from app.models import Category, Resource, ResourceListing, Student
+from app.utils.facets import add_facet_counts, approved_facets, clear_facet_counts
+
+# Resource attributes copied into resource_listing; changes to anything else
+# (leases, storage paths, versions) leave the listing row alone
+_MIRRORED = (
+    'title', 'description', 'file_name', 'file_type', 'file_size', 'upload_date', 'status',
+    'download_count', 'trending_score', 'category_id', 'uploaded_by_student_id',
+    'reviewed_by_lecturer_id', 'review_date', 'review_comments', 'rejection_reason'
+)
+
+_listing = ResourceListing.__table__
+
+
+def _source(condition):
+    """SELECT producing resource_listing rows for the resources matching ``condition``."""
+    resources, categories, students = Resource.__table__, Category.__table__, Student.__table__
+    return select(
+        resources.c.id, resources.c.title, resources.c.description, resources.c.file_name,
+        resources.c.file_type, resources.c.file_size, resources.c.upload_date, resources.c.status,
+        resources.c.download_count, resources.c.trending_score, resources.c.category_id, categories.c.name,
+        resources.c.uploaded_by_student_id, students.c.full_name, students.c.registration_number,
+        resources.c.reviewed_by_lecturer_id, resources.c.review_date, resources.c.review_comments,
+        resources.c.rejection_reason
+    ).select_from(
+        resources
+        .outerjoin(categories, categories.c.id == resources.c.category_id)
+        .outerjoin(students, students.c.id == resources.c.uploaded_by_student_id)
+    ).where(condition)
+
+
+def _copy(connection, condition):
+    columns = [
+        'id', 'title', 'description', 'file_name', 'file_type', 'file_size', 'upload_date', 'status',
+        'download_count', 'trending_score', 'category_id', 'category_name', 'student_id', 'uploader_name',
+        'uploader_registration_number', 'reviewed_by_lecturer_id', 'review_date', 'review_comments',
+        'rejection_reason'
+    ]
+    connection.execute(insert(_listing).from_select(columns, _source(condition)))
+
+
+def refresh_listings(connection, resource_ids):
+    """Rewrite the listing rows of ``resource_ids`` from the current resources.
+
+    Runs on ``connection`` so the copy commits or rolls back with the change
+    it mirrors. Writes that skip the ORM unit of work (bulk ``update()``)
+    must call this with ``db.session.connection()`` before they commit.
+    """
+    resource_ids = list(resource_ids)
+    if not resource_ids:
+        return
+    condition = _listing.c.id.in_(resource_ids)
+    before = approved_facets(connection, condition)
+    connection.execute(delete(_listing).where(condition))
+    _copy(connection, Resource.id.in_(resource_ids))
+    # Facet counters move by the difference, in the same transaction
+    after = approved_facets(connection, condition)
+    after.subtract(before)
+    add_facet_counts(connection, after)
+
+
+def rebuild_listings(batch_size=1000):
+    """Refill resource_listing and the facet counters from every resource;
+    returns the row count.
+
+    One transaction, so readers keep seeing the old rows until it commits.
+    """
+    db.session.execute(delete(_listing))
+    clear_facet_counts(db.session.connection())
+    copied = 0
+    last_id = 0
+    while True:
+        ids = db.session.scalars(
+            select(Resource.id).where(Resource.id > last_id).order_by(Resource.id).limit(batch_size)
+        ).all()
+        if not ids:
+            break
+        _copy(db.session.connection(), Resource.id.in_(ids))
+        add_facet_counts(db.session.connection(), approved_facets(db.session.connection(), _listing.c.id.in_(ids)))
+        copied += len(ids)
+        last_id = ids[-1]
+    db.session.commit()
+    return copied
+
+
+@event.listens_for(Resource, 'after_insert')
+def _resource_inserted(mapper, connection, target):
+    refresh_listings(connection, [target.id])
+
+
+@event.listens_for(Resource, 'after_update')
+def _resource_updated(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in _MIRRORED):
+        refresh_listings(connection, [target.id])
+
+
+@event.listens_for(Resource, 'after_delete')
+def _resource_deleted(mapper, connection, target):
+    condition = _listing.c.id == target.id
+    removed = approved_facets(connection, condition)
+    add_facet_counts(connection, {key: -n for key, n in removed.items()})
+    connection.execute(delete(_listing).where(condition))
+
+
+@event.listens_for(Category, 'after_update')
+def _category_updated(mapper, connection, target):
+    if inspect(target).attrs.name.history.has_changes():
+        connection.execute(
+            update(_listing).where(_listing.c.category_id == target.id).values(category_name=target.name)
+        )
+
+
+@event.listens_for(Student, 'after_update')
+def _student_updated(mapper, connection, target):
+    state = inspect(target)
+    if state.attrs.full_name.history.has_changes() or state.attrs.registration_number.history.has_changes():
+        connection.execute(
+            update(_listing).where(_listing.c.student_id == target.id).values(
+                uploader_name=target.full_name,
+                uploader_registration_number=target.registration_number
+            )
+        )
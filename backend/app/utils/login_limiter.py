@@ -0,0 +1,125 @@
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from flask import current_app
+
+try:
+    import redis
+except ImportError:  # only needed when LOGIN_LIMIT_STORAGE is a redis:// URL
+    redis = None
+
+
+class MemoryStore:
+    """Attempt timestamps in this process. Each worker limits on its own."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._attempts = {}  # key -> deque of timestamps, oldest first
+
+    def _live(self, key, window, now):
+        attempts = self._attempts.get(key)
+        while attempts and attempts[0] <= now - window:
+            attempts.popleft()
+        if attempts is not None and not attempts:
+            del self._attempts[key]
+            return None
+        return attempts
+
+    def count(self, key, window, now):
+        """``(attempts in the window, time of the oldest one)``."""
+        with self._lock:
+            attempts = self._live(key, window, now)
+            return (len(attempts), attempts[0]) if attempts else (0, None)
+
+    def add(self, key, window, now):
+        with self._lock:
+            self._live(key, window, now)
+            self._attempts.setdefault(key, deque()).append(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._attempts.pop(key, None)
+
+
+class RedisStore:
+    """Attempts in Redis sorted sets, shared by every worker and node."""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError('redis is required for a redis:// LOGIN_LIMIT_STORAGE (pip install redis)')
+        self.client = redis.Redis.from_url(url)
+
+    def count(self, key, window, now):
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(key, 0, now - window)
+        pipe.zrange(key, 0, 0, withscores=True)
+        pipe.zcard(key)
+        _, oldest, count = pipe.execute()
+        return count, (oldest[0][1] if oldest else None)
+
+    def add(self, key, window, now):
+        pipe = self.client.pipeline()
+        pipe.zadd(key, {uuid.uuid4().hex: now})
+        pipe.expire(key, int(math.ceil(window)))
+        pipe.execute()
+
+    def reset(self, key):
+        self.client.delete(key)
+
+
+class LoginLimiter:
+    """Sliding-window limit on failed logins per client IP and per username.
+
+    ``retry_after()`` is checked before the password is hashed, so once a
+    key has ``LOGIN_LIMIT_PER_IP`` / ``LOGIN_LIMIT_PER_USERNAME`` failures in
+    the last ``LOGIN_LIMIT_WINDOW`` seconds, further attempts cost no hashing
+    until the oldest failure leaves the window. A successful login clears
+    the username's failures.
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['login_limiter'] = self
+        url = app.config['LOGIN_LIMIT_STORAGE']
+        self.store = RedisStore(url) if url.startswith(('redis://', 'rediss://')) else MemoryStore()
+
+    def _keys(self, ip_address, username):
+        config = current_app.config
+        keys = [(f'login:ip:{ip_address}', config['LOGIN_LIMIT_PER_IP'])]
+        if username:
+            keys.append((f'login:user:{username.lower()}', config['LOGIN_LIMIT_PER_USERNAME']))
+        return keys
+
+    def retry_after(self, ip_address, username):
+        """Seconds until another attempt is allowed, or 0 if it is allowed now."""
+        if not current_app.config['LOGIN_LIMIT_ENABLED']:
+            return 0
+        window = current_app.config['LOGIN_LIMIT_WINDOW']
+        now = time.time()
+        wait = 0
+        for key, limit in self._keys(ip_address, username):
+            count, oldest = self.store.count(key, window, now)
+            if count >= limit:
+                wait = max(wait, int(math.ceil(oldest + window - now)) or 1)
+        return wait
+
+    def failed(self, ip_address, username):
+        if not current_app.config['LOGIN_LIMIT_ENABLED']:
+            return
+        window = current_app.config['LOGIN_LIMIT_WINDOW']
+        now = time.time()
+        for key, _ in self._keys(ip_address, username):
+            self.store.add(key, window, now)
+
+    def succeeded(self, ip_address, username):
+        if username:
+            self.store.reset(f'login:user:{username.lower()}')
+
+
+login_limiter = LoginLimiter()
@@ -0,0 +1,134 @@
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import DateTime, String, and_, literal, or_
+from app import db
+
+MAX_PER_PAGE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort_value, row_id):
+    # Dates travel as ISO strings, numeric sort keys (scores, counts) as numbers
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort_value, row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if isinstance(sort_value, str):
+            sort_value = datetime.fromisoformat(sort_value)
+        elif isinstance(sort_value, bool) or not isinstance(sort_value, (int, float)):
+            # Includes null: listings never page past a row without a sort value
+            raise TypeError(sort_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor('Invalid cursor')
+
+
+class _CountCache:
+    """Per-process cache of listing totals, so cursor pages skip COUNT(*)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}  # key -> (expires_at, total)
+
+    def get(self, key, query):
+        now = time.monotonic()
+        with self._lock:
+            hit = self._counts.get(key)
+        if hit and hit[0] > now:
+            return hit[1]
+        total = query.order_by(None).count()
+        with self._lock:
+            self._counts[key] = (now + current_app.config['PAGINATION_COUNT_CACHE_TTL'], total)
+        return total
+
+    def clear(self):
+        with self._lock:
+            self._counts.clear()
+
+
+count_cache = _CountCache()
+
+
+class KeysetPage:
+    """One page of a cursor-paginated listing, ordered newest first."""
+
+    def __init__(self, items, per_page, next_cursor, total=None):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.total = total
+
+
+def keyset_paginate(query, sort_column, id_column, cursor, per_page, count_key=None):
+    """Page ``query`` on ``(sort_column, id_column)`` descending.
+
+    ``cursor`` is the token from the previous page ('' for the first page).
+    Pages cost the same however deep they are, because the cursor turns into
+    a range condition rather than an OFFSET. A total is only included when
+    ``count_key`` is given, and then comes from a short-lived cache.
+
+    Rows whose ``sort_column`` is NULL are left out: NULL has no place in
+    the range condition (and sorts first on PostgreSQL, last on SQLite).
+    The filter keeps the ``(..., sort_column, id)`` indexes usable, which
+    COALESCE would not.
+    """
+    per_page = max(1, min(per_page, MAX_PER_PAGE))
+    query = query.filter(sort_column.isnot(None))
+    total = count_cache.get(count_key, query) if count_key is not None else None
+
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor)
+        if isinstance(sort_value, datetime) != isinstance(sort_column.type, DateTime):
+            raise InvalidCursor('Cursor does not match this sort order')
+        if isinstance(sort_value, datetime) and db.session.get_bind().dialect.name == 'sqlite':
+            # SQLite keeps datetimes as text and CURRENT_TIMESTAMP defaults have
+            # no fractional part, while bound datetimes always get '.000000';
+            # compare against the text the row actually holds
+            sort_value = literal(sort_value.isoformat(sep=' '), String)
+        query = query.filter(or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < row_id)
+        ))
+
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last = rows[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return KeysetPage(rows, per_page, next_cursor, total)
+
+
+def pagination_data(page):
+    """Pagination block for API responses, for either pagination style."""
+    if isinstance(page, KeysetPage):
+        data = {
+            'per_page': page.per_page,
+            'next_cursor': page.next_cursor,
+            'has_next': page.has_next
+        }
+        if page.total is not None:
+            data['total'] = page.total
+        return data
+    return {
+        'page': page.page,
+        'pages': page.pages,
+        'per_page': page.per_page,
+        'total': page.total,
+        'has_next': page.has_next,
+        'has_prev': page.has_prev
+    }
@@ -0,0 +1,54 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+
+
+class QueryCounter:
+    """Collects the SQL statements run against an engine."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Count the queries executed inside the block.
+
+    Must run inside an app context. Use the counter's ``count`` and
+    ``statements`` after the block exits::
+
+        with count_queries() as queries:
+            client.get('/api/student/browse')
+        print(queries.count)
+    """
+    engine = engine or db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+
+@contextmanager
+def assert_max_queries(limit, engine=None):
+    """Fail with the offending statements if the block runs more than ``limit`` queries.
+
+    Used to pin the query budget of listing endpoints so that an N+1 (a lazy
+    relationship touched per row) shows up as a failure, e.g.::
+
+        with assert_max_queries(4):
+            client.get('/api/student/browse')
+    """
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = '\n'.join(f'  {i + 1}. {sql}' for i, sql in enumerate(counter.statements))
+        raise AssertionError(f'{counter.count} queries executed, expected at most {limit}:\n{listing}')
@@ -0,0 +1,72 @@
+import json
+from sqlalchemy import text
+from app import db
+from app.models import ResourceDownload, ResourceListing
+
+
+def listing_queries():
+    """The statements behind each listing endpoint, with placeholder ids.
+
+    Keep in step with the endpoints when their filters or sort change.
+    """
+    newest = (ResourceListing.upload_date.desc(), ResourceListing.id.desc())
+    return {
+        'student browse': ResourceListing.query.filter_by(status='approved').order_by(*newest).limit(12),
+        'student browse trending': ResourceListing.query.filter_by(status='approved').order_by(ResourceListing.trending_score.desc(), ResourceListing.id.desc()).limit(12),
+        'student browse popular': ResourceListing.query.filter_by(status='approved').order_by(ResourceListing.download_count.desc(), ResourceListing.id.desc()).limit(12),
+        'student browse by category': ResourceListing.query.filter_by(status='approved', category_id=1).order_by(*newest).limit(12),
+        'student dashboard uploads': ResourceListing.query.filter_by(student_id=1).order_by(*newest).limit(5),
+        'my uploads': ResourceListing.query.filter_by(student_id=1).order_by(*newest).limit(10),
+        'lecturer pending': ResourceListing.query.filter_by(status='pending').order_by(*newest).limit(20),
+        'lecturer reviewed': ResourceListing.query.filter_by(reviewed_by_lecturer_id=1).order_by(ResourceListing.review_date.desc()).limit(10),
+        'downloads of a resource': ResourceDownload.query.filter_by(resource_id=1).order_by(ResourceDownload.download_date.desc()).limit(50),
+        'downloads by a user': ResourceDownload.query.filter_by(user_id=1).order_by(ResourceDownload.download_date.desc()).limit(50),
+    }
+
+
+def _sql(query):
+    return str(query.statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+
+
+def _sqlite_problems(query):
+    rows = db.session.execute(text('EXPLAIN QUERY PLAN ' + _sql(query))).all()
+    plan = [row[-1] for row in rows]
+    problems = [
+        step for step in plan
+        if (step.startswith('SCAN ') and ' USING ' not in step) or 'TEMP B-TREE' in step
+    ]
+    return plan, problems
+
+
+def _postgres_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from _postgres_nodes(child)
+
+
+def _postgres_problems(query):
+    # Tiny tables are always cheapest to scan; rule that out to see whether
+    # an index can serve the query at all
+    db.session.execute(text('SET LOCAL enable_seqscan = off'))
+    raw = db.session.execute(text('EXPLAIN (FORMAT JSON) ' + _sql(query))).scalar()
+    root = (json.loads(raw) if isinstance(raw, str) else raw)[0]['Plan']
+    plan = [f"{node['Node Type']} {node.get('Relation Name', '')}".strip() for node in _postgres_nodes(root)]
+    problems = [step for step in plan if step.startswith(('Seq Scan', 'Sort'))]
+    return plan, problems
+
+
+def check_query_plans():
+    """EXPLAIN every listing query; returns ``[(name, plan steps, problems)]``.
+
+    A problem is a full table scan, or a sort the database has to do itself
+    instead of reading an index in order.
+    """
+    explain = _postgres_problems if db.engine.dialect.name == 'postgresql' else _sqlite_problems
+    results = []
+    try:
+        for name, query in listing_queries().items():
+            plan, problems = explain(query)
+            results.append((name, plan, problems))
+    finally:
+        db.session.rollback()
+    return results
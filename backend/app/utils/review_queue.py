@@ -0,0 +1,106 @@
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+from app import db
+from app.models import Resource
+from app.models.resource import ResourceStatus
+
+
+def _unclaimed(now):
+    return or_(Resource.claimed_by_lecturer_id.is_(None), Resource.claim_expires_at <= now)
+
+
+def claimed_by_other(resource, lecturer_id, now=None):
+    """Whether another lecturer holds a live lease on ``resource``."""
+    now = now or datetime.utcnow()
+    return (
+        resource.claimed_by_lecturer_id not in (None, lecturer_id)
+        and resource.claim_expires_at is not None
+        and resource.claim_expires_at > now
+    )
+
+
+def held_query(lecturer_id, now=None):
+    """Pending resources ``lecturer_id`` holds a live lease on, oldest first."""
+    now = now or datetime.utcnow()
+    return Resource.query.filter(
+        Resource.status == ResourceStatus.pending,
+        Resource.claimed_by_lecturer_id == lecturer_id,
+        Resource.claim_expires_at > now
+    ).order_by(Resource.upload_date, Resource.id)
+
+
+def claim(lecturer_id, count):
+    """Lease up to ``count`` pending resources to ``lecturer_id`` and commit.
+
+    Returns the new lease expiry; ``held_query`` lists the leased items.
+
+    Leases the lecturer already holds count towards ``count`` and are
+    renewed. New items are the oldest pending resources that are unclaimed,
+    or whose lease has expired. Expired leases need no clean-up: they simply
+    match again here.
+
+    The claim is a single ``UPDATE ... WHERE id IN (SELECT ... LIMIT n)``.
+    On PostgreSQL the inner select uses ``FOR UPDATE SKIP LOCKED``, so
+    lecturers claiming at the same moment get disjoint items without
+    waiting on each other. SQLite runs one writer at a time, which makes the
+    same statement atomic there. The outer WHERE repeats the unclaimed
+    check, so a row taken between the select and the update is left alone.
+    """
+    now = datetime.utcnow()
+    expires = now + current_app.config['REVIEW_LEASE_DURATION']
+
+    held = db.session.execute(
+        update(Resource)
+        .where(
+            Resource.status == ResourceStatus.pending,
+            Resource.claimed_by_lecturer_id == lecturer_id,
+            Resource.claim_expires_at > now
+        )
+        .values(claim_expires_at=expires)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    wanted = count - held
+    if wanted > 0:
+        candidates = (
+            select(Resource.id)
+            .where(Resource.status == ResourceStatus.pending, _unclaimed(now))
+            .order_by(Resource.upload_date, Resource.id)
+            .limit(wanted)
+        )
+        if db.session.get_bind().dialect.name == 'postgresql':
+            candidates = candidates.with_for_update(skip_locked=True)
+        db.session.execute(
+            update(Resource)
+            .where(
+                Resource.id.in_(candidates.scalar_subquery()),
+                Resource.status == ResourceStatus.pending,
+                _unclaimed(now)
+            )
+            .values(claimed_by_lecturer_id=lecturer_id, claim_expires_at=expires)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.commit()
+    return expires
+
+
+def release(lecturer_id, resource_ids=None):
+    """Give back the lecturer's leases (all, or just ``resource_ids``) and commit."""
+    condition = Resource.claimed_by_lecturer_id == lecturer_id
+    if resource_ids is not None:
+        condition = and_(condition, Resource.id.in_(resource_ids))
+    released = db.session.execute(
+        update(Resource)
+        .where(condition)
+        .values(claimed_by_lecturer_id=None, claim_expires_at=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    return released
+
+
+def available_count(now=None):
+    """Pending resources nobody holds a live lease on."""
+    now = now or datetime.utcnow()
+    return Resource.query.filter(Resource.status == ResourceStatus.pending, _unclaimed(now)).count()
@@ -0,0 +1,105 @@
+import re
+from sqlalchemy import column, delete, func, insert, literal_column, select, table, text
+from app import db
+from app.models import Resource
+from app.models.resource import POSTGRES_SEARCH_DDL, SQLITE_SEARCH_DDL, SQLITE_SEARCH_TRIGGERS, ResourceStatus
+from app.models.resource_listing import POSTGRES_LISTING_SEARCH_DDL
+
+# FTS5 table created next to `resources` on SQLite, rowid == resources.id;
+# triggers on `resources` keep it to the approved rows
+resources_fts = table('resources_fts', column('rowid'), column('title'), column('description'), column('rank'))
+
+
+def _pg_document(model):
+    # Must match the expression in the GIN index DDL so the planner uses it
+    return func.to_tsvector(
+        literal_column("'english'::regconfig"),
+        func.coalesce(model.title, literal_column("''")).op('||')(literal_column("' '")).op('||')(
+            func.coalesce(model.description, literal_column("''"))
+        )
+    )
+
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def search_terms(search):
+    """Split user input into plain word tokens (drops query syntax characters)."""
+    return _TOKEN_RE.findall(search.lower())[:10]
+
+
+def apply_search(query, search, ranked=True, model=Resource):
+    """Restrict a query on ``model`` to full-text matches for ``search``.
+
+    ``model`` is Resource or ResourceListing; both have ``id``, ``title`` and
+    ``description``. Every word must match as a word prefix, so results keep
+    up with someone typing. With ``ranked`` the best matches come first;
+    callers that impose their own order (cursor pagination) pass
+    ``ranked=False``. Returns the query unchanged when ``search`` has no words.
+    """
+    terms = search_terms(search)
+    if not terms:
+        return query
+
+    if _dialect() == 'postgresql':
+        tsquery = func.to_tsquery(literal_column("'english'::regconfig"), ' & '.join(f'{t}:*' for t in terms))
+        document = _pg_document(model)
+        query = query.filter(document.op('@@')(tsquery))
+        return query.order_by(func.ts_rank(document, tsquery).desc()) if ranked else query
+
+    if _dialect() == 'sqlite':
+        match = ' '.join(f'"{t}"*' for t in terms)
+        hits = select(
+            resources_fts.c.rowid.label('resource_id'),
+            resources_fts.c.rank.label('rank')
+        ).where(literal_column('resources_fts').op('MATCH')(match)).subquery()
+        query = query.join(hits, hits.c.resource_id == model.id)
+        return query.order_by(hits.c.rank) if ranked else query
+
+    # No full-text support for this database; fall back to substring matching
+    for term in terms:
+        query = query.filter(model.title.contains(term) | model.description.contains(term))
+    return query
+
+
+def rebuild_search_index(batch_size=500):
+    """Create the index (and on SQLite its triggers) if needed and fill it
+    from every approved resource.
+
+    Reviews, edits and deletes keep the index current by themselves; this is
+    for databases created before the index existed or restored without it.
+    """
+    dialect = _dialect()
+    if dialect == 'postgresql':
+        db.session.execute(text(POSTGRES_SEARCH_DDL))
+        db.session.execute(text(POSTGRES_LISTING_SEARCH_DDL))
+        db.session.commit()
+        return Resource.query.filter_by(status=ResourceStatus.approved).count()
+    if dialect != 'sqlite':
+        return 0
+
+    db.session.execute(text(SQLITE_SEARCH_DDL))
+    for trigger in SQLITE_SEARCH_TRIGGERS:
+        db.session.execute(text(trigger))
+    db.session.execute(delete(resources_fts))
+    indexed = 0
+    last_id = 0
+    while True:
+        batch = db.session.execute(
+            select(Resource.id, Resource.title, Resource.description)
+            .where(Resource.status == ResourceStatus.approved, Resource.id > last_id)
+            .order_by(Resource.id).limit(batch_size)
+        ).all()
+        if not batch:
+            break
+        db.session.execute(insert(resources_fts), [
+            {'rowid': r.id, 'title': r.title, 'description': r.description or ''} for r in batch
+        ])
+        indexed += len(batch)
+        last_id = batch[-1].id
+    db.session.commit()
+    return indexed
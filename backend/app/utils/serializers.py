@@ -0,0 +1,136 @@
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+from app.models import Resource, ResourceListing
+
+try:
+    import orjson
+except ImportError:  # optional; responses fall back to the stdlib encoder
+    orjson = None
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+_L = ResourceListing
+
+# Output field -> (columns it reads, how to build it from a row). Listing
+# queries select just these columns, so rows are plain tuples rather than
+# ORM objects, and unused text columns never leave the database.
+FIELDS = {
+    'id': ((_L.id,), lambda r: r.id),
+    'title': ((_L.title,), lambda r: r.title),
+    'description': ((_L.description,), lambda r: r.description),
+    'file_name': ((_L.file_name,), lambda r: r.file_name),
+    'file_type': ((_L.file_type,), lambda r: r.file_type),
+    'file_size': ((_L.file_size,), lambda r: r.file_size),
+    'upload_date': ((_L.upload_date,), lambda r: _iso(r.upload_date)),
+    'status': ((_L.status,), lambda r: r.status.value),
+    'download_count': ((_L.download_count,), lambda r: r.download_count),
+    'review_date': ((_L.review_date,), lambda r: _iso(r.review_date)),
+    'review_comments': ((_L.review_comments,), lambda r: r.review_comments),
+    'rejection_reason': ((_L.rejection_reason,), lambda r: r.rejection_reason),
+    'category': ((_L.category_id, _L.category_name), lambda r: {
+        'id': r.category_id,
+        'name': r.category_name
+    }),
+    'uploader': ((_L.uploader_name, _L.uploader_registration_number), lambda r: {
+        'full_name': r.uploader_name or 'Unknown',
+        'registration_number': r.uploader_registration_number or 'Unknown'
+    }),
+    # Only for queries joined to resources (the review queue)
+    'version': ((Resource.version,), lambda r: r.version),
+    'claim_expires_at': ((Resource.claim_expires_at,), lambda r: _iso(r.claim_expires_at)),
+}
+
+_FILE = ('id', 'title', 'description', 'file_name', 'file_type', 'file_size', 'upload_date')
+_REVIEW = ('review_date', 'review_comments', 'rejection_reason')
+
+# What each view returns by default
+BROWSE = _FILE + ('download_count', 'category', 'uploader')
+OWN_UPLOADS = _FILE + ('status', 'download_count', 'category')
+MY_UPLOADS = _FILE + ('status', 'download_count') + _REVIEW + ('category',)
+PENDING = _FILE + ('category', 'uploader')
+REVIEWED = _FILE + ('status',) + _REVIEW + ('category', 'uploader')
+QUEUE = _FILE + ('version', 'claim_expires_at', 'category', 'uploader')
+
+# Always selected, since cursors are built from them
+_KEYS = (_L.id, _L.upload_date)
+
+
+def requested_fields():
+    """The field names asked for with ``?fields=a,b``, or None for everything.
+
+    Raises InvalidFields for names no view has.
+    """
+    raw = request.args.get('fields')
+    if not raw:
+        return None
+    wanted = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = wanted - set(FIELDS)
+    if unknown:
+        raise InvalidFields(f"Unknown field(s): {', '.join(sorted(unknown))}")
+    return frozenset(wanted)
+
+
+def pick(view, wanted):
+    """The fields of ``view`` to return: all of them, or those in ``wanted`` (plus id)."""
+    if wanted is None:
+        return view
+    return tuple(name for name in view if name == 'id' or name in wanted)
+
+
+def project(query, fields, extra=()):
+    """Restrict a ResourceListing ``query`` to the columns ``fields`` read.
+
+    ``extra`` columns are selected too, e.g. a sort key a cursor is built from.
+    """
+    columns = dict.fromkeys(_KEYS + tuple(extra))
+    for name in fields:
+        columns.update(dict.fromkeys(FIELDS[name][0]))
+    return query.with_entities(*columns)
+
+
+def dump(rows, fields):
+    """Build the response dicts for ``rows`` from a ``project()``-ed query."""
+    builders = [(name, FIELDS[name][1]) for name in fields]
+    return [{name: build(row) for name, build in builders} for row in rows]
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """``DefaultJSONProvider`` with encoding done by orjson.
+
+    Output matches the default provider: sorted keys, and datetimes and other
+    non-JSON types go through the same ``default`` hook.
+    """
+
+    def _options(self, sort_keys, indent):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def dumps(self, obj, **kwargs):
+        option = self._options(kwargs.get('sort_keys', self.sort_keys), kwargs.get('indent'))
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=self.default, option=self._options(self.sort_keys, indent))
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Use orjson for JSON responses when it is installed and JSON_FAST_ENCODER is on."""
+    if orjson is not None and app.config['JSON_FAST_ENCODER']:
+        app.json = OrjsonProvider(app)
@@ -0,0 +1,191 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from flask import current_app
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Category, Resource, ResourceListing
+from app.models.resource import ResourceStatus
+
+_PENDING_KEY = 'suggest_changes'
+_WORD_START = re.compile(r'\b\w')
+
+
+def normalize(text):
+    """Casefolded ``text`` with runs of whitespace collapsed to one space."""
+    return ' '.join((text or '').casefold().split())
+
+
+def _keys(text):
+    # One key per word start, so "calc" finds "Intro to Calculus"
+    text = normalize(text)
+    return tuple(dict.fromkeys(text[m.start():] for m in _WORD_START.finditer(text)))
+
+
+class SuggestIndex:
+    """Per-process prefix index over approved resource titles and category names.
+
+    A sorted list of ``(key, kind, id)`` searched with ``bisect``, where each
+    title or name (of active categories) has a key for every word it contains, starting at that word.
+    Lookups never touch the database. Commits in this process that approve,
+    reject, rename or delete a resource or category update the index once
+    they commit. Other processes pick them up when they next refill their
+    index from the database, at most ``SUGGEST_REFRESH_SECONDS`` later.
+
+    Writes that skip the ORM unit of work (bulk ``update()``) must call
+    ``mark_suggestions_changed()`` before they commit.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refilling = threading.Lock()
+        self._entries = []  # sorted (key, kind, id)
+        self._items = {}  # (kind, id) -> (text, keys)
+        self._built_at = None
+        self._replay = None  # changes committed during a refill
+
+    # Lookups
+
+    def suggest(self, prefix, limit):
+        """Up to ``limit`` ``{'type', 'id', 'text'}`` dicts whose text has a
+        word starting with ``prefix``, in alphabetical order of the match."""
+        self._refresh_if_stale()
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        found = {}
+        with self._lock:
+            i = bisect_left(self._entries, (prefix,))
+            while i < len(self._entries) and len(found) < limit:
+                key, kind, item_id = self._entries[i]
+                if not key.startswith(prefix):
+                    break
+                if (kind, item_id) not in found:
+                    found[(kind, item_id)] = self._items[(kind, item_id)][0]
+                i += 1
+        return [{'type': kind, 'id': item_id, 'text': text} for (kind, item_id), text in found.items()]
+
+    # Maintenance
+
+    def _refresh_if_stale(self):
+        built_at = self._built_at
+        if built_at is not None and time.monotonic() - built_at < current_app.config['SUGGEST_REFRESH_SECONDS']:
+            return
+        # The first lookup waits for the index; later refills happen in one
+        # request while the others keep reading the old one
+        if self._refilling.acquire(blocking=built_at is None):
+            try:
+                if self._built_at is built_at:
+                    self.rebuild()
+            finally:
+                self._refilling.release()
+
+    def rebuild(self):
+        """Refill the index from the database; returns the number of items."""
+        with self._lock:
+            self._replay = []
+        try:
+            items = {}
+            for item_id, title in db.session.execute(
+                select(ResourceListing.id, ResourceListing.title).where(ResourceListing.status == ResourceStatus.approved)
+            ):
+                items[('resource', item_id)] = (title, _keys(title))
+            for item_id, name in db.session.execute(select(Category.id, Category.name).where(Category.is_active.is_(True))):
+                items[('category', item_id)] = (name, _keys(name))
+            entries = sorted((key, kind, item_id) for (kind, item_id), (_, keys) in items.items() for key in keys)
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+
+        with self._lock:
+            self._entries, self._items = entries, items
+            replay, self._replay = self._replay, None
+            for change in replay:
+                self._apply(change)
+            self._built_at = time.monotonic()
+        return len(items)
+
+    def apply(self, changes):
+        """Apply committed ``{(kind, id): text or None}`` changes; None removes."""
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(changes)
+            self._apply(changes)
+
+    def _apply(self, changes):
+        for (kind, item_id), text in changes.items():
+            old = self._items.pop((kind, item_id), None)
+            if old is not None:
+                for key in old[1]:
+                    i = bisect_left(self._entries, (key, kind, item_id))
+                    if i < len(self._entries) and self._entries[i] == (key, kind, item_id):
+                        del self._entries[i]
+            if text is not None:
+                keys = _keys(text)
+                self._items[(kind, item_id)] = (text, keys)
+                for key in keys:
+                    insort(self._entries, (key, kind, item_id))
+
+
+suggest_index = SuggestIndex()
+
+
+def _pending(session):
+    return session.info.setdefault(_PENDING_KEY, {})
+
+
+def mark_suggestions_changed(approved=(), removed=(), session=None):
+    """Update the index when ``session`` (default ``db.session``) commits.
+
+    ``approved`` holds ``(id, title)`` pairs of resources now approved,
+    ``removed`` the ids of resources no longer approved. For bulk
+    statements, which the mapper events below do not see.
+    """
+    pending = _pending(session or db.session)
+    for resource_id, title in approved:
+        pending[('resource', resource_id)] = title
+    for resource_id in removed:
+        pending[('resource', resource_id)] = None
+
+
+def _resource_changed(mapper, connection, target):
+    state = inspect(target)
+    if not (state.attrs.status.history.has_changes() or state.attrs.title.history.has_changes()):
+        return
+    approved = target.status in (ResourceStatus.approved, 'approved')
+    _pending(Session.object_session(target))[('resource', target.id)] = target.title if approved else None
+
+
+def _resource_deleted(mapper, connection, target):
+    _pending(Session.object_session(target))[('resource', target.id)] = None
+
+
+def _category_changed(mapper, connection, target):
+    _pending(Session.object_session(target))[('category', target.id)] = target.name if target.is_active else None
+
+
+def _category_deleted(mapper, connection, target):
+    _pending(Session.object_session(target))[('category', target.id)] = None
+
+
+event.listen(Resource, 'after_insert', _resource_changed)
+event.listen(Resource, 'after_update', _resource_changed)
+event.listen(Resource, 'after_delete', _resource_deleted)
+event.listen(Category, 'after_insert', _category_changed)
+event.listen(Category, 'after_update', _category_changed)
+event.listen(Category, 'after_delete', _category_deleted)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_committed(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    if changes:
+        suggest_index.apply(changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
@@ -0,0 +1,143 @@
+from flask import current_app
+from flask_login import UserMixin
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app.models.user import UserRole
+
+ACCESS_SALT = 'auth-access'
+REFRESH_SALT = 'auth-refresh'
+
+
+def _serializer(salt):
+    secret = current_app.config['AUTH_TOKEN_SECRET'] or current_app.config['SECRET_KEY']
+    return URLSafeTimedSerializer(secret, salt=salt)
+
+
+def access_claims(user):
+    student = user.student_profile
+    lecturer = user.lecturer_profile
+    return {
+        'uid': user.id,
+        'role': user.role.value,
+        'sid': student.id if student else None,
+        'lid': lecturer.id if lecturer else None,
+        'can_upload': bool(student and student.can_upload)
+    }
+
+
+def issue_access_token(user):
+    """Signed access token and its lifetime in seconds."""
+    lifetime = current_app.config['AUTH_ACCESS_TOKEN_LIFETIME'].total_seconds()
+    return _serializer(ACCESS_SALT).dumps(access_claims(user)), int(lifetime)
+
+
+def issue_tokens(user):
+    access_token, expires_in = issue_access_token(user)
+    refresh_token = _serializer(REFRESH_SALT).dumps({'uid': user.id, 'ver': user.token_version})
+    return {
+        'token_type': 'Bearer',
+        'access_token': access_token,
+        'expires_in': expires_in,
+        'refresh_token': refresh_token,
+        'refresh_expires_in': int(current_app.config['AUTH_REFRESH_TOKEN_LIFETIME'].total_seconds())
+    }
+
+
+def verify_access_token(token):
+    """Claims of a valid, unexpired access token, else None."""
+    max_age = current_app.config['AUTH_ACCESS_TOKEN_LIFETIME'].total_seconds()
+    try:
+        return _serializer(ACCESS_SALT).loads(token, max_age=max_age)
+    except BadSignature:  # includes SignatureExpired
+        return None
+
+
+def user_for_refresh_token(token):
+    """The active user a refresh token was issued to, else None.
+
+    Unlike access tokens this reads the database, so a deactivated account
+    or a changed password stops the token from being refreshed.
+    """
+    from app.models import User
+    max_age = current_app.config['AUTH_REFRESH_TOKEN_LIFETIME'].total_seconds()
+    try:
+        claims = _serializer(REFRESH_SALT).loads(token, max_age=max_age)
+    except BadSignature:
+        return None
+    user = User.query.get(claims['uid'])
+    # A password change bumps token_version; rehashing on login does not
+    if user is None or not user.is_active or claims.get('ver') != user.token_version:
+        return None
+    return user
+
+
+class _TokenProfile:
+    """Profile known from the token (``id``, ``can_upload`` for students).
+
+    Any other attribute loads the cached profile snapshot on first use.
+    """
+
+    def __init__(self, token_user, name, profile_id, **known):
+        self._token_user = token_user
+        self._name = name
+        self.id = profile_id
+        self.__dict__.update(known)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(getattr(self._token_user._snapshot(), self._name), attr)
+
+
+class TokenUser(UserMixin):
+    """``current_user`` for a request authenticated by a bearer token.
+
+    Role checks and ``student_profile.can_upload`` come from the verified
+    claims. Other user or profile fields come from the user's cached
+    snapshot, which ``user_from_request`` loads to check the account still
+    exists and is active.
+    """
+
+    def __init__(self, claims):
+        self.id = claims['uid']
+        self.role = UserRole(claims['role'])
+        self.student_profile = (
+            _TokenProfile(self, 'student_profile', claims['sid'], can_upload=claims['can_upload'])
+            if claims.get('sid') is not None else None
+        )
+        self.lecturer_profile = (
+            _TokenProfile(self, 'lecturer_profile', claims['lid'])
+            if claims.get('lid') is not None else None
+        )
+        self._loaded = None
+
+    def _snapshot(self):
+        if self._loaded is None:
+            from app.utils.user_cache import user_cache
+            self._loaded = user_cache.get(self.id)
+        return self._loaded
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self._snapshot(), attr)
+
+    def __repr__(self):
+        return f'<TokenUser {self.id} ({self.role.value})>'
+
+
+def user_from_request(request):
+    """``TokenUser`` for a valid ``Authorization: Bearer <access token>`` header, else None."""
+    if not current_app.config['AUTH_TOKENS_ENABLED']:
+        return None
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token:
+        return None
+    claims = verify_access_token(token.strip())
+    if not claims:
+        return None
+    user = TokenUser(claims)
+    # Deleted or deactivated since the token was issued
+    snapshot = user._snapshot()
+    if snapshot is None or not snapshot.is_active:
+        return None
+    return user
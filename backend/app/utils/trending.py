@@ -0,0 +1,93 @@
+import math
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import bindparam, select, update
+from app import db
+from app.models import Resource, ResourceDownload, ResourceListing
+
+# Scores are measured from a fixed landmark rather than from "now": each
+# download adds exp((t - LANDMARK) / tau), which is the usual decayed
+# weight exp((t - now) / tau) scaled by a factor shared by every resource.
+# Orderings are therefore the same as with true decay, but a download's
+# contribution never changes, so scores only ever need adding to. They are
+# kept as logarithms, log(sum of weights), to stay finite. Every download is
+# after the landmark, so any downloaded resource scores above 0, and 0
+# means "never downloaded".
+LANDMARK = datetime(2020, 1, 1)
+
+
+def _tau():
+    return current_app.config['TRENDING_HALF_LIFE'].total_seconds() / math.log(2)
+
+
+def _log_weight(download_date, tau):
+    return (download_date - LANDMARK).total_seconds() / tau
+
+
+def _log_add(a, b):
+    hi, lo = max(a, b), min(a, b)
+    return hi + math.log1p(math.exp(lo - hi))
+
+
+def add_downloads(start, end):
+    """Add the downloads with ids in (start, end] to the trending scores.
+
+    Called by the download rollup, in the transaction that moves its
+    watermark, so each download is added exactly once.
+    """
+    tau = _tau()
+    added = {}
+    rows = db.session.execute(
+        select(ResourceDownload.resource_id, ResourceDownload.download_date)
+        .where(ResourceDownload.id > start, ResourceDownload.id <= end)
+    )
+    for resource_id, download_date in rows:
+        weight = _log_weight(download_date, tau)
+        current = added.get(resource_id)
+        added[resource_id] = weight if current is None else _log_add(current, weight)
+    if not added:
+        return
+
+    current_scores = dict(db.session.execute(
+        select(Resource.id, Resource.trending_score).where(Resource.id.in_(list(added)))
+    ).all())
+    scores = []
+    for resource_id, weight in added.items():
+        if resource_id not in current_scores:
+            continue  # deleted since
+        score = current_scores[resource_id] or 0.0
+        scores.append({'rid': resource_id, 'score': weight if score <= 0 else _log_add(score, weight)})
+    _store(scores)
+
+
+def _store(scores):
+    if not scores:
+        return
+    # Core executemany: no version bump, no ORM events
+    for model in (Resource, ResourceListing):
+        db.session.execute(
+            update(model.__table__)
+            .where(model.__table__.c.id == bindparam('rid'))
+            .values(trending_score=bindparam('score')),
+            scores
+        )
+
+
+def rebuild_scores(through_id, batch_size=10000):
+    """Recompute every score from the raw log, up to ``through_id``.
+
+    For backfills; pass the rollup watermark so the next rollup carries on
+    from there. Downloads already pruned from the log are not counted, but
+    their weight has decayed to almost nothing by then. Returns the number
+    of downloads read.
+    """
+    db.session.execute(update(Resource.__table__).values(trending_score=0.0))
+    db.session.execute(update(ResourceListing.__table__).values(trending_score=0.0))
+    start = (db.session.scalar(select(db.func.min(ResourceDownload.id))) or 1) - 1
+    while start < through_id:
+        end = min(start + batch_size, through_id)
+        add_downloads(start, end)
+        start = end
+    read = db.session.scalar(select(db.func.count(ResourceDownload.id)).where(ResourceDownload.id <= through_id))
+    db.session.commit()
+    return read
@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from flask import current_app
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows development machines
+    fcntl = None
+
+# Read/write granularity when moving request bodies to disk
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class UploadBusy(Exception):
+    pass
+
+
+def staging_folder():
+    folder = current_app.config.get('UPLOAD_STAGING_FOLDER') or \
+        os.path.join(current_app.config['UPLOAD_FOLDER'], '.staging')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def staging_path(upload_id):
+    return os.path.join(staging_folder(), f'{upload_id}.part')
+
+
+def staging_key(upload_id):
+    """Storage key a direct-to-storage upload is PUT to before finalize."""
+    return f'staging/{upload_id}'
+
+
+@contextmanager
+def open_for_append(path):
+    """Open a staged upload for appending, holding an exclusive lock.
+
+    Two workers writing the same upload at once would interleave bytes, so a
+    second writer gets ``UploadBusy`` instead of waiting.
+    """
+    with open(path, 'ab') as f:
+        if fcntl is not None:
+            try:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                raise UploadBusy()
+        yield f
+
+
+def copy_stream(src, dst, hasher=None, limit=None):
+    """Copy ``src`` into the open file ``dst`` buffer by buffer.
+
+    Returns the number of bytes written. ``hasher`` is updated with every
+    buffer as it passes through, and ``UploadTooLarge`` is raised as soon as
+    more than ``limit`` bytes arrive (whatever was written stays on disk).
+    """
+    written = 0
+    while True:
+        buf = src.read(STREAM_BUFFER_SIZE)
+        if not buf:
+            break
+        if limit is not None and written + len(buf) > limit:
+            raise UploadTooLarge()
+        dst.write(buf)
+        if hasher is not None:
+            hasher.update(buf)
+        written += len(buf)
+    return written
+
+
+def save_stream(src, path, limit=None):
+    """Write ``src`` to ``path``; returns ``(size, sha256 hexdigest)``."""
+    hasher = hashlib.sha256()
+    with open(path, 'wb') as dst:
+        size = copy_stream(src, dst, hasher, limit)
+    return size, hasher.hexdigest()
+
+
+def hash_file(path, hasher=None):
+    hasher = hasher or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for buf in iter(lambda: f.read(STREAM_BUFFER_SIZE), b''):
+            hasher.update(buf)
+    return hasher
+
+
+class ChunkHasher:
+    """Running SHA-256 state for in-progress chunked uploads.
+
+    Chunks are hashed as they are streamed to disk. The state only lives in
+    this process, so when a chunk lands on a different worker (or after a
+    restart) the digest is rebuilt once from the staged bytes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._states = {}  # upload_id -> (offset, hasher)
+
+    def get(self, upload_id, path, offset):
+        with self._lock:
+            state = self._states.pop(upload_id, None)
+        if state and state[0] == offset:
+            return state[1]
+        hasher = hashlib.sha256()
+        if offset:
+            hash_file(path, hasher)
+        return hasher
+
+    def put(self, upload_id, offset, hasher):
+        with self._lock:
+            self._states[upload_id] = (offset, hasher)
+
+    def discard(self, upload_id):
+        with self._lock:
+            self._states.pop(upload_id, None)
+
+
+chunk_hasher = ChunkHasher()
@@ -0,0 +1,118 @@
+import threading
+import time
+from flask import current_app
+from flask_login import UserMixin
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Lecturer, Student, User
+
+_PENDING_KEY = 'user_cache_invalidate'
+
+
+class ProfileSnapshot:
+    """Read-only copy of a student or lecturer profile's columns."""
+
+    def __init__(self, profile):
+        for attr in inspect(profile).mapper.column_attrs:
+            setattr(self, attr.key, getattr(profile, attr.key))
+
+
+class CachedUser(UserMixin):
+    """Detached snapshot of a ``User`` and its profile, used as ``current_user``.
+
+    Carries the same attributes routes read from ``current_user`` (profiles
+    included) but is not bound to a session, so it can be shared between
+    requests. Load the ``User`` row when something has to be changed.
+    """
+
+    def __init__(self, user):
+        self.id = user.id
+        self.username = user.username
+        self.email = user.email
+        self.role = user.role
+        self.created_at = user.created_at
+        self.last_login = user.last_login
+        self._active = user.is_active
+        self.student_profile = ProfileSnapshot(user.student_profile) if user.student_profile else None
+        self.lecturer_profile = ProfileSnapshot(user.lecturer_profile) if user.lecturer_profile else None
+
+    @property
+    def is_active(self):
+        return bool(self._active)
+
+    def __repr__(self):
+        return f'<CachedUser {self.username} ({self.role.value})>'
+
+
+class UserCache:
+    """Per-process cache of ``CachedUser`` snapshots for ``USER_CACHE_TTL`` seconds.
+
+    Committing a change to a user or profile row drops that user's entry, so
+    this process sees it on the next request. Other processes see it once
+    their entry expires. Bulk ``query.update()`` calls skip the ORM events and
+    should call ``invalidate`` themselves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = {}  # user id -> (expires_at, CachedUser)
+        self._generation = 0
+
+    def get(self, user_id):
+        ttl = current_app.config['USER_CACHE_TTL']
+        now = time.monotonic()
+        with self._lock:
+            hit = self._users.get(user_id)
+            generation = self._generation
+        if hit and hit[0] > now:
+            return hit[1]
+
+        user = db.session.get(User, user_id)
+        if user is None:
+            return None
+        snapshot = CachedUser(user)
+        with self._lock:
+            # An invalidation while we were loading may mean we read old data
+            if ttl > 0 and generation == self._generation:
+                self._users[user_id] = (now + ttl, snapshot)
+        return snapshot
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._users.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._users.clear()
+
+
+user_cache = UserCache()
+
+
+def _user_id(target):
+    return target.id if isinstance(target, User) else target.user_id
+
+
+def _mark_changed(mapper, connection, target):
+    Session.object_session(target).info.setdefault(_PENDING_KEY, set()).add(_user_id(target))
+
+
+for model in (User, Student, Lecturer):
+    event.listen(model, 'after_update', _mark_changed)
+    event.listen(model, 'after_delete', _mark_changed)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_committed(session):
+    user_ids = session.info.pop(_PENDING_KEY, None)
+    if user_ids:
+        user_cache.invalidate(*user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
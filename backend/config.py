@@ -6,5 +6,101 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///university_resource.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app', 'static', 'uploads')
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
+    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max request body (single-shot uploads and each chunk)
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
+    # Proxies in front of the app (e.g. 1 for nginx) whose X-Forwarded-For and
+    # X-Forwarded-Proto are trusted; 0 uses the connecting address as the client's
+    TRUSTED_PROXY_HOPS = int(os.environ.get('TRUSTED_PROXY_HOPS') or 0)
+    
+    # File storage: 'local' (UPLOAD_FOLDER) or 's3' (any S3-compatible store, e.g. MinIO)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND') or 'local'
+    S3_BUCKET = os.environ.get('S3_BUCKET')
+    S3_KEY_PREFIX = os.environ.get('S3_KEY_PREFIX') or ''
+    S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL')  # e.g. http://localhost:9000 for MinIO
+    S3_REGION = os.environ.get('S3_REGION')
+    S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID')
+    S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY')
+    STORAGE_PRESIGN_EXPIRES = 600  # seconds presigned upload/download URLs stay valid
+    # Blobs are spread over nested directories named after leading hash characters,
+    # e.g. blobs/ab/cd/abcd... for depth 2, width 2 (run `flask blobs migrate-layout` after changing)
+    STORAGE_SHARD_DEPTH = 2
+    STORAGE_SHARD_WIDTH = 2
+    # `flask blobs gc` deletes stored files with no row once they are this old
+    # (uploads store the file just before their transaction commits)
+    BLOB_ORPHAN_GRACE = timedelta(hours=1)
+    
+    # Chunked uploads
+    UPLOAD_STAGING_FOLDER = os.environ.get('UPLOAD_STAGING_FOLDER')  # defaults to UPLOAD_FOLDER/.staging
+    UPLOAD_MAX_FILE_SIZE = int(os.environ.get('UPLOAD_MAX_FILE_SIZE') or 256 * 1024 * 1024)  # 256MB per file
+    UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024  # suggested chunk size returned to clients
+    UPLOAD_SESSION_LIFETIME = timedelta(hours=24)
+    
+    # Password hashing, as werkzeug method strings with every parameter spelled out
+    # ('scrypt:N:r:p' or 'pbkdf2:sha256:iterations'). Hashes made with other
+    # parameters are replaced on the user's next successful login.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    
+    # Failed-login throttling (sliding window), checked before any password hashing
+    LOGIN_LIMIT_ENABLED = True
+    LOGIN_LIMIT_WINDOW = 300  # seconds
+    LOGIN_LIMIT_PER_IP = 20  # failed attempts per client IP per window
+    LOGIN_LIMIT_PER_USERNAME = 5  # failed attempts per username per window
+    LOGIN_LIMIT_STORAGE = os.environ.get('LOGIN_LIMIT_STORAGE') or 'memory'  # or redis://host:6379/0 to share across workers
+    
+    # Bearer tokens for the JSON API (POST /api/auth/token), alongside cookie sessions
+    AUTH_TOKENS_ENABLED = os.environ.get('AUTH_TOKENS_ENABLED', '').lower() in ('1', 'true', 'yes')
+    AUTH_TOKEN_SECRET = os.environ.get('AUTH_TOKEN_SECRET')  # defaults to SECRET_KEY
+    AUTH_ACCESS_TOKEN_LIFETIME = timedelta(minutes=15)  # role/can_upload changes apply after at most this long
+    AUTH_REFRESH_TOKEN_LIFETIME = timedelta(days=7)
+    
+    # Logged-in user snapshots (see app/utils/user_cache.py); 0 disables caching
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 30)
+    
+    # Encode JSON responses with orjson when it is installed
+    JSON_FAST_ENCODER = os.environ.get('JSON_FAST_ENCODER', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Rows read per query by the streaming exports under /api/exports
+    EXPORT_BATCH_SIZE = 1000
+    
+    # Live updates, GET /api/events (see app/utils/events.py)
+    EVENTS_BACKEND = os.environ.get('EVENTS_BACKEND') or 'local'  # or redis://host:6379/0 to reach every worker
+    EVENTS_HEARTBEAT = 15  # seconds between keep-alive comments
+    EVENTS_STREAM_MAX_AGE = 300  # seconds before a stream ends and the client reconnects
+    EVENTS_RETRY_MS = 3000  # reconnect delay suggested to clients
+    EVENTS_QUEUE_SIZE = 100  # undelivered events per client before it is dropped
+    EVENTS_HISTORY_SIZE = 50  # recent events kept per channel for Last-Event-ID replay
+    
+    # Lecturer review
+    REVIEW_BATCH_MAX_ITEMS = 500  # resources per POST /api/lecturer/review/batch
+    REVIEW_LEASE_DURATION = timedelta(minutes=15)  # claimed items return to the queue after this
+    REVIEW_CLAIM_DEFAULT = 10
+    REVIEW_CLAIM_MAX = 50
+    
+    # Listings
+    PAGINATION_COUNT_CACHE_TTL = 60  # seconds a cursor-mode total is reused
+    CATALOGUE_CACHE_TTL = int(os.environ.get('CATALOGUE_CACHE_TTL') or 30)  # seconds; 0 disables (see app/utils/catalogue_cache.py)
+    CATALOGUE_CACHE_SIZE = 1000  # cached listing pages per process
+    SUGGEST_REFRESH_SECONDS = int(os.environ.get('SUGGEST_REFRESH_SECONDS') or 300)  # other workers' changes reach /suggest within this (see app/utils/suggest.py)
+    SUGGEST_MAX_RESULTS = 20
+    FACET_SCAN_LIMIT = 10000  # search matches aggregated for browse facets (see app/utils/facets.py)
+    
+    # Download logging (write-behind, see app/utils/download_log.py)
+    DOWNLOAD_LOG_BUFFERED = True
+    DOWNLOAD_LOG_BATCH_SIZE = 200  # flush early once this many events are waiting
+    DOWNLOAD_LOG_FLUSH_INTERVAL = 5.0  # seconds
+    DOWNLOAD_LOG_JOURNAL_DIR = os.environ.get('DOWNLOAD_LOG_JOURNAL_DIR')  # unset = memory only
+    DOWNLOAD_LOG_MAX_RETRIES = 5  # failed flushes before a batch is written row by row and bad rows are dead-lettered
+    # Daily rollups and retention (flask downloads rollup / prune, see app/utils/download_stats.py)
+    DOWNLOAD_ROLLUP_BATCH_SIZE = 10000  # raw rows per rollup transaction
+    DOWNLOAD_LOG_RETENTION_DAYS = int(os.environ.get('DOWNLOAD_LOG_RETENTION_DAYS') or 0)  # 0 keeps raw rows forever
+    DOWNLOAD_LOG_ARCHIVE_DIR = os.environ.get('DOWNLOAD_LOG_ARCHIVE_DIR')  # pruned rows are gzipped here first; unset = just delete
+    STATS_MAX_DAYS = 366
+    TRENDING_HALF_LIFE = timedelta(days=3)  # a download counts half as much for sort=trending after this long
+    
+    # Download offloading: None (Flask streams the file), 'x-accel-redirect' (nginx) or 'x-sendfile'
+    DOWNLOAD_OFFLOAD = os.environ.get('DOWNLOAD_OFFLOAD')
+    DOWNLOAD_ACCEL_PREFIX = os.environ.get('DOWNLOAD_ACCEL_PREFIX') or '/protected-uploads/'  # nginx internal location for UPLOAD_FOLDER
+    # Signed links, validated by the static file server (nginx secure_link) without calling the app
+    DOWNLOAD_SIGNING_KEY = os.environ.get('DOWNLOAD_SIGNING_KEY')  # unset disables /download/<id>/link
+    DOWNLOAD_SIGNED_URL_BASE = os.environ.get('DOWNLOAD_SIGNED_URL_BASE') or '/files/'
+    DOWNLOAD_LINK_LIFETIME = timedelta(minutes=10)
@@ -0,0 +1,134 @@
+"""Baseline schema: users, profiles, categories, resources and downloads
+
+Revision ID: 1c0e5d7a9f42
+Revises:
+Create Date: 2026-10-18 11:00:00
+
+The tables as they were before the app had migrations, so ``flask db
+upgrade`` can build a database from nothing. Databases created with
+``db.create_all()`` already have them; tables that exist are skipped, and
+later revisions bring them up to date.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c0e5d7a9f42'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# In dependency order; downgrade drops them in reverse
+TABLES = ['users', 'students', 'lecturers', 'categories', 'resources', 'resource_downloads']
+
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('username', sa.String(length=64), nullable=False),
+            sa.Column('email', sa.String(length=120), nullable=False),
+            sa.Column('password_hash', sa.String(length=128), nullable=False),
+            sa.Column('role', sa.Enum('student', 'lecturer', name='userrole'), nullable=False),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+            sa.Column('last_login', sa.DateTime(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+        )
+        op.create_index('ix_users_username', 'users', ['username'], unique=True)
+        op.create_index('ix_users_email', 'users', ['email'], unique=True)
+
+    if 'students' not in existing:
+        op.create_table(
+            'students',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False, unique=True),
+            sa.Column('full_name', sa.String(length=100), nullable=False),
+            sa.Column('registration_number', sa.String(length=50), nullable=False),
+            sa.Column('academic_year', sa.Integer(), nullable=False),
+            sa.Column('faculty', sa.String(length=100), nullable=False),
+            sa.Column('department', sa.String(length=100), nullable=False),
+            sa.Column('contact_number', sa.String(length=20), nullable=True),
+            sa.Column('enrolled_date', sa.Date(), nullable=False),
+            sa.Column('can_upload', sa.Boolean(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_students_registration_number', 'students', ['registration_number'], unique=True)
+
+    if 'lecturers' not in existing:
+        position = sa.Enum(
+            'professor', 'senior_lecturer', 'lecturer', 'assistant_lecturer', 'visiting_lecturer',
+            name='lecturerposition'
+        )
+        op.create_table(
+            'lecturers',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False, unique=True),
+            sa.Column('full_name', sa.String(length=100), nullable=False),
+            sa.Column('employee_id', sa.String(length=50), nullable=False),
+            sa.Column('department', sa.String(length=100), nullable=False),
+            sa.Column('position', position, nullable=False),
+            sa.Column('office_location', sa.String(length=100), nullable=True),
+            sa.Column('contact_number', sa.String(length=20), nullable=True),
+            sa.Column('joined_date', sa.Date(), nullable=False),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_lecturers_employee_id', 'lecturers', ['employee_id'], unique=True)
+
+    if 'categories' not in existing:
+        op.create_table(
+            'categories',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(length=100), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('is_active', sa.Boolean(), nullable=True),
+            sa.Column('created_at', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_categories_name', 'categories', ['name'], unique=True)
+
+    if 'resources' not in existing:
+        op.create_table(
+            'resources',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('title', sa.String(length=200), nullable=False),
+            sa.Column('description', sa.Text(), nullable=True),
+            sa.Column('file_path', sa.String(length=500), nullable=False),
+            sa.Column('file_name', sa.String(length=255), nullable=False),
+            sa.Column('file_type', sa.String(length=50), nullable=False),
+            sa.Column('file_size', sa.Integer(), nullable=False),
+            sa.Column('upload_date', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+            sa.Column('status', sa.Enum('pending', 'approved', 'rejected', name='resourcestatus'), nullable=False),
+            sa.Column('download_count', sa.Integer(), nullable=True),
+            sa.Column('category_id', sa.Integer(), sa.ForeignKey('categories.id'), nullable=False),
+            sa.Column('uploaded_by_student_id', sa.Integer(), sa.ForeignKey('students.id'), nullable=False),
+            sa.Column('reviewed_by_lecturer_id', sa.Integer(), sa.ForeignKey('lecturers.id'), nullable=True),
+            sa.Column('review_date', sa.DateTime(), nullable=True),
+            sa.Column('review_comments', sa.Text(), nullable=True),
+            sa.Column('rejection_reason', sa.Text(), nullable=True),
+        )
+        op.create_index('ix_resources_title', 'resources', ['title'])
+
+    if 'resource_downloads' not in existing:
+        op.create_table(
+            'resource_downloads',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('resource_id', sa.Integer(), sa.ForeignKey('resources.id'), nullable=False),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id'), nullable=False),
+            sa.Column('download_date', sa.DateTime(), server_default=sa.func.now(), nullable=True),
+            sa.Column('ip_address', sa.String(length=45), nullable=True),
+        )
+
+
+def downgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    for table in reversed(TABLES):
+        if table in existing:
+            op.drop_table(table)
+    if op.get_bind().dialect.name == 'postgresql':
+        for name in ('resourcestatus', 'lecturerposition', 'userrole'):
+            op.execute(f'DROP TYPE IF EXISTS {name}')
@@ -0,0 +1,64 @@
+"""Composite indexes for resource listings and download logs
+
+Revision ID: 6b2f0c4e9a31
+Revises: 1c0e5d7a9f42
+Create Date: 2026-10-18 11:20:00
+
+Databases created with ``db.create_all()`` may already have some of these
+indexes, so each one is only created when missing. On PostgreSQL they are
+built CONCURRENTLY so listings keep working while the migration runs.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6b2f0c4e9a31'
+down_revision = '1c0e5d7a9f42'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_resources_status_upload_date', 'resources', ['status', 'upload_date', 'id']),
+    ('ix_resources_status_category_upload_date', 'resources', ['status', 'category_id', 'upload_date', 'id']),
+    ('ix_resources_student_upload_date', 'resources', ['uploaded_by_student_id', 'upload_date', 'id']),
+    ('ix_resources_reviewer_review_date', 'resources', ['reviewed_by_lecturer_id', 'review_date']),
+    ('ix_resource_downloads_resource_date', 'resource_downloads', ['resource_id', 'download_date']),
+    ('ix_resource_downloads_user_date', 'resource_downloads', ['user_id', 'download_date']),
+]
+
+
+def _existing_indexes():
+    inspector = sa.inspect(op.get_bind())
+    tables = set(inspector.get_table_names())
+    return tables, {
+        (table, index['name'])
+        for table in {table for _, table, _ in INDEXES} & tables
+        for index in inspector.get_indexes(table)
+    }
+
+
+def upgrade():
+    tables, existing = _existing_indexes()
+    missing = [
+        (name, table, columns) for name, table, columns in INDEXES
+        if table in tables and (table, name) not in existing
+    ]
+    if not missing:
+        return
+
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+        with op.get_context().autocommit_block():
+            for name, table, columns in missing:
+                op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in missing:
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    tables, existing = _existing_indexes()
+    for name, table, _ in reversed(INDEXES):
+        if (table, name) in existing:
+            op.drop_index(name, table_name=table)
@@ -0,0 +1,48 @@
+"""Review queue leases and optimistic version column on resources
+
+Revision ID: 9d41e7a2c5b8
+Revises: 6b2f0c4e9a31
+Create Date: 2026-10-18 12:05:00
+
+Columns that already exist (databases created with ``db.create_all()``)
+are left alone. Existing rows start at version 1.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d41e7a2c5b8'
+down_revision = '6b2f0c4e9a31'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('resources')}
+
+
+def upgrade():
+    existing = _columns()
+    # batch mode recreates the table on SQLite, which cannot add foreign keys in place
+    with op.batch_alter_table('resources') as batch_op:
+        if 'claimed_by_lecturer_id' not in existing:
+            batch_op.add_column(sa.Column('claimed_by_lecturer_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_resources_claimed_by_lecturer_id', 'lecturers', ['claimed_by_lecturer_id'], ['id'])
+            batch_op.create_index('ix_resources_claimed_by_lecturer_id', ['claimed_by_lecturer_id'])
+        if 'claim_expires_at' not in existing:
+            batch_op.add_column(sa.Column('claim_expires_at', sa.DateTime(), nullable=True))
+        if 'version' not in existing:
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade():
+    existing = _columns()
+    with op.batch_alter_table('resources') as batch_op:
+        if 'claimed_by_lecturer_id' in existing:
+            batch_op.drop_index('ix_resources_claimed_by_lecturer_id')
+            batch_op.drop_column('claimed_by_lecturer_id')
+        if 'claim_expires_at' in existing:
+            batch_op.drop_column('claim_expires_at')
+        if 'version' in existing:
+            batch_op.drop_column('version')
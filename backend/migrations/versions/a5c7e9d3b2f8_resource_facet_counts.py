@@ -0,0 +1,58 @@
+"""resource_facet_counts counters for browse facets
+
+Revision ID: a5c7e9d3b2f8
+Revises: f4d2a8b6c1e9
+Create Date: 2026-10-18 15:20:00
+
+Creates the table (unless ``db.create_all()`` already did) and fills it
+from resource_listing. ``flask listings rebuild`` refills it as well.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5c7e9d3b2f8'
+down_revision = 'f4d2a8b6c1e9'
+branch_labels = None
+depends_on = None
+
+listing = sa.table(
+    'resource_listing',
+    sa.column('category_id', sa.Integer),
+    sa.column('file_type', sa.String),
+    sa.column('upload_date', sa.DateTime),
+    sa.column('status', sa.String),
+)
+counts = sa.table(
+    'resource_facet_counts',
+    sa.column('category_id', sa.Integer),
+    sa.column('file_type', sa.String),
+    sa.column('year', sa.Integer),
+    sa.column('resources', sa.Integer),
+)
+
+
+def upgrade():
+    if 'resource_facet_counts' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table(
+            'resource_facet_counts',
+            sa.Column('category_id', sa.Integer(), primary_key=True),
+            sa.Column('file_type', sa.String(length=50), primary_key=True),
+            sa.Column('year', sa.Integer(), primary_key=True),
+            sa.Column('resources', sa.Integer(), nullable=False),
+        )
+
+    year = sa.func.coalesce(sa.extract('year', listing.c.upload_date), 0)
+    op.execute(sa.delete(counts))
+    op.execute(sa.insert(counts).from_select(
+        ['category_id', 'file_type', 'year', 'resources'],
+        sa.select(listing.c.category_id, listing.c.file_type, year, sa.func.count())
+        .where(listing.c.status == 'approved')
+        .group_by(listing.c.category_id, listing.c.file_type, year)
+    ))
+
+
+def downgrade():
+    if 'resource_facet_counts' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('resource_facet_counts')
@@ -0,0 +1,46 @@
+"""widen users.password_hash to 256 characters
+
+Revision ID: a9c1e3f5b7d2
+Revises: e2a4c6b8d0f3
+Create Date: 2026-10-19 12:00:00
+
+scrypt hashes (the default PASSWORD_HASH_METHOD) are about 160 characters,
+more than the original String(128) holds on PostgreSQL.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c1e3f5b7d2'
+down_revision = 'e2a4c6b8d0f3'
+branch_labels = None
+depends_on = None
+
+
+def _length():
+    columns = {column['name']: column for column in sa.inspect(op.get_bind()).get_columns('users')}
+    return getattr(columns['password_hash']['type'], 'length', None)
+
+
+def _resize(old, new):
+    # batch mode recreates the table on SQLite, which cannot alter columns in place
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.alter_column(
+            'password_hash',
+            existing_type=sa.String(length=old),
+            type_=sa.String(length=new),
+            existing_nullable=False
+        )
+
+
+def upgrade():
+    length = _length()
+    if length is not None and length < 256:
+        _resize(length, 256)
+
+
+def downgrade():
+    # Fails on PostgreSQL while any stored hash is longer than 128 characters
+    if _length() == 256:
+        _resize(256, 128)
@@ -0,0 +1,36 @@
+"""users.token_version for refresh tokens
+
+Revision ID: b3d5f7a9c1e4
+Revises: a9c1e3f5b7d2
+Create Date: 2026-10-20 09:00:00
+
+Refresh tokens used to carry a hash of password_hash, so upgrading a hash
+on login voided them. They now carry token_version, which only a password
+change bumps. Refresh tokens issued before this revision are refused once;
+users sign in again.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3d5f7a9c1e4'
+down_revision = 'a9c1e3f5b7d2'
+branch_labels = None
+depends_on = None
+
+
+def _columns():
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns('users')}
+
+
+def upgrade():
+    if 'token_version' not in _columns():
+        op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    if 'token_version' in _columns():
+        # batch mode recreates the table on SQLite, which cannot drop columns in place
+        with op.batch_alter_table('users') as batch_op:
+            batch_op.drop_column('token_version')
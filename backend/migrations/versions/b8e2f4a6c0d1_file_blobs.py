@@ -0,0 +1,53 @@
+"""Content-addressed file_blobs table and resources.blob_id
+
+Revision ID: b8e2f4a6c0d1
+Revises: a5c7e9d3b2f8
+Create Date: 2026-10-19 09:00:00
+
+Existing resources keep ``blob_id`` NULL and are served from
+``file_path`` as before. ``flask blobs migrate-layout`` hashes them and
+moves them into the blob store.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8e2f4a6c0d1'
+down_revision = 'a5c7e9d3b2f8'
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    if 'file_blobs' not in _inspector().get_table_names():
+        op.create_table(
+            'file_blobs',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('sha256', sa.String(length=64), nullable=False),
+            sa.Column('size', sa.Integer(), nullable=False),
+            sa.Column('path', sa.String(length=500), nullable=False),
+            sa.Column('ref_count', sa.Integer(), nullable=False),
+            sa.Column('created_at', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_file_blobs_sha256', 'file_blobs', ['sha256'], unique=True)
+
+    if 'blob_id' not in {column['name'] for column in _inspector().get_columns('resources')}:
+        # batch mode recreates the table on SQLite, which cannot add foreign keys in place
+        with op.batch_alter_table('resources') as batch_op:
+            batch_op.add_column(sa.Column('blob_id', sa.Integer(), nullable=True))
+            batch_op.create_foreign_key('fk_resources_blob_id', 'file_blobs', ['blob_id'], ['id'])
+            batch_op.create_index('ix_resources_blob_id', ['blob_id'])
+
+
+def downgrade():
+    if 'blob_id' in {column['name'] for column in _inspector().get_columns('resources')}:
+        with op.batch_alter_table('resources') as batch_op:
+            batch_op.drop_index('ix_resources_blob_id')
+            batch_op.drop_column('blob_id')
+    if 'file_blobs' in _inspector().get_table_names():
+        op.drop_table('file_blobs')
@@ -0,0 +1,93 @@
+"""resource_listing read table for listings
+
+Revision ID: c3a8e5f1d2b7
+Revises: 9d41e7a2c5b8
+Create Date: 2026-10-18 13:10:00
+
+Creates the table (unless ``db.create_all()`` already did) and fills it
+from the current resources. ``flask listings rebuild`` does the same fill
+later if the table ever needs repairing.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a8e5f1d2b7'
+down_revision = '9d41e7a2c5b8'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_resource_listing_status_upload_date', ['status', 'upload_date', 'id']),
+    ('ix_resource_listing_status_category_upload_date', ['status', 'category_id', 'upload_date', 'id']),
+    ('ix_resource_listing_student_upload_date', ['student_id', 'upload_date', 'id']),
+    ('ix_resource_listing_reviewer_review_date', ['reviewed_by_lecturer_id', 'review_date']),
+]
+
+BACKFILL = """
+INSERT INTO resource_listing (
+    id, title, description, file_name, file_type, file_size, upload_date, status,
+    download_count, category_id, category_name, student_id, uploader_name,
+    uploader_registration_number, reviewed_by_lecturer_id, review_date, review_comments,
+    rejection_reason
+)
+SELECT
+    r.id, r.title, r.description, r.file_name, r.file_type, r.file_size, r.upload_date, r.status,
+    r.download_count, r.category_id, c.name, r.uploaded_by_student_id, s.full_name,
+    s.registration_number, r.reviewed_by_lecturer_id, r.review_date, r.review_comments,
+    r.rejection_reason
+FROM resources r
+LEFT JOIN categories c ON c.id = r.category_id
+LEFT JOIN students s ON s.id = r.uploaded_by_student_id
+"""
+
+POSTGRES_SEARCH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_resource_listing_search ON resource_listing USING gin "
+    "(to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '')))"
+)
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'resource_listing' in sa.inspect(bind).get_table_names():
+        return
+
+    # The enum type already exists on PostgreSQL, created with resources
+    status = sa.Enum('pending', 'approved', 'rejected', name='resourcestatus').with_variant(
+        postgresql.ENUM('pending', 'approved', 'rejected', name='resourcestatus', create_type=False),
+        'postgresql'
+    )
+    op.create_table(
+        'resource_listing',
+        sa.Column('id', sa.Integer(), sa.ForeignKey('resources.id', ondelete='CASCADE'), primary_key=True, autoincrement=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('file_type', sa.String(length=50), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.Column('upload_date', sa.DateTime(), nullable=True),
+        sa.Column('status', status, nullable=False),
+        sa.Column('download_count', sa.Integer(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('category_name', sa.String(length=100), nullable=True),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('uploader_name', sa.String(length=100), nullable=True),
+        sa.Column('uploader_registration_number', sa.String(length=50), nullable=True),
+        sa.Column('reviewed_by_lecturer_id', sa.Integer(), nullable=True),
+        sa.Column('review_date', sa.DateTime(), nullable=True),
+        sa.Column('review_comments', sa.Text(), nullable=True),
+        sa.Column('rejection_reason', sa.Text(), nullable=True),
+    )
+    for name, columns in INDEXES:
+        op.create_index(name, 'resource_listing', columns)
+    if bind.dialect.name == 'postgresql':
+        op.execute(POSTGRES_SEARCH_INDEX)
+
+    op.execute(BACKFILL)
+
+
+def downgrade():
+    if 'resource_listing' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_table('resource_listing')
@@ -0,0 +1,51 @@
+"""upload_sessions table for chunked and direct-to-storage uploads
+
+Revision ID: d1f3a5c7e9b2
+Revises: b8e2f4a6c0d1
+Create Date: 2026-10-19 09:10:00
+
+Creates the table unless ``db.create_all()`` already did.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd1f3a5c7e9b2'
+down_revision = 'b8e2f4a6c0d1'
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    if 'upload_sessions' in _tables():
+        return
+    op.create_table(
+        'upload_sessions',
+        sa.Column('id', sa.String(length=32), primary_key=True),
+        sa.Column('student_id', sa.Integer(), sa.ForeignKey('students.id'), nullable=False),
+        sa.Column('category_id', sa.Integer(), sa.ForeignKey('categories.id'), nullable=False),
+        sa.Column('title', sa.String(length=200), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('file_name', sa.String(length=255), nullable=False),
+        sa.Column('file_type', sa.String(length=50), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.Column('received_size', sa.Integer(), nullable=False),
+        sa.Column('sha256', sa.String(length=64), nullable=True),
+        sa.Column('direct', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('resource_id', sa.Integer(), sa.ForeignKey('resources.id'), nullable=True),
+    )
+    op.create_index('ix_upload_sessions_student_id', 'upload_sessions', ['student_id'])
+
+
+def downgrade():
+    if 'upload_sessions' in _tables():
+        op.drop_table('upload_sessions')
@@ -0,0 +1,71 @@
+"""full-text search index on resources
+
+Revision ID: e2a4c6b8d0f3
+Revises: d1f3a5c7e9b2
+Create Date: 2026-10-19 11:30:00
+
+SQLite: the ``resources_fts`` FTS5 table, the triggers that keep it holding
+exactly the approved resources, and a fill from the existing rows.
+PostgreSQL: the GIN index on the title/description tsvector.
+
+Any later ``batch_alter_table`` on ``resources`` rebuilds the table on SQLite
+and drops the triggers; such a migration has to create them again.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a4c6b8d0f3'
+down_revision = 'd1f3a5c7e9b2'
+branch_labels = None
+depends_on = None
+
+
+# Copies of the DDL in app/models/resource.py, so this revision does not
+# change if the models do
+SQLITE_SEARCH_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS resources_fts "
+    "USING fts5(title, description, tokenize='unicode61 remove_diacritics 2')"
+)
+SQLITE_SEARCH_TRIGGERS = (
+    "CREATE TRIGGER IF NOT EXISTS resources_fts_insert AFTER INSERT ON resources "
+    "WHEN new.status = 'approved' BEGIN "
+    "INSERT INTO resources_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, coalesce(new.description, '')); END",
+    "CREATE TRIGGER IF NOT EXISTS resources_fts_update AFTER UPDATE OF title, description, status ON resources "
+    "BEGIN DELETE FROM resources_fts WHERE rowid = old.id; "
+    "INSERT INTO resources_fts(rowid, title, description) "
+    "SELECT new.id, new.title, coalesce(new.description, '') WHERE new.status = 'approved'; END",
+    "CREATE TRIGGER IF NOT EXISTS resources_fts_delete AFTER DELETE ON resources "
+    "BEGIN DELETE FROM resources_fts WHERE rowid = old.id; END",
+)
+POSTGRES_SEARCH_INDEX = (
+    "CREATE INDEX IF NOT EXISTS ix_resources_search ON resources USING gin "
+    "(to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, '')))"
+)
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute(POSTGRES_SEARCH_INDEX)
+    elif dialect == 'sqlite':
+        op.execute(SQLITE_SEARCH_TABLE)
+        for trigger in SQLITE_SEARCH_TRIGGERS:
+            op.execute(trigger)
+        # Refill: an index built by `flask search rebuild` may be stale
+        op.execute("DELETE FROM resources_fts")
+        op.execute(
+            "INSERT INTO resources_fts(rowid, title, description) "
+            "SELECT id, title, coalesce(description, '') FROM resources WHERE status = 'approved'"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_resources_search")
+    elif dialect == 'sqlite':
+        for name in ('resources_fts_insert', 'resources_fts_update', 'resources_fts_delete'):
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS resources_fts")
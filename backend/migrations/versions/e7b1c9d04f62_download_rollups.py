@@ -0,0 +1,62 @@
+"""Daily download rollup tables
+
+Revision ID: e7b1c9d04f62
+Revises: c3a8e5f1d2b7
+Create Date: 2026-10-18 14:00:00
+
+The tables start empty; ``flask downloads rollup --no-settle`` fills them
+from the existing download log.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b1c9d04f62'
+down_revision = 'c3a8e5f1d2b7'
+branch_labels = None
+depends_on = None
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade():
+    existing = _tables()
+    if 'daily_resource_downloads' not in existing:
+        op.create_table(
+            'daily_resource_downloads',
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('resource_id', sa.Integer(), primary_key=True),
+            sa.Column('downloads', sa.Integer(), nullable=False),
+        )
+    if 'daily_category_downloads' not in existing:
+        op.create_table(
+            'daily_category_downloads',
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('category_id', sa.Integer(), primary_key=True),
+            sa.Column('downloads', sa.Integer(), nullable=False),
+        )
+    if 'daily_user_downloads' not in existing:
+        op.create_table(
+            'daily_user_downloads',
+            sa.Column('user_id', sa.Integer(), primary_key=True),
+            sa.Column('day', sa.Date(), primary_key=True),
+            sa.Column('downloads', sa.Integer(), nullable=False),
+        )
+    if 'download_rollup_state' not in existing:
+        op.create_table(
+            'download_rollup_state',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('last_id', sa.Integer(), nullable=False),
+            sa.Column('horizon_id', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(), nullable=True),
+        )
+
+
+def downgrade():
+    existing = _tables()
+    for table in ('download_rollup_state', 'daily_user_downloads', 'daily_category_downloads', 'daily_resource_downloads'):
+        if table in existing:
+            op.drop_table(table)
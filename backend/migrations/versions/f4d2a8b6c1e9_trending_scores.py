@@ -0,0 +1,52 @@
+"""Trending scores on resources and resource_listing
+
+Revision ID: f4d2a8b6c1e9
+Revises: e7b1c9d04f62
+Create Date: 2026-10-18 14:40:00
+
+Scores start at 0. Run ``flask downloads rollup`` and then
+``flask trending rebuild`` to score the existing download log.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4d2a8b6c1e9'
+down_revision = 'e7b1c9d04f62'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_resource_listing_status_trending', ['status', 'trending_score', 'id']),
+    ('ix_resource_listing_status_downloads', ['status', 'download_count', 'id']),
+]
+
+
+def _columns(table):
+    return {column['name'] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _indexes():
+    return {index['name'] for index in sa.inspect(op.get_bind()).get_indexes('resource_listing')}
+
+
+def upgrade():
+    for table in ('resources', 'resource_listing'):
+        if 'trending_score' not in _columns(table):
+            op.add_column(table, sa.Column('trending_score', sa.Float(), nullable=False, server_default='0'))
+    existing = _indexes()
+    for name, columns in INDEXES:
+        if name not in existing:
+            op.create_index(name, 'resource_listing', columns)
+
+
+def downgrade():
+    existing = _indexes()
+    for name, _ in reversed(INDEXES):
+        if name in existing:
+            op.drop_index(name, table_name='resource_listing')
+    for table in ('resource_listing', 'resources'):
+        if 'trending_score' in _columns(table):
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.drop_column('trending_score')
@@ -0,0 +1,127 @@
+import io
+import os
+from datetime import date
+
+import pytest
+
+from config import Config
+from app import create_app, db
+
+
+class TestConfig(Config):
+    TESTING = True
+    SECRET_KEY = 'test'
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # fast; hashing cost is not under test
+    CATALOGUE_CACHE_TTL = 0
+    USER_CACHE_TTL = 0
+    DOWNLOAD_LOG_BUFFERED = False
+    JSON_FAST_ENCODER = False
+
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+def make_app(tmp_path, **overrides):
+    config = type('Config', (TestConfig,), {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + os.path.join(tmp_path, 'test.db'),
+        'UPLOAD_FOLDER': os.path.join(tmp_path, 'uploads'),
+        **overrides
+    })
+    return create_app(config)
+
+
+def _build(app, schema):
+    # Requests push their own app context; holding one here would share
+    # ``g`` (and so the logged-in user) between test clients
+    with app.app_context():
+        schema()
+        _seed()
+        # Module-level indexes outlive an app; start each test from this database
+        from app.utils.suggest import suggest_index
+        suggest_index.rebuild()
+    return app
+
+
+@pytest.fixture
+def app(tmp_path):
+    return _build(make_app(tmp_path), db.create_all)
+
+
+@pytest.fixture
+def migrated_app(tmp_path):
+    """Like ``app``, but the schema comes from ``flask db upgrade``."""
+    from flask_migrate import upgrade
+    return _build(make_app(tmp_path), lambda: upgrade(directory=MIGRATIONS))
+
+
+@pytest.fixture(params=['app', 'migrated_app'])
+def any_app(request):
+    """Each test runs on a create_all() database and on a migrated one."""
+    return request.getfixturevalue(request.param)
+
+
+@pytest.fixture
+def engine(app):
+    with app.app_context():
+        return db.engine
+
+
+def _seed():
+    from app.models import Category, Lecturer, Student, User
+    from app.models.lecturer import LecturerPosition
+    from app.models.user import UserRole
+
+    db.session.add_all([
+        Category(name='Lecture Notes', description='Class lecture materials and notes'),
+        Category(name='Exams', description='Past exam papers and solutions'),
+    ])
+    for n in (1, 2):
+        user = User(username=f'student{n}', email=f'student{n}@uni.edu', role=UserRole.student)
+        user.set_password('student123')
+        db.session.add(Student(
+            user=user, full_name=f'Student {n}', registration_number=f'STU{n:03d}', academic_year=2,
+            faculty='Engineering', department='Computing', enrolled_date=date(2023, 9, 1), can_upload=True
+        ))
+    user = User(username='lecturer1', email='lecturer1@uni.edu', role=UserRole.lecturer)
+    user.set_password('lecturer123')
+    db.session.add(Lecturer(
+        user=user, full_name='Dr Lecturer', employee_id='EMP001', department='Computing',
+        position=LecturerPosition.professor, joined_date=date(2015, 1, 1)
+    ))
+    db.session.commit()
+
+
+def login(client, username):
+    password = 'lecturer123' if username.startswith('lecturer') else 'student123'
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.get_json()
+    return client
+
+
+@pytest.fixture
+def student(app):
+    return login(app.test_client(), 'student1')
+
+
+@pytest.fixture
+def lecturer(app):
+    return login(app.test_client(), 'lecturer1')
+
+
+def upload(client, title='Notes', category=1, content=None, file_name='notes.pdf', description=None):
+    """Upload a file as ``client``; returns the new resource id."""
+    data = {
+        'title': title,
+        'category': str(category),
+        'file': (io.BytesIO(content if content is not None else title.encode()), file_name),
+    }
+    if description:
+        data['description'] = description
+    response = client.post('/api/resources/upload', data=data, content_type='multipart/form-data')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']['id']
+
+
+def approve(lecturer, *resource_ids):
+    response = lecturer.post('/api/lecturer/review/batch', json={'ids': list(resource_ids), 'action': 'approve'})
+    assert response.status_code == 200, response.get_json()
@@ -0,0 +1,132 @@
+import io
+import os
+import time
+from datetime import timedelta
+
+from app import db
+from app.models import FileBlob, Resource
+from app.storage import get_storage
+from app.utils.file_store import collect_garbage
+from tests.conftest import upload
+
+
+def _blob_files(app):
+    root = os.path.join(app.config['UPLOAD_FOLDER'], 'blobs')
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, files in os.walk(root) for f in files)
+
+
+def test_identical_uploads_share_one_blob(app, student):
+    first = upload(student, 'First', content=b'same bytes')
+    second = upload(student, 'Second', content=b'same bytes')
+    with app.app_context():
+        a, b = db.session.get(Resource, first), db.session.get(Resource, second)
+        assert a.blob_id == b.blob_id
+        assert a.blob.ref_count == 2
+        assert a.storage_key.startswith('blobs/')
+    assert len(_blob_files(app)) == 1
+
+
+def test_gc_removes_unreferenced_blobs(app, student):
+    resource_id = upload(student, 'Temporary', content=b'temporary')
+    with app.app_context():
+        db.session.delete(db.session.get(Resource, resource_id))
+        db.session.commit()
+        assert collect_garbage() == 1
+        assert FileBlob.query.count() == 0
+    assert _blob_files(app) == []
+
+
+def test_gc_sweeps_old_files_without_rows(app, student):
+    upload(student, 'Kept', content=b'kept')
+    with app.app_context():
+        storage = get_storage()
+        for key in ('blobs/aa/bb/orphan-old', 'blobs/aa/bb/orphan-new'):
+            path = storage.local_path(key)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(b'left by a rolled back upload')
+        old = time.time() - app.config['BLOB_ORPHAN_GRACE'].total_seconds() - 60
+        os.utime(storage.local_path('blobs/aa/bb/orphan-old'), (old, old))
+        # The committed upload is older than the grace period too, but has a row
+        kept = FileBlob.query.one().path
+        os.utime(storage.local_path(kept), (old, old))
+
+        assert collect_garbage() == 1
+        assert not storage.exists('blobs/aa/bb/orphan-old')
+        assert storage.exists('blobs/aa/bb/orphan-new')
+        assert storage.exists(kept)
+
+
+def test_failed_upload_leaves_no_row_and_gc_sweeps_its_file(app, student, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError('database went away')
+    monkeypatch.setattr(db.session, 'commit', fail)
+    response = student.post('/api/resources/upload', data={
+        'title': 'Doomed', 'category': '1', 'file': (io.BytesIO(b'doomed'), 'doomed.pdf')
+    }, content_type='multipart/form-data')
+    monkeypatch.undo()
+    assert response.status_code == 500
+
+    [orphan] = _blob_files(app)
+    with app.app_context():
+        assert FileBlob.query.count() == 0
+        app.config['BLOB_ORPHAN_GRACE'] = timedelta(0)
+        time.sleep(0.01)
+        assert collect_garbage() == 1
+    assert _blob_files(app) == []
+
+
+def _unreference(app, resource_id):
+    with app.app_context():
+        db.session.delete(db.session.get(Resource, resource_id))
+        db.session.commit()
+
+
+def test_upload_during_gc_keeps_its_own_copy(app, student):
+    _unreference(app, upload(student, 'Old', content=b'shared bytes'))
+    uploaded = []
+    with app.app_context():
+        storage = get_storage()
+        delete = storage.delete
+
+        def upload_then_delete(key):
+            # The same bytes arrive after GC claimed the blob, before its file goes
+            if not uploaded:
+                uploaded.append(upload(student, 'New', content=b'shared bytes'))
+            delete(key)
+        storage.delete = upload_then_delete
+        try:
+            assert collect_garbage() == 1
+        finally:
+            storage.delete = delete
+
+        resource = db.session.get(Resource, uploaded[0])
+        assert resource.blob.ref_count == 1
+        with storage.open(resource.storage_key) as f:
+            assert f.read() == b'shared bytes'
+    assert len(_blob_files(app)) == 1
+
+
+def test_gc_skips_a_blob_referenced_after_it_looked(app, student):
+    from sqlalchemy import event
+    _unreference(app, upload(student, 'Old', content=b'shared bytes'))
+
+    raced = []
+
+    def concurrent_upload(conn, cursor, statement, *args):
+        # An upload takes a reference, on its own connection, just before GC claims
+        if statement.startswith('UPDATE file_blobs') and not raced:
+            raced.append(statement)
+            with db.engine.begin() as other:
+                other.execute(db.text('UPDATE file_blobs SET ref_count = ref_count + 1'))
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', concurrent_upload)
+        try:
+            assert collect_garbage() == 0
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', concurrent_upload)
+        assert raced
+        blob = FileBlob.query.one()
+        assert blob.ref_count == 1
+        assert get_storage().exists(blob.path)
@@ -0,0 +1,62 @@
+import pytest
+
+from app import db
+from app.models import Category, Student
+from app.utils.catalogue_cache import catalogue_cache
+from app.utils.query_counter import count_queries
+from tests.conftest import _build, approve, make_app, upload
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Per-process cache: start each test without another database's entries
+    catalogue_cache.bump()
+    yield _build(make_app(tmp_path, CATALOGUE_CACHE_TTL=60), db.create_all)
+    catalogue_cache.bump()
+
+
+def _titles(client, query=''):
+    response = client.get('/api/student/browse' + query)
+    assert response.status_code == 200, response.get_json()
+    return [r['title'] for r in response.get_json()['data']['resources']]
+
+
+def test_repeated_browse_is_served_from_cache(app, student, engine):
+    _titles(student)
+    with count_queries(engine) as queries:
+        _titles(student)
+    # Only the user load (the user cache is off in tests) reaches the database
+    assert not [statement for statement in queries.statements if 'FROM users' not in statement]
+
+
+def test_approval_and_rejection_invalidate(app, student, lecturer):
+    resource_id = upload(student, 'Algebra notes')
+    assert _titles(student) == []
+    assert _titles(student, '?search=algebra') == []
+
+    approve(lecturer, resource_id)
+    assert _titles(student) == ['Algebra notes']
+    assert _titles(student, '?search=algebra') == ['Algebra notes']
+
+    response = lecturer.post(f'/api/lecturer/review/{resource_id}', json={'action': 'reject', 'comments': 'Outdated'})
+    assert response.status_code == 200
+    assert _titles(student) == []
+
+
+def test_category_and_uploader_changes_invalidate(app, student, lecturer):
+    approve(lecturer, upload(student, 'Algebra notes'))
+    assert len(student.get('/api/resources/categories').get_json()['data']) == 2
+    assert student.get('/api/student/dashboard').get_json()['data']['recent_resources'][0]['uploader']['full_name'] == 'Student 1'
+
+    with app.app_context():
+        db.session.add(Category(name='Labs', description='Lab sheets'))
+        Student.query.filter_by(registration_number='STU001').one().full_name = 'Renamed'
+        db.session.commit()
+
+    assert len(student.get('/api/resources/categories').get_json()['data']) == 3
+    assert student.get('/api/student/dashboard').get_json()['data']['recent_resources'][0]['uploader']['full_name'] == 'Renamed'
+
+
+def test_bad_parameters_are_not_cached_as_results(app, student):
+    assert student.get('/api/student/browse?cursor=bad').status_code == 400
+    assert student.get('/api/student/browse?cursor=bad').status_code == 400
@@ -0,0 +1,105 @@
+import base64
+import hashlib
+import os
+
+import pytest
+
+from app import db
+from app.models import Resource
+from app.storage import LocalStorage
+from app.utils.uploads import staging_key
+from tests.conftest import login
+
+PAYLOAD = b'direct upload body' * 100
+SHA256 = hashlib.sha256(PAYLOAD).hexdigest()
+
+
+class PresigningStorage(LocalStorage):
+    """Local disk standing in for an object store that checks signed PUTs."""
+
+    keeps_checksums = True
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.checksums = {}
+
+    def presign_upload(self, key, content_length, sha256, expires_in=600):
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        return f'https://store.example/{key}', {'Content-Length': str(content_length), 'x-amz-checksum-sha256': checksum}
+
+    def client_put(self, key, body, headers):
+        # What the store does with a presigned PUT: refuse a body that does not
+        # match the signed headers, record the checksum otherwise
+        assert len(body) == int(headers['Content-Length'])
+        assert base64.b64encode(hashlib.sha256(body).digest()).decode() == headers['x-amz-checksum-sha256']
+        with open(self.local_path(key), 'wb') as f:
+            f.write(body)
+        self.checksums[key] = hashlib.sha256(body).hexdigest()
+
+    def checksum(self, key):
+        return self.checksums.get(key) if self.keeps_checksums else None
+
+    def stream(self, key, chunk_size=64 * 1024):
+        self.streamed = True
+        return super().stream(key, chunk_size)
+
+
+@pytest.fixture
+def storage(app):
+    storage = app.extensions['storage'] = PresigningStorage(app.config['UPLOAD_FOLDER'])
+    os.makedirs(storage.local_path('staging'), exist_ok=True)
+    return storage
+
+
+@pytest.fixture
+def student(app, storage):
+    return login(app.test_client(), 'student1')
+
+
+def _init(client, **extra):
+    return client.post('/api/resources/upload/init', json={
+        'title': 'Direct', 'category': 1, 'file_name': 'direct.pdf', 'file_size': len(PAYLOAD),
+        'direct': True, **extra
+    })
+
+
+def test_direct_upload_needs_a_sha256(student):
+    assert _init(student).status_code == 400
+    assert _init(student, sha256='not-hex').status_code == 400
+
+
+def test_direct_upload_is_verified_by_the_store_checksum(app, student, storage):
+    response = _init(student, sha256=SHA256.upper())
+    assert response.status_code == 201, response.get_json()
+    data = response.get_json()['data']
+    assert data['upload_headers']['Content-Length'] == str(len(PAYLOAD))
+
+    storage.client_put(staging_key(data['upload_id']), PAYLOAD, data['upload_headers'])
+    response = student.post(f"/api/resources/upload/{data['upload_id']}/finalize")
+    assert response.status_code == 200, response.get_json()
+    assert not getattr(storage, 'streamed', False)
+    with app.app_context():
+        resource = db.session.get(Resource, response.get_json()['data']['id'])
+        assert resource.blob.sha256 == SHA256
+
+
+def test_direct_upload_mismatch_is_rejected(app, student, storage):
+    storage.keeps_checksums = False
+    data = _init(student, sha256=hashlib.sha256(b'something else').hexdigest()).get_json()['data']
+    key = staging_key(data['upload_id'])
+    with open(storage.local_path(key), 'wb') as f:  # a store that ignores the signed checksum
+        f.write(PAYLOAD)
+
+    response = student.post(f"/api/resources/upload/{data['upload_id']}/finalize")
+    assert response.status_code == 409, response.get_json()
+    assert storage.streamed
+    assert not storage.exists(key)
+    with app.app_context():
+        assert Resource.query.count() == 0
+
+
+def test_local_storage_cannot_presign(app):
+    client = login(app.test_client(), 'student1')
+    response = _init(client, sha256=SHA256)
+    assert response.status_code == 400
+    assert 'not supported' in response.get_json()['message']
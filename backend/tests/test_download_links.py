@@ -0,0 +1,112 @@
+import base64
+import hashlib
+from urllib.parse import urlsplit
+
+import pytest
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from app import db
+from app.models import ResourceDownload
+from app.utils.signed_urls import raw_query_args, sign_path, signed_values, verify_path
+from tests.conftest import _build, approve, make_app, upload
+
+KEY = 'secret'
+
+
+def test_signature_matches_nginx_secure_link():
+    url, expires = sign_path(KEY, '/files/blobs/ab/cd/abcd', 600, {'r': 3, 'u': 7, 'filename': 'week 1 notes.pdf'}, now=1000)
+    path, _, query = url.partition('?')
+    args = raw_query_args(query)
+    assert args['filename'] == 'week%201%20notes.pdf'
+    # secure_link_md5 "$secure_link_expires$uri$arg_r$arg_u$arg_filename secret"
+    expected = hashlib.md5(f'1600/files/blobs/ab/cd/abcd37week%201%20notes.pdf {KEY}'.encode()).digest()
+    assert args['md5'] == base64.urlsafe_b64encode(expected).decode().rstrip('=')
+    assert verify_path(KEY, path, args, now=1000)
+    assert signed_values(args) == (3, 7, 'week 1 notes.pdf')
+
+
+def test_tampered_or_expired_links_fail():
+    url, _ = sign_path(KEY, '/files/a', 600, {'r': 1, 'u': 1, 'filename': 'a.pdf'}, now=1000)
+    path, _, query = url.partition('?')
+    assert not verify_path(KEY, path, raw_query_args(query.replace('a.pdf', 'a.html')), now=1000)
+    assert not verify_path(KEY, path, raw_query_args(query.replace('u=1', 'u=2')), now=1000)
+    assert not verify_path(KEY, '/files/b', raw_query_args(query), now=1000)
+    assert not verify_path(KEY, path, raw_query_args(query), now=2000)
+
+
+@pytest.fixture
+def app(tmp_path):
+    # No front proxy: the app serves its own signed links
+    return _build(make_app(tmp_path, DOWNLOAD_SIGNING_KEY=KEY, DOWNLOAD_SIGNED_URL_BASE='/api/resources/files/'), db.create_all)
+
+
+@pytest.fixture
+def link(app, student, lecturer):
+    resource_id = upload(student, 'Signals', content=b'0123456789', file_name='signals notes.pdf')
+    approve(lecturer, resource_id)
+    response = student.get(f'/api/resources/download/{resource_id}/link')
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']['url']
+
+
+def _downloads(app):
+    with app.app_context():
+        return ResourceDownload.query.count()
+
+
+def test_issuing_a_link_is_not_a_download(app, link):
+    assert _downloads(app) == 0
+
+
+def test_link_served_by_the_app_counts_once(app, link):
+    client = app.test_client()  # no session: the link is the credential
+    response = client.get(link)
+    assert response.status_code == 200
+    assert response.data == b'0123456789'
+    assert 'signals_notes.pdf' in response.headers['Content-Disposition']
+    assert _downloads(app) == 1
+
+    assert client.get(link, headers={'Range': 'bytes=5-'}).status_code == 206
+    assert _downloads(app) == 1
+
+    assert client.get(link.replace('md5=', 'md5=x')).status_code == 403
+
+
+def test_proxy_reports_served_downloads(app, link):
+    client = app.test_client()
+    response = client.get('/api/resources/download/served', headers={'X-Original-URI': link})
+    assert response.status_code == 204
+    response = client.get('/api/resources/download/served', headers={'X-Original-URI': link, 'Range': 'bytes=5-'})
+    assert response.status_code == 204
+    assert _downloads(app) == 1
+
+    forged = urlsplit(link)._replace(query=urlsplit(link).query.replace('u=', 'u=9')).geturl()
+    assert client.get('/api/resources/download/served', headers={'X-Original-URI': forged}).status_code == 403
+    assert _downloads(app) == 1
+
+
+def test_links_missing_signed_arguments_fail():
+    # Signed as if r, u and filename were empty
+    digest = hashlib.md5(f'1600/files/a {KEY}'.encode()).digest()
+    args = {'expires': '1600', 'md5': base64.urlsafe_b64encode(digest).decode().rstrip('=')}
+    assert not verify_path(KEY, '/files/a', args, now=1000)
+
+
+def _logged_ips(app):
+    with app.app_context():
+        return [row.ip_address for row in ResourceDownload.query.order_by(ResourceDownload.id)]
+
+
+def test_served_downloads_log_the_connecting_address(app, link):
+    client = app.test_client()
+    headers = {'X-Original-URI': link, 'X-Real-IP': '6.6.6.6', 'X-Forwarded-For': '6.6.6.6'}
+    assert client.get('/api/resources/download/served', headers=headers).status_code == 204
+    assert _logged_ips(app) == ['127.0.0.1']
+
+
+def test_served_downloads_log_the_client_behind_a_trusted_proxy(app, link):
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1)  # as TRUSTED_PROXY_HOPS=1 would
+    client = app.test_client()
+    headers = {'X-Original-URI': link, 'X-Forwarded-For': '6.6.6.6, 203.0.113.7'}
+    assert client.get('/api/resources/download/served', headers=headers).status_code == 204
+    assert _logged_ips(app) == ['203.0.113.7']
@@ -0,0 +1,74 @@
+import json
+import os
+
+import pytest
+
+from app import db
+from app.models import Resource, ResourceDownload
+from app.utils.download_log import DEAD_LETTER_FILE, DownloadLog
+from tests.conftest import _build, approve, make_app, upload
+
+
+@pytest.fixture
+def app(tmp_path):
+    return _build(make_app(
+        tmp_path, DOWNLOAD_LOG_BUFFERED=True, DOWNLOAD_LOG_MAX_RETRIES=2,
+        DOWNLOAD_LOG_JOURNAL_DIR=str(tmp_path / 'journal')
+    ), db.create_all)
+
+
+@pytest.fixture
+def log(app, student, lecturer):
+    resource_id = upload(student)
+    approve(lecturer, resource_id)
+    log = DownloadLog(app)
+    log._ensure_flusher = lambda: None  # flushed by hand below
+    log.resource_id = resource_id
+    return log
+
+
+def _downloads(app, log):
+    with app.app_context():
+        return ResourceDownload.query.count(), db.session.get(Resource, log.resource_id).download_count
+
+
+def test_flush_writes_rows_and_counters(app, log):
+    log.record(log.resource_id, 1)
+    log.record(log.resource_id, 2)
+    assert log.flush() == 2
+    assert _downloads(app, log) == (2, 2)
+    assert os.listdir(app.config['DOWNLOAD_LOG_JOURNAL_DIR']) == []
+
+
+def test_bad_rows_are_dead_lettered_after_max_retries(app, log, monkeypatch):
+    write = log._write
+
+    def flaky(events):
+        if any(e['user_id'] == 666 for e in events):
+            raise ValueError('bad row')
+        write(events)
+
+    monkeypatch.setattr(log, '_write', flaky)
+    log.record(log.resource_id, 1)
+    log.record(log.resource_id, 666)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            log.flush()
+    assert _downloads(app, log) == (0, 0)
+
+    assert log.flush() == 1
+    assert _downloads(app, log) == (1, 1)
+    journal_dir = app.config['DOWNLOAD_LOG_JOURNAL_DIR']
+    assert os.listdir(journal_dir) == [DEAD_LETTER_FILE]
+    with open(os.path.join(journal_dir, DEAD_LETTER_FILE)) as f:
+        entries = [json.loads(line) for line in f]
+    assert [(e['user_id'], e['error']) for e in entries] == [(666, 'bad row')]
+
+    # Still failing: stays dead-lettered
+    assert log.retry_dead_letters() == (0, 1)
+    assert os.listdir(journal_dir) == [DEAD_LETTER_FILE]
+
+    monkeypatch.setattr(log, '_write', write)
+    assert log.retry_dead_letters() == (1, 0)
+    assert _downloads(app, log) == (2, 2)
+    assert os.listdir(journal_dir) == []
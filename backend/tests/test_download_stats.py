@@ -0,0 +1,102 @@
+import gzip
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from tests.conftest import approve, upload
+
+
+@pytest.fixture
+def logged(app, student, lecturer):
+    """Three approved resources (two in category 1) and 60 downloads over 30 days."""
+    from app.models import ResourceDownload, User
+    ids = [upload(student, f'Notes {n}', category=1 + n % 2) for n in range(3)]
+    approve(lecturer, *ids)
+    now = datetime.utcnow()
+    with app.app_context():
+        user_id = User.query.filter_by(username='student1').one().id
+        db.session.execute(db.insert(ResourceDownload), [
+            {'resource_id': ids[n % 3], 'user_id': user_id, 'download_date': now - timedelta(days=n % 30)}
+            for n in range(60)
+        ])
+        db.session.commit()
+    return ids
+
+
+def _run(app, *args):
+    result = app.test_cli_runner().invoke(args=['downloads', *args])
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def _total(model):
+    return db.session.scalar(db.select(db.func.sum(model.downloads))) or 0
+
+
+def test_rollup_lags_one_run_unless_told_not_to(app, logged):
+    from app.models import DailyCategoryDownloads, DailyResourceDownloads, DailyUserDownloads
+    assert 'Rolled up 0 download(s).' in _run(app, 'rollup')
+    assert 'Rolled up 60 download(s).' in _run(app, 'rollup')
+    assert 'Rolled up 0 download(s).' in _run(app, 'rollup')
+    with app.app_context():
+        assert _total(DailyResourceDownloads) == _total(DailyCategoryDownloads) == _total(DailyUserDownloads) == 60
+
+
+def test_late_rows_count_on_their_own_day(app, logged):
+    from app.models import DailyResourceDownloads, ResourceDownload
+    _run(app, 'rollup', '--no-settle')
+    old = (datetime.utcnow() - timedelta(days=100)).date()
+    with app.app_context():
+        db.session.add(ResourceDownload(resource_id=logged[0], user_id=1, download_date=datetime.utcnow() - timedelta(days=100)))
+        db.session.commit()
+    assert 'Rolled up 1 download(s).' in _run(app, 'rollup', '--no-settle')
+    with app.app_context():
+        assert DailyResourceDownloads.query.filter_by(day=old).one().downloads == 1
+
+
+def test_stats_endpoints_read_the_rollup(app, student, lecturer, logged):
+    assert student.get('/api/stats/downloads').get_json()['data']['total'] == 0
+    _run(app, 'rollup', '--no-settle')
+
+    data = lecturer.get('/api/stats/downloads?days=7').get_json()['data']
+    assert data['days'] == 7 and data['as_of']
+    assert data['total'] == 14 and len(data['per_day']) == 7
+    assert lecturer.get('/api/stats/downloads?days=1000').get_json()['data']['total'] == 60
+
+    top = lecturer.get('/api/stats/top-resources?limit=2').get_json()['data']['resources']
+    assert [(r['resource_id'], r['downloads']) for r in top] == [(logged[0], 20), (logged[1], 20)]
+
+    categories = lecturer.get('/api/stats/categories').get_json()['data']['categories']
+    assert [(c['name'], c['downloads']) for c in categories] == [('Lecture Notes', 40), ('Exams', 20)]
+
+    mine = student.get('/api/stats/me').get_json()['data']
+    assert sum(d['downloads'] for d in mine['my_downloads']) == 60
+    assert sum(d['downloads'] for d in mine['downloads_of_my_uploads']) == 60
+    assert 'downloads_of_my_uploads' not in lecturer.get('/api/stats/me').get_json()['data']
+
+
+def test_prune_keeps_rows_not_yet_rolled_up(app, logged):
+    from app.models import ResourceDownload
+    assert 'Retention is off' in _run(app, 'prune')
+    assert 'Pruned 0 download row(s)' in _run(app, 'prune', '--days', '5')
+
+    _run(app, 'rollup', '--no-settle')
+    archive = os.path.join(app.config['UPLOAD_FOLDER'], 'archive')
+    assert 'Pruned 40 download row(s) older than 10 day(s). Archived to' in _run(
+        app, 'prune', '--days', '10', '--archive-dir', archive
+    )
+    with app.app_context():
+        assert ResourceDownload.query.count() == 20
+    [name] = os.listdir(archive)
+    with gzip.open(os.path.join(archive, name), 'rt') as f:
+        lines = f.read().splitlines()
+    assert lines[0] == 'id,resource_id,user_id,download_date,ip_address'
+    assert len(lines) == 41
+
+
+def test_stats_survive_pruning(app, lecturer, logged):
+    _run(app, 'rollup', '--no-settle')
+    _run(app, 'prune', '--days', '1')
+    assert lecturer.get('/api/stats/downloads?days=365').get_json()['data']['total'] == 60
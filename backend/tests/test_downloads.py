@@ -0,0 +1,77 @@
+import pytest
+
+from app import db
+from app.models import Resource, ResourceDownload
+from tests.conftest import approve, upload
+
+CONTENT = b'0123456789'
+
+
+@pytest.fixture
+def resource_id(student, lecturer):
+    resource_id = upload(student, 'Range notes', content=CONTENT)
+    approve(lecturer, resource_id)
+    return resource_id
+
+
+def _downloads(app, resource_id):
+    with app.app_context():
+        return db.session.get(Resource, resource_id).download_count, ResourceDownload.query.count()
+
+
+def test_download_carries_validators(student, resource_id):
+    response = student.get(f'/api/resources/download/{resource_id}')
+    assert response.status_code == 200
+    assert response.data == CONTENT
+    assert response.headers['Accept-Ranges'] == 'bytes'
+    assert 'private' in response.headers['Cache-Control']
+    assert response.get_etag()[0]  # the file's sha256, strong
+
+
+def test_ranges_and_conditional_requests(app, student, resource_id):
+    url = f'/api/resources/download/{resource_id}'
+    etag = student.get(url).headers['ETag']
+
+    response = student.get(url, headers={'Range': 'bytes=0-3'})
+    assert (response.status_code, response.data) == (206, b'0123')
+    assert response.headers['Content-Range'] == f'bytes 0-3/{len(CONTENT)}'
+
+    response = student.get(url, headers={'Range': 'bytes=4-', 'If-Range': etag})
+    assert (response.status_code, response.data) == (206, b'456789')
+
+    # The file changed since the client's copy: start over with the whole file
+    response = student.get(url, headers={'Range': 'bytes=4-', 'If-Range': '"stale"'})
+    assert (response.status_code, response.data) == (200, CONTENT)
+
+    assert student.get(url, headers={'If-None-Match': etag}).status_code == 304
+    assert student.head(url).status_code == 200
+
+    # Full GET twice and the 0-3 range start downloads; the rest continue or revalidate
+    assert _downloads(app, resource_id) == (3, 3)
+
+
+def test_unapproved_resources_are_not_served(student):
+    resource_id = upload(student, 'Pending notes')
+    assert student.get(f'/api/resources/download/{resource_id}').status_code == 403
+
+
+def test_x_accel_redirect_hands_the_file_to_nginx(app, student, resource_id):
+    app.config['DOWNLOAD_OFFLOAD'] = 'x-accel-redirect'
+    url = f'/api/resources/download/{resource_id}'
+    response = student.get(url)
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'].startswith('/protected-uploads/blobs/')
+    assert response.headers['Content-Disposition'] == 'attachment; filename=notes.pdf'
+
+    assert student.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    # nginx answers the range; only a request from byte 0 is a new download
+    assert student.get(url, headers={'Range': 'bytes=5-'}).status_code == 200
+    assert _downloads(app, resource_id) == (1, 1)
+
+
+def test_x_sendfile_hands_the_file_to_the_server(app, student, resource_id):
+    app.config['DOWNLOAD_OFFLOAD'] = 'x-sendfile'
+    response = student.get(f'/api/resources/download/{resource_id}')
+    assert response.status_code == 200
+    assert response.headers['X-Sendfile'].endswith(response.headers['ETag'].strip('"'))
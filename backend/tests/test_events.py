@@ -0,0 +1,46 @@
+import pytest
+
+from app import db
+from app.models import Student
+from app.utils.events import LECTURERS_CHANNEL, event_broker, student_channel
+from tests.conftest import login, make_app, _build, upload
+
+
+@pytest.fixture
+def app(tmp_path):
+    # Short streams, so a test that reads one does not wait for the default 300s
+    return _build(make_app(tmp_path, EVENTS_STREAM_MAX_AGE=1, EVENTS_HEARTBEAT=1), db.create_all)
+
+
+def _student_id(app):
+    with app.app_context():
+        return Student.query.filter_by(registration_number='STU001').one().id
+
+
+def test_stream_does_not_hold_a_database_connection(app, student, engine):
+    response = student.get('/api/events', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    chunks = iter(response.response)
+    assert next(chunks).startswith(b'retry:')
+    assert engine.pool.checkedout() == 0
+    response.close()
+
+
+@pytest.mark.parametrize('path, body', [
+    ('/api/lecturer/review/{id}', {'json': {'action': 'approve'}}),
+    ('/lecturer/review/{id}', {'data': {'action': 'approve'}}),  # HTML form
+])
+def test_reviews_publish_events(app, student, lecturer, path, body):
+    resource_id = upload(student, 'Optics notes')
+    subscription = event_broker.subscribe([student_channel(_student_id(app)), LECTURERS_CHANNEL])
+    try:
+        response = lecturer.post(path.format(id=resource_id), **body)
+        assert response.status_code in (200, 302)
+        events = {}
+        while (event := subscription.get(0.1)) is not None:
+            events[event['type']] = event['data']
+    finally:
+        event_broker.unsubscribe(subscription)
+
+    assert events['resource.status'] == {'id': resource_id, 'status': 'approved'}
+    assert events['resources.reviewed']['ids'] == [resource_id]
@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from tests.conftest import upload
+
+
+@pytest.fixture
+def resources(student, lecturer):
+    ids = [upload(student, f'Notes, "{n}"') for n in range(3)]
+    lecturer.post('/api/lecturer/review/batch', json={'ids': ids[:2], 'action': 'approve', 'comments': 'Two\nlines'})
+    return ids
+
+
+def _csv(response):
+    return list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_resources_csv(lecturer, resources):
+    response = lecturer.get('/api/exports/resources')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'].startswith('attachment; filename=resources-approved-')
+    rows = _csv(response)
+    assert [(int(r['id']), r['title'], r['status']) for r in rows] == [
+        (resources[0], 'Notes, "0"', 'approved'),
+        (resources[1], 'Notes, "1"', 'approved'),
+    ]
+    assert rows[0]['uploader_name'] == 'Student 1'
+
+
+def test_resources_ndjson_by_status(lecturer, resources):
+    response = lecturer.get('/api/exports/resources?status=pending&format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    assert [(r['id'], r['status']) for r in _ndjson(response)] == [(resources[2], 'pending')]
+
+
+def test_reviews_are_the_lecturers_own(lecturer, resources):
+    rows = _ndjson(lecturer.get('/api/exports/reviews?format=ndjson&since=2020-01-01'))
+    assert [r['id'] for r in rows] == resources[:2]
+    assert rows[0]['review_comments'] == 'Two\nlines'
+    assert _ndjson(lecturer.get('/api/exports/reviews?format=ndjson&until=2020-01-01')) == []
+
+
+def test_downloads_stream_in_batches(app, student, lecturer):
+    from app.models import ResourceDownload
+    app.config['EXPORT_BATCH_SIZE'] = 10
+    ids = [upload(student, 'A'), upload(student, 'B')]
+    start = datetime(2026, 1, 1)
+    with app.app_context():
+        db.session.execute(db.insert(ResourceDownload), [
+            {'resource_id': ids[n % 2], 'user_id': 1, 'download_date': start + timedelta(minutes=n), 'ip_address': '10.0.0.1'}
+            for n in range(45)
+        ])
+        db.session.commit()
+
+    response = lecturer.get('/api/exports/downloads?format=csv', buffered=False)
+    chunks = list(response.response)
+    response.close()
+    # Header, then one chunk per batch of ten
+    assert len(chunks) == 6
+    assert b''.join(c if isinstance(c, bytes) else c.encode() for c in chunks).count(b'\n') == 46
+
+    rows = _ndjson(lecturer.get(
+        f'/api/exports/downloads?format=ndjson&resource_id={ids[0]}&since=2026-01-01T00:10&until=2026-01-01T00:20'
+    ))
+    assert [r['download_date'] for r in rows] == [f'2026-01-01T00:{m}:00' for m in (10, 12, 14, 16, 18)]
+
+
+@pytest.mark.parametrize('url, message', [
+    ('/api/exports/downloads?format=xml', 'format must be csv or ndjson'),
+    ('/api/exports/downloads?since=yesterday', 'since must be an ISO date or datetime'),
+    ('/api/exports/resources?status=deleted', 'status must be pending, approved or rejected'),
+])
+def test_bad_parameters(lecturer, url, message):
+    response = lecturer.get(url)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == message
+
+
+def test_students_cannot_export(student):
+    response = student.get('/api/exports/resources')
+    assert response.status_code == 302
+
+
+def test_csv_cells_cannot_start_a_formula(student, lecturer):
+    resource_id = upload(student, '=HYPERLINK("http://evil.example","x")', description='@SUM(1+1)')
+    lecturer.post('/api/lecturer/review/batch', json={'ids': [resource_id], 'action': 'approve'})
+
+    [row] = _csv(lecturer.get('/api/exports/resources'))
+    assert row['title'] == '\'=HYPERLINK("http://evil.example","x")'
+    assert row['description'] == "'@SUM(1+1)"
+    assert row['id'] == str(resource_id)
+
+    [item] = _ndjson(lecturer.get('/api/exports/resources?format=ndjson'))
+    assert item['title'] == '=HYPERLINK("http://evil.example","x")'
@@ -0,0 +1,115 @@
+from collections import Counter
+from datetime import datetime
+
+import pytest
+
+from app import db
+from tests.conftest import MIGRATIONS, approve, login, upload
+
+SPECS = [
+    ('Algebra notes', 1, 'a.pdf'), ('Algebra slides', 1, 'b.pptx'), ('Calc notes', 2, 'c.pdf'),
+    ('Calc sheet', 2, 'd.docx'), ('Misc algebra', 2, 'e.pdf'),
+]
+
+
+def _upload_all(student):
+    return [upload(student, title, category=category, file_name=name) for title, category, name in SPECS]
+
+
+@pytest.fixture
+def uploaded(student):
+    return _upload_all(student)
+
+
+def _counters():
+    """(counters, what they should be): both {(category, file type, year): approved resources}."""
+    from app.models import Resource, ResourceFacetCount
+    have = {(r.category_id, r.file_type, r.year): r.resources for r in ResourceFacetCount.query if r.resources}
+    want = Counter((r.category_id, r.file_type, r.upload_date.year) for r in Resource.query.filter_by(status='approved'))
+    return have, dict(want)
+
+
+def _assert_in_step(app):
+    with app.app_context():
+        have, want = _counters()
+    assert have == want
+    return have
+
+
+def _facets(client, query=''):
+    return client.get('/api/student/browse' + query).get_json()['data']['facets']
+
+
+def test_counters_follow_reviews(any_app):
+    student = login(any_app.test_client(), 'student1')
+    lecturer = login(any_app.test_client(), 'lecturer1')
+    ids = _upload_all(student)
+    assert _assert_in_step(any_app) == {}
+    approve(lecturer, *ids[:4])
+    lecturer.post(f'/api/lecturer/review/{ids[4]}', json={'action': 'approve'})
+    assert sum(_assert_in_step(any_app).values()) == 5
+    lecturer.post('/api/lecturer/review/batch', json={'ids': [ids[3]], 'action': 'reject'})
+    assert sum(_assert_in_step(any_app).values()) == 4
+
+
+def test_counters_follow_edits_deletes_and_rollbacks(app, lecturer, uploaded):
+    from app.models import Resource
+    approve(lecturer, *uploaded)
+    with app.app_context():
+        db.session.get(Resource, uploaded[2]).category_id = 1
+        db.session.commit()
+        db.session.get(Resource, uploaded[3]).upload_date = datetime(2024, 5, 1)
+        db.session.commit()
+        db.session.delete(db.session.get(Resource, uploaded[1]))
+        db.session.commit()
+        db.session.get(Resource, uploaded[0]).category_id = 2
+        db.session.flush()
+        db.session.rollback()
+    assert _assert_in_step(app)[(2, 'docx', 2024)] == 1
+
+    result = app.test_cli_runner().invoke(args=['listings', 'rebuild'])
+    assert result.exit_code == 0, result.output
+    _assert_in_step(app)
+
+
+def test_browse_facets(student, lecturer, uploaded):
+    approve(lecturer, *uploaded)
+    year = datetime.utcnow().year
+    facets = _facets(student)
+    assert facets == {
+        'category': [{'id': 2, 'name': 'Exams', 'count': 3}, {'id': 1, 'name': 'Lecture Notes', 'count': 2}],
+        'file_type': [{'value': 'pdf', 'count': 3}, {'value': 'docx', 'count': 1}, {'value': 'pptx', 'count': 1}],
+        'year': [{'value': year, 'count': 5}],
+        'complete': True,
+    }
+    # The category facet ignores the category filter, so it still offers the others
+    facets = _facets(student, '?category=1')
+    assert facets['category'] == _facets(student)['category']
+    assert facets['file_type'] == [{'value': 'pdf', 'count': 1}, {'value': 'pptx', 'count': 1}]
+
+    facets = _facets(student, '?search=algebra')
+    assert facets['category'] == [{'id': 1, 'name': 'Lecture Notes', 'count': 2}, {'id': 2, 'name': 'Exams', 'count': 1}]
+    assert facets['year'] == [{'value': year, 'count': 3}]
+    assert _facets(student, '?search=algebra&cursor=&per_page=1') == facets
+
+
+def test_search_facets_are_bounded(app, student, lecturer, uploaded):
+    approve(lecturer, *uploaded)
+    app.config['FACET_SCAN_LIMIT'] = 2
+    facets = _facets(student, '?search=algebra')
+    assert facets['complete'] is False
+    assert sum(f['count'] for f in facets['file_type']) == 2
+    assert _facets(student, '?search=misc')['complete'] is True
+
+
+def test_migration_backfills_the_counters(migrated_app):
+    from flask_migrate import downgrade, upgrade
+    student = login(migrated_app.test_client(), 'student1')
+    lecturer = login(migrated_app.test_client(), 'lecturer1')
+    approve(lecturer, *_upload_all(student))
+    before = _assert_in_step(migrated_app)
+    with migrated_app.app_context():
+        downgrade(directory=MIGRATIONS, revision='f4d2a8b6c1e9')
+        assert 'resource_facet_counts' not in db.inspect(db.engine).get_table_names()
+        upgrade(directory=MIGRATIONS)
+    assert _assert_in_step(migrated_app) == before
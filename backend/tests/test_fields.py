@@ -0,0 +1,65 @@
+import json
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.utils.serializers import OrjsonProvider, orjson
+from tests.conftest import approve, make_app, upload
+
+
+@pytest.fixture
+def approved(student, lecturer):
+    ids = [upload(student, f'Notes {n}', description='Long text ' * 50) for n in range(2)]
+    approve(lecturer, *ids)
+    return ids
+
+
+def test_fields_limits_the_response(student, approved):
+    resources = student.get('/api/student/browse?fields=title,uploader').get_json()['data']['resources']
+    assert [set(r) for r in resources] == [{'id', 'title', 'uploader'}] * 2
+
+    resources = student.get('/api/resources/my-uploads?fields=status').get_json()['data']['resources']
+    assert [r['status'] for r in resources] == ['approved'] * 2
+
+
+def test_unrequested_columns_are_not_selected(engine, student, approved):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(engine, 'before_cursor_execute', listener)
+    try:
+        student.get('/api/student/browse?fields=title')
+    finally:
+        event.remove(engine, 'before_cursor_execute', listener)
+    listing = [s for s in statements if 'FROM resource_listing' in s]
+    assert listing and not any('description' in s for s in listing)
+
+
+def test_fields_outside_the_view_are_dropped(student, lecturer, approved):
+    # version exists (on the review queue) but not on browse
+    resources = student.get('/api/student/browse?fields=title,version').get_json()['data']['resources']
+    assert set(resources[0]) == {'id', 'title'}
+
+
+@pytest.mark.parametrize('url', ['/api/student/browse', '/api/resources/my-uploads'])
+def test_unknown_fields_are_a_bad_request(student, url):
+    response = student.get(url + '?fields=title,password')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Unknown field(s): password'
+
+
+@pytest.mark.skipif(orjson is None, reason='orjson is not installed')
+def test_orjson_encoder_matches_the_default(tmp_path):
+    app = make_app(tmp_path, JSON_FAST_ENCODER=True)
+    assert isinstance(app.json, OrjsonProvider)
+    value = {'b': [1, 2.5, None], 'a': datetime(2024, 5, 1, 9, 30), 'd': date(2024, 5, 1), 'u': 'é'}
+    with app.app_context():
+        fast = app.json.response(value).get_data()
+        app.json = app.json_provider_class(app)
+        default = app.json.response(value).get_data()
+    assert json.loads(fast) == json.loads(default)
+    assert list(json.loads(fast)) == ['a', 'b', 'd', 'u']
+
+
+def test_default_encoder_when_switched_off(app):
+    assert not isinstance(app.json, OrjsonProvider)
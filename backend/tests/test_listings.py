@@ -0,0 +1,73 @@
+import pytest
+
+from app import db
+from tests.conftest import approve, login, upload
+
+
+def _rows(app):
+    from app.models import ResourceListing
+    with app.app_context():
+        return [
+            (row.id, row.status.value, row.category_name, row.uploader_name, row.download_count)
+            for row in ResourceListing.query.order_by(ResourceListing.id)
+        ]
+
+
+@pytest.fixture
+def uploads(student):
+    return [upload(student, f'Notes {n}') for n in range(4)]
+
+
+def test_uploads_and_reviews_are_mirrored(any_app):
+    lecturer = login(any_app.test_client(), 'lecturer1')
+    student = login(any_app.test_client(), 'student1')
+    ids = [upload(student, f'Doc {n}') for n in range(3)]
+    assert [row[1] for row in _rows(any_app)] == ['pending'] * 3
+
+    assert lecturer.post(f'/api/lecturer/review/{ids[0]}', json={'action': 'approve'}).status_code == 200
+    approve(lecturer, ids[1])
+    lecturer.post('/api/lecturer/review/batch', json={'ids': [ids[2]], 'action': 'reject', 'comments': 'Blurry'})
+    assert [row[1] for row in _rows(any_app)] == ['approved', 'approved', 'rejected']
+
+    student.get(f'/api/resources/download/{ids[0]}')
+    assert _rows(any_app)[0] == (ids[0], 'approved', 'Lecture Notes', 'Student 1', 1)
+
+
+def test_category_and_student_renames_are_mirrored(app, uploads):
+    from app.models import Category, Student
+    with app.app_context():
+        db.session.get(Category, 1).name = 'Notes'
+        Student.query.filter_by(registration_number='STU001').one().full_name = 'Jane'
+        db.session.commit()
+    assert {(row[2], row[3]) for row in _rows(app)} == {('Notes', 'Jane')}
+
+
+def test_deleted_resources_leave_the_listing(app, uploads):
+    from app.models import Resource
+    with app.app_context():
+        db.session.delete(db.session.get(Resource, uploads[-1]))
+        db.session.commit()
+    assert [row[0] for row in _rows(app)] == uploads[:-1]
+
+
+def test_rebuild_command_refills_the_table(app, lecturer, uploads):
+    approve(lecturer, *uploads[:2])
+    before = _rows(app)
+    with app.app_context():
+        db.session.execute(db.text('DELETE FROM resource_listing'))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['listings', 'rebuild', '--batch-size', '3'])
+    assert result.exit_code == 0, result.output
+    assert 'Rebuilt 4 listing row(s).' in result.output
+    assert _rows(app) == before
+
+
+def test_browse_and_my_uploads_read_the_listing(app, student, lecturer, uploads):
+    approve(lecturer, uploads[0])
+    browse = student.get('/api/student/browse').get_json()['data']
+    assert [r['id'] for r in browse['resources']] == [uploads[0]]
+    assert browse['resources'][0]['uploader']['full_name'] == 'Student 1'
+
+    mine = student.get('/api/resources/my-uploads').get_json()['data']['resources']
+    assert sorted(r['id'] for r in mine) == uploads
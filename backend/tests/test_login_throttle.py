@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import db
+from app.utils import login_limiter as limiter_module
+from tests.conftest import _build, make_app
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1_000_000.0)
+    monkeypatch.setattr(limiter_module, 'time', SimpleNamespace(time=lambda: now.value))
+    return now
+
+
+@pytest.fixture
+def app(tmp_path, clock):
+    return _build(make_app(
+        tmp_path, LOGIN_LIMIT_PER_USERNAME=3, LOGIN_LIMIT_PER_IP=5, LOGIN_LIMIT_WINDOW=60, AUTH_TOKENS_ENABLED=True
+    ), db.create_all)
+
+
+def _login(client, username, password, path='/api/auth/login', **kwargs):
+    return client.post(path, json={'username': username, 'password': password}, **kwargs)
+
+
+def test_failures_per_username_are_limited(app, clock, monkeypatch):
+    client = app.test_client()
+    for _ in range(3):
+        assert _login(client, 'student1', 'bad').status_code == 401
+
+    # Blocked before the password is even checked, right or wrong
+    from app.models import User
+    monkeypatch.setattr(User, 'check_password', lambda self, password: pytest.fail('password was hashed'))
+    response = _login(client, 'student1', 'student123')
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '60'
+    assert _login(client, 'STUDENT1', 'student123', '/api/auth/token').status_code == 429
+    monkeypatch.undo()
+
+    clock.value += 61
+    assert _login(client, 'student1', 'student123').status_code == 200
+
+
+def test_failures_per_ip_are_limited(app):
+    client = app.test_client()
+    for _ in range(3):
+        _login(client, 'student1', 'bad')
+    assert _login(client, 'lecturer1', 'bad').status_code == 401
+    assert _login(client, 'lecturer1', 'bad').status_code == 401
+    # Five failures from this address: even another account is refused
+    assert _login(client, 'student2', 'student123').status_code == 429
+
+
+def test_success_clears_the_username_failures(app):
+    client = app.test_client()
+    for _ in range(2):
+        _login(client, 'student1', 'bad')
+    assert _login(client, 'student1', 'student123').status_code == 200
+    client = app.test_client()  # the first one is logged in now
+    for _ in range(2):
+        assert _login(client, 'student1', 'bad').status_code == 401
+    assert _login(client, 'student1', 'student123').status_code == 200
+
+
+def test_login_upgrades_an_outdated_hash(app):
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    assert _login(app.test_client(), 'lecturer1', 'lecturer123').status_code == 200
+    from app.models import User
+    with app.app_context():
+        user = User.query.filter_by(username='lecturer1').one()
+        assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+        assert not user.password_needs_rehash()
+
+
+def test_clients_behind_a_trusted_proxy_are_limited_separately(tmp_path, clock):
+    app = _build(make_app(tmp_path, LOGIN_LIMIT_PER_IP=2, TRUSTED_PROXY_HOPS=1), db.create_all)
+    client = app.test_client()
+    first = {'X-Forwarded-For': '203.0.113.7'}
+    second = {'X-Forwarded-For': '198.51.100.23'}
+    for username in ('student1', 'student2'):
+        _login(client, username, 'bad', headers=first)
+    assert _login(client, 'lecturer1', 'lecturer123', headers=first).status_code == 429
+    assert _login(client, 'lecturer1', 'lecturer123', headers=second).status_code == 200
+
+
+def test_forwarded_addresses_are_ignored_without_a_trusted_proxy(tmp_path, clock):
+    app = _build(make_app(tmp_path, LOGIN_LIMIT_PER_IP=2), db.create_all)
+    client = app.test_client()
+    for n, username in enumerate(('student1', 'student2')):
+        _login(client, username, 'bad', headers={'X-Forwarded-For': f'10.0.0.{n}'})
+    assert _login(client, 'lecturer1', 'lecturer123', headers={'X-Forwarded-For': '10.0.0.9'}).status_code == 429
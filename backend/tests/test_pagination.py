@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import update
+
+from app import db
+from app.models import ResourceListing
+from app.utils.pagination import InvalidCursor, decode_cursor, encode_cursor
+from tests.conftest import approve, upload
+
+
+def test_cursor_round_trip():
+    token = encode_cursor(1.5, 42)
+    assert decode_cursor(token) == (1.5, 42)
+
+
+@pytest.mark.parametrize('sort_value', [None, True, [1], {'a': 1}])
+def test_cursor_without_a_usable_sort_value_is_rejected(sort_value):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(encode_cursor(sort_value, 1))
+
+
+def _browse(client, cursor, **params):
+    response = client.get('/api/student/browse', query_string={'cursor': cursor, 'per_page': 2, **params})
+    return response.status_code, response.get_json()
+
+
+def test_rows_without_an_upload_date_do_not_break_paging(app, student, lecturer):
+    ids = [upload(student, f'Notes {n}') for n in range(5)]
+    approve(lecturer, *ids)
+    with app.app_context():
+        db.session.execute(
+            update(ResourceListing).where(ResourceListing.id == ids[4]).values(upload_date=None)
+        )
+        db.session.commit()
+
+    seen, cursor = [], ''
+    while cursor is not None:
+        status, body = _browse(student, cursor)
+        assert status == 200, body
+        seen += [r['id'] for r in body['data']['resources']]
+        cursor = body['data']['pagination']['next_cursor']
+    assert sorted(seen) == sorted(ids[:4])
+
+    status, body = _browse(student, encode_cursor(None, ids[0]))
+    assert status == 400
+    assert body['message'] == 'Invalid cursor'
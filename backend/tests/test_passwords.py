@@ -0,0 +1,39 @@
+import pytest
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, generate_password_hash
+
+from app import db
+from app.models import User
+from app.models.user import hash_method_prefix
+from tests.conftest import login
+
+
+@pytest.mark.parametrize('method', [
+    'scrypt', 'scrypt:32768:8:1', ' scrypt ', 'pbkdf2', 'pbkdf2:sha256', 'pbkdf2:sha256:1000', 'pbkdf2:sha512:5000',
+])
+def test_prefix_matches_what_werkzeug_writes(method):
+    assert hash_method_prefix(method) == generate_password_hash('x', method=method.strip()).split('$', 1)[0]
+
+
+def test_prefix_fills_in_pbkdf2_iterations():
+    assert hash_method_prefix('pbkdf2') == f'pbkdf2:sha256:{DEFAULT_PBKDF2_ITERATIONS}'
+
+
+def _hash(app):
+    with app.app_context():
+        return User.query.filter_by(username='student1').one().password_hash
+
+
+def test_bare_method_name_does_not_rehash_every_login(app):
+    app.config['PASSWORD_HASH_METHOD'] = 'scrypt'
+    login(app.test_client(), 'student1')
+    rehashed = _hash(app)
+    assert rehashed.startswith('scrypt:32768:8:1$')
+
+    login(app.test_client(), 'student1')
+    assert _hash(app) == rehashed
+
+
+def test_scrypt_hashes_fit_the_migrated_column(migrated_app):
+    with migrated_app.app_context():
+        columns = {c['name']: c for c in db.inspect(db.engine).get_columns('users')}
+        assert columns['password_hash']['type'].length == 256
@@ -0,0 +1,57 @@
+import pytest
+
+from app.utils.query_counter import assert_max_queries, count_queries
+from tests.conftest import approve, login, upload
+
+
+@pytest.fixture
+def catalogue(app, student, lecturer):
+    """Approved and pending uploads from two students in two categories."""
+    other = login(app.test_client(), 'student2')
+    approved = [upload(student, f'Notes {i}', category=1 + i % 2) for i in range(4)]
+    approved += [upload(other, f'Exam {i}', category=2) for i in range(4)]
+    approve(lecturer, *approved)
+    for i in range(3):
+        upload(student, f'Draft {i}')
+        upload(other, f'Other draft {i}')
+    return approved
+
+
+# Each budget covers loading the logged-in user plus the endpoint's own
+# queries. Touching a relationship per row would add one query per row (8+).
+BUDGETS = [
+    ('student', '/api/student/browse', 6),
+    ('student', '/api/student/browse?cursor=', 5),
+    ('student', '/api/student/browse?search=notes', 6),
+    ('student', '/api/student/dashboard', 4),
+    ('student', '/api/resources/my-uploads', 3),
+    ('student', '/api/resources/my-uploads?cursor=', 2),
+    ('lecturer', '/api/lecturer/dashboard', 3),
+]
+
+
+@pytest.mark.parametrize('who,url,budget', BUDGETS)
+def test_listing_query_budget(request, engine, catalogue, who, url, budget):
+    client = request.getfixturevalue(who)
+    with assert_max_queries(budget, engine):
+        response = client.get(url)
+    assert response.status_code == 200
+    assert response.get_json()['success']
+
+
+def test_budget_does_not_grow_with_rows(engine, student, lecturer, catalogue):
+    with count_queries(engine) as before:
+        student.get('/api/student/browse')
+    approve(lecturer, *[upload(student, f'More {i}') for i in range(10)])
+    with count_queries(engine) as after:
+        student.get('/api/student/browse')
+    assert after.count == before.count
+
+
+def test_assert_max_queries_reports_statements(app):
+    from app.models import Category
+    with app.app_context():
+        with pytest.raises(AssertionError, match='2 queries executed, expected at most 1'):
+            with assert_max_queries(1):
+                Category.query.all()
+                Category.query.count()
@@ -0,0 +1,20 @@
+from app import db
+
+
+def _check(app):
+    return app.test_cli_runner().invoke(args=['indexes', 'check', '-v'])
+
+
+def test_every_listing_query_uses_an_index(any_app):
+    result = _check(any_app)
+    assert result.exit_code == 0, result.output
+    assert 'FAIL' not in result.output
+
+
+def test_check_fails_without_the_index(app):
+    with app.app_context():
+        db.session.execute(db.text('DROP INDEX ix_resource_listing_status_upload_date'))
+        db.session.commit()
+    result = _check(app)
+    assert result.exit_code == 1
+    assert 'FAIL student browse\n' in result.output
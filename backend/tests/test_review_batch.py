@@ -0,0 +1,54 @@
+import pytest
+
+from tests.conftest import upload
+
+
+@pytest.fixture
+def pending(student):
+    return [upload(student, f'Notes {n}') for n in range(3)]
+
+
+def test_batch_applies_valid_items_and_reports_invalid_ones(lecturer, pending):
+    a, b, c = pending
+    response = lecturer.post('/api/lecturer/review/batch', json={'items': [
+        {'id': a, 'action': 'approve', 'comments': 'Good'},
+        {'id': b, 'action': 'reject', 'comments': {'reason': 'dup'}},
+        {'id': c, 'action': 'reject', 'comments': ['dup']},
+        {'id': 999, 'action': 'approve'},
+        {'id': 'x', 'action': 'approve'},
+        {'id': a, 'action': 'maybe'},
+    ]})
+    assert response.status_code == 200, response.get_json()
+    data = response.get_json()['data']
+    assert (data['approved'], data['rejected'], data['failed']) == (1, 0, 5)
+    assert [r.get('message') for r in data['results']] == [
+        None,
+        'Comments must be a string',
+        'Comments must be a string',
+        'Resource not found',
+        'Invalid resource id',
+        'Invalid action. Must be approve or reject.',
+    ]
+
+
+@pytest.mark.parametrize('comments', [{'a': 1}, ['a'], 3])
+def test_non_string_comments_are_a_bad_request(lecturer, pending, comments):
+    response = lecturer.post('/api/lecturer/review/batch', json={'ids': pending, 'action': 'reject', 'comments': comments})
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Comments must be a string'
+
+    response = lecturer.post(f'/api/lecturer/review/{pending[0]}', json={'action': 'reject', 'comments': comments})
+    assert response.status_code == 400
+
+
+def test_stale_version_fails_only_that_item(lecturer, pending):
+    a, b, _ = pending
+    response = lecturer.post('/api/lecturer/review/batch', json={'items': [
+        {'id': a, 'action': 'approve', 'version': 99},
+        {'id': b, 'action': 'approve', 'version': 'one'},
+    ]})
+    results = response.get_json()['data']['results']
+    assert [r['message'] for r in results] == [
+        'Resource was changed by someone else; reload it and review again',
+        'Invalid version',
+    ]
@@ -0,0 +1,155 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app import db
+from tests.conftest import login, upload
+
+
+@pytest.fixture
+def pending(student):
+    return [upload(student, f'Notes {n}') for n in range(6)]
+
+
+@pytest.fixture
+def other_lecturer(app):
+    from app.models import Lecturer, User
+    from app.models.lecturer import LecturerPosition
+    from app.models.user import UserRole
+    with app.app_context():
+        user = User(username='lecturer2', email='lecturer2@uni.edu', role=UserRole.lecturer)
+        user.set_password('lecturer123')
+        db.session.add(Lecturer(
+            user=user, full_name='Dr Other', employee_id='EMP002', department='Computing',
+            position=LecturerPosition.lecturer, joined_date=date(2018, 1, 1)
+        ))
+        db.session.commit()
+    return login(app.test_client(), 'lecturer2')
+
+
+def _claim(client, count):
+    response = client.post('/api/lecturer/queue/claim', json={'count': count})
+    assert response.status_code == 200, response.get_json()
+    return [item['id'] for item in response.get_json()['data']['items']]
+
+
+def test_claims_are_disjoint_and_oldest_first(lecturer, other_lecturer, pending):
+    mine = _claim(lecturer, 2)
+    theirs = _claim(other_lecturer, 3)
+    assert mine == pending[:2]
+    assert theirs == pending[2:5]
+
+    data = lecturer.get('/api/lecturer/queue').get_json()['data']
+    assert [item['id'] for item in data['items']] == mine
+    assert data['available'] == 1
+
+
+def test_claiming_again_tops_up_held_items(lecturer, pending):
+    assert _claim(lecturer, 2) == pending[:2]
+    assert _claim(lecturer, 4) == pending[:4]
+
+
+@pytest.mark.parametrize('count', [0, -1, 'five', True])
+def test_claim_count_must_be_positive(lecturer, count):
+    response = lecturer.post('/api/lecturer/queue/claim', json={'count': count})
+    assert response.status_code == 400
+
+
+def test_review_of_an_item_claimed_by_another_lecturer_conflicts(lecturer, other_lecturer, pending):
+    theirs = _claim(other_lecturer, 1)[0]
+    response = lecturer.post(f'/api/lecturer/review/{theirs}', json={'action': 'approve'})
+    assert response.status_code == 409
+    assert response.get_json()['message'] == 'Resource is claimed by another lecturer'
+
+    response = lecturer.post('/api/lecturer/review/batch', json={'ids': [theirs, pending[1]], 'action': 'approve'})
+    results = response.get_json()['data']['results']
+    assert [r['success'] for r in results] == [False, True]
+
+
+def test_expired_leases_return_to_the_queue(app, lecturer, other_lecturer, pending):
+    from app.models import Resource
+    theirs = _claim(other_lecturer, 2)
+    with app.app_context():
+        Resource.query.filter(Resource.id.in_(theirs)).update(
+            {'claim_expires_at': datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False
+        )
+        db.session.commit()
+
+    assert other_lecturer.get('/api/lecturer/queue').get_json()['data']['items'] == []
+    assert _claim(lecturer, 2) == theirs
+    response = lecturer.post(f'/api/lecturer/review/{theirs[0]}', json={'action': 'approve'})
+    assert response.status_code == 200
+
+
+def test_reviewing_clears_the_claim(app, lecturer, pending):
+    from app.models import Resource
+    mine = _claim(lecturer, 1)[0]
+    version = lecturer.get(f'/api/lecturer/review/{mine}').get_json()['data']['version']
+    response = lecturer.post(f'/api/lecturer/review/{mine}', json={'action': 'approve', 'version': version})
+    assert response.status_code == 200
+
+    response = lecturer.post(f'/api/lecturer/review/{mine}', json={'action': 'reject', 'version': version})
+    assert response.status_code == 409
+    with app.app_context():
+        assert db.session.get(Resource, mine).claimed_by_lecturer_id is None
+
+
+def test_release(lecturer, other_lecturer, pending):
+    mine = _claim(lecturer, 3)
+    response = lecturer.post('/api/lecturer/queue/release', json={'ids': [mine[0]]})
+    assert response.get_json()['data']['released'] == 1
+    assert _claim(other_lecturer, 1) == [mine[0]]
+
+    response = lecturer.post('/api/lecturer/queue/release', json={})
+    assert response.get_json()['data']['released'] == 2
+    assert lecturer.get('/api/lecturer/queue').get_json()['data']['available'] == 5
+
+    response = lecturer.post('/api/lecturer/queue/release', json={'ids': 'all'})
+    assert response.status_code == 400
+
+
+def _review_form(client, resource_id, **form):
+    return client.post(f'/lecturer/review/{resource_id}', data=form)
+
+
+def _status(app, resource_id):
+    from app.models import Resource
+    with app.app_context():
+        resource = db.session.get(Resource, resource_id)
+        return resource.status.value, resource.claimed_by_lecturer_id
+
+
+def test_web_review_respects_claims(app, lecturer, other_lecturer, pending):
+    theirs = _claim(other_lecturer, 1)[0]
+    response = _review_form(lecturer, theirs, action='approve')
+    assert response.status_code == 302 and response.location.endswith('/lecturer/dashboard')
+    assert _status(app, theirs) == ('pending', 2)
+
+    response = _review_form(other_lecturer, theirs, action='approve')
+    assert response.status_code == 302
+    assert _status(app, theirs) == ('approved', None)
+
+
+def test_web_review_checks_the_version(app, lecturer, pending):
+    response = _review_form(lecturer, pending[0], action='reject', comments='Blurry', version='7')
+    assert response.location.endswith(f'/lecturer/review/{pending[0]}')
+    assert _status(app, pending[0]) == ('pending', None)
+
+    _review_form(lecturer, pending[0], action='reject', comments='Blurry', version='1')
+    assert _status(app, pending[0]) == ('rejected', None)
+
+
+def test_web_review_of_a_concurrently_changed_resource_conflicts(app, lecturer, pending):
+    from sqlalchemy import event
+    from app.models import Resource
+
+    def concurrent_review(mapper, connection, target):
+        # Another request commits first, on its own connection
+        with db.engine.begin() as other:
+            other.execute(db.text('UPDATE resources SET version = version + 1 WHERE id = :id'), {'id': target.id})
+
+    event.listen(Resource, 'before_update', concurrent_review, once=True)
+    response = _review_form(lecturer, pending[0], action='approve')
+    assert response.status_code == 302
+    assert response.location.endswith(f'/lecturer/review/{pending[0]}')
+    assert _status(app, pending[0]) == ('pending', None)
@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import text
+
+from app import db
+from app.models import Resource
+from tests.conftest import approve, login, upload
+
+
+@pytest.fixture
+def clients(any_app):
+    return login(any_app.test_client(), 'student1'), login(any_app.test_client(), 'lecturer1')
+
+
+def _found(client, search):
+    response = client.get('/api/student/browse', query_string={'search': search})
+    assert response.status_code == 200, response.get_json()
+    return sorted(r['title'] for r in response.get_json()['data']['resources'])
+
+
+def test_only_approved_resources_are_found(any_app, clients):
+    student, lecturer = clients
+    approved = upload(student, 'Algebra notes')
+    single = upload(student, 'Algebra exam')
+    rejected = upload(student, 'Algebra draft')
+    upload(student, 'Algebra pending')
+
+    approve(lecturer, approved)
+    response = lecturer.post(f'/api/lecturer/review/{single}', json={'action': 'approve'})
+    assert response.status_code == 200, response.get_json()
+    response = lecturer.post(f'/api/lecturer/review/{rejected}', json={'action': 'reject', 'comments': 'Incomplete'})
+    assert response.status_code == 200, response.get_json()
+
+    assert _found(student, 'algeb') == ['Algebra exam', 'Algebra notes']
+    assert _found(student, 'draft') == []
+
+
+def test_html_review_updates_the_index(any_app, clients):
+    student, lecturer = clients
+    resource_id = upload(student, 'Topology notes')
+    response = lecturer.post(f'/lecturer/review/{resource_id}', data={'action': 'approve'})
+    assert response.status_code == 302
+    assert _found(student, 'topology') == ['Topology notes']
+
+
+def test_renamed_and_deleted_resources_leave_the_index(any_app, clients):
+    student, lecturer = clients
+    resource_id = upload(student, 'Calculus notes')
+    approve(lecturer, resource_id)
+
+    with any_app.app_context():
+        db.session.get(Resource, resource_id).title = 'Geometry notes'
+        db.session.commit()
+        assert db.session.execute(text(
+            "SELECT rowid FROM resources_fts WHERE resources_fts MATCH 'calculus'"
+        )).all() == []
+        db.session.delete(db.session.get(Resource, resource_id))
+        db.session.commit()
+        assert db.session.execute(text("SELECT count(*) FROM resources_fts")).scalar() == 0
+
+
+def test_search_rebuild_restores_a_missing_index(app, student, lecturer):
+    approve(lecturer, upload(student, 'Statistics notes'))
+    with app.app_context():
+        for trigger in ('resources_fts_insert', 'resources_fts_update', 'resources_fts_delete'):
+            db.session.execute(text(f'DROP TRIGGER {trigger}'))
+        db.session.execute(text('DROP TABLE resources_fts'))
+        db.session.commit()
+
+    result = app.test_cli_runner().invoke(args=['search', 'rebuild'])
+    assert result.exit_code == 0, result.output
+    assert 'Indexed 1 approved resource(s).' in result.output
+    assert _found(student, 'statistics') == ['Statistics notes']
+
+    approve(lecturer, upload(student, 'Statistics exam'))
+    assert _found(student, 'statistics') == ['Statistics exam', 'Statistics notes']
@@ -0,0 +1,72 @@
+import hashlib
+import os
+
+import pytest
+
+from app import db
+from app.models import FileBlob, Resource
+from app.utils.file_store import blob_key, migrate_layout
+
+DATA = b'hello world' * 100
+SHA256 = hashlib.sha256(DATA).hexdigest()
+
+
+def test_blob_keys_are_sharded(app):
+    with app.app_context():
+        assert blob_key(SHA256) == f'blobs/{SHA256[:2]}/{SHA256[2:4]}/{SHA256}'
+        app.config.update(STORAGE_SHARD_DEPTH=1, STORAGE_SHARD_WIDTH=3)
+        assert blob_key(SHA256) == f'blobs/{SHA256[:3]}/{SHA256}'
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(data)
+
+
+def _resource(path, **fields):
+    return Resource(title='r', file_name='r.pdf', file_path=path, file_type='pdf', file_size=0,
+                    category_id=1, uploaded_by_student_id=1, **fields)
+
+
+@pytest.fixture
+def mixed_layout(app):
+    """A flat (unsharded) blob and three legacy uploads with absolute paths."""
+    root = app.config['UPLOAD_FOLDER']
+    _write(os.path.join(root, 'blobs', SHA256), DATA)
+    _write(os.path.join(root, 'x.pdf'), b'legacy')
+    _write(os.path.join(root, 'y.pdf'), DATA)  # same bytes as the blob
+    with app.app_context():
+        blob = FileBlob(sha256=SHA256, size=len(DATA), path=f'blobs/{SHA256}', ref_count=1)
+        db.session.add(blob)
+        db.session.flush()
+        db.session.add_all([
+            _resource(blob.path, blob_id=blob.id),
+            _resource(os.path.join(root, 'x.pdf')),
+            _resource(os.path.join(root, 'x.pdf')),  # two rows, one file
+            _resource(os.path.join(root, 'y.pdf')),
+            _resource(os.path.join(root, 'missing.pdf')),
+        ])
+        db.session.commit()
+    return root
+
+
+def test_migrate_layout_moves_and_adopts_files(app, mixed_layout):
+    legacy_sha = hashlib.sha256(b'legacy').hexdigest()
+    with app.app_context():
+        stats = migrate_layout(batch_size=2)
+        assert stats == {'moved': 1, 'adopted': 3, 'missing': 1}
+
+        rows = Resource.query.order_by(Resource.id).all()
+        assert [r.file_path for r in rows[:4]] == [blob_key(SHA256), blob_key(legacy_sha), blob_key(legacy_sha), blob_key(SHA256)]
+        assert rows[4].blob_id is None
+        assert {b.sha256: b.ref_count for b in FileBlob.query} == {SHA256: 2, legacy_sha: 2}
+
+        files = {
+            os.path.relpath(os.path.join(root, name), mixed_layout).replace(os.sep, '/')
+            for root, _, names in os.walk(mixed_layout) for name in names
+        }
+        assert files == {blob_key(SHA256), blob_key(legacy_sha)}
+
+        # Finished rows no longer match, so running it again is a no-op
+        assert migrate_layout(batch_size=2) == {'missing': 1}
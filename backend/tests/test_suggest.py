@@ -0,0 +1,69 @@
+import pytest
+
+from app import db
+from app.utils.suggest import suggest_index
+from tests.conftest import approve, upload
+
+TITLES = ['Intro to Calculus', 'Calculus II notes', 'Linear Algebra', 'Organic chemistry  lab']
+
+
+@pytest.fixture
+def titled(student):
+    return [upload(student, title) for title in TITLES]
+
+
+def _suggest(client, q, **params):
+    response = client.get('/api/resources/suggest', query_string={'q': q, **params})
+    assert response.status_code == 200, response.get_json()
+    return [(item['type'], item['text']) for item in response.get_json()['data']]
+
+
+def test_only_approved_titles_are_suggested(student, lecturer, titled):
+    assert _suggest(student, 'calc') == []
+    approve(lecturer, *titled[:3])
+    assert _suggest(student, 'calc') == [('resource', 'Intro to Calculus'), ('resource', 'Calculus II notes')]
+    assert _suggest(student, 'LIN') == [('resource', 'Linear Algebra')]
+    assert _suggest(student, 'lec') == [('category', 'Lecture Notes')]
+
+    lecturer.post(f'/api/lecturer/review/{titled[3]}', json={'action': 'approve'})
+    assert _suggest(student, 'organic   chem') == [('resource', 'Organic chemistry  lab')]
+
+    lecturer.post('/api/lecturer/review/batch', json={'ids': [titled[0]], 'action': 'reject'})
+    assert _suggest(student, 'calc') == [('resource', 'Calculus II notes')]
+
+
+def test_commits_update_the_index_and_rollbacks_do_not(app, student, lecturer, titled):
+    from app.models import Category, Resource
+    approve(lecturer, titled[1])
+    with app.app_context():
+        resource = db.session.get(Resource, titled[1])
+        resource.title = 'Calculus 2 notes'
+        db.session.commit()
+        resource.title = 'Geometry'
+        db.session.flush()
+        db.session.rollback()
+        db.session.add(Category(name='Calculators'))
+        db.session.commit()
+    assert _suggest(student, 'calc') == [('category', 'Calculators'), ('resource', 'Calculus 2 notes')]
+    assert _suggest(student, 'geo') == []
+
+
+def test_other_processes_changes_arrive_on_refresh(app, student, lecturer, titled):
+    approve(lecturer, titled[2])
+    with app.app_context():
+        db.session.execute(db.text("UPDATE resource_listing SET title = 'Calcium' WHERE id = :id"), {'id': titled[2]})
+        db.session.commit()
+    assert _suggest(student, 'calci') == []
+    suggest_index._built_at -= app.config['SUGGEST_REFRESH_SECONDS'] + 1
+    assert _suggest(student, 'calci') == [('resource', 'Calcium')]
+
+
+def test_limit_and_empty_prefix(student, lecturer, titled):
+    approve(lecturer, *titled)
+    assert _suggest(student, '') == []
+    assert len(_suggest(student, 'c', limit=2)) == 2
+    assert len(_suggest(student, 'c', limit=999)) == 3
+
+
+def test_login_required(app):
+    assert app.test_client().get('/api/resources/suggest?q=calc').status_code == 302
@@ -0,0 +1,102 @@
+import io
+
+import pytest
+
+from app import db
+from app.models import User
+from app.utils.query_counter import count_queries
+from app.utils.user_cache import user_cache
+from tests.conftest import _build, make_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    user_cache.clear()
+    yield _build(make_app(tmp_path, AUTH_TOKENS_ENABLED=True), db.create_all)
+    user_cache.clear()
+
+
+def _tokens(client, username, password):
+    response = client.post('/api/auth/token', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['data']
+
+
+def _bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_token_authenticates_without_a_session(app, engine):
+    client = app.test_client()
+    assert client.post('/api/auth/token', json={'username': 'student1', 'password': 'bad'}).status_code == 401
+
+    headers = _bearer(_tokens(client, 'student1', 'student123')['access_token'])
+    response = client.get('/api/auth/me', headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()['user']['username'] == 'student1'
+    assert 'Set-Cookie' not in response.headers
+
+    # The identity comes from the token and the cached user snapshot, not
+    # from a users query per request
+    app.config['USER_CACHE_TTL'] = 30
+    client.get('/api/auth/me', headers=headers)
+    with count_queries(engine) as queries:
+        assert client.get('/api/resources/my-uploads', headers=headers).status_code == 200
+    assert not any('FROM users' in statement for statement in queries.statements)
+
+    response = client.post('/api/resources/upload', headers=headers, content_type='multipart/form-data',
+                           data={'title': 'T', 'category': '1', 'file': (io.BytesIO(b'abc'), 'a.pdf')})
+    assert response.status_code == 200, response.get_json()
+
+
+def test_token_role_and_junk_tokens(app):
+    client = app.test_client()
+    student = _bearer(_tokens(client, 'student1', 'student123')['access_token'])
+    lecturer = _bearer(_tokens(client, 'lecturer1', 'lecturer123')['access_token'])
+    assert client.get('/api/lecturer/dashboard', headers=student).status_code == 302
+    assert client.get('/api/lecturer/dashboard', headers=lecturer).status_code == 200
+    assert client.get('/api/auth/me', headers=_bearer('junk')).status_code == 401
+
+
+def test_refresh_tokens(app):
+    client = app.test_client()
+    tokens = _tokens(client, 'student1', 'student123')
+    response = client.post('/api/auth/token/refresh', json={'refresh_token': tokens['refresh_token']})
+    assert response.status_code == 200
+    assert 'access_token' in response.get_json()['data']
+
+    # An access token is not a refresh token
+    assert client.post('/api/auth/token/refresh', json={'refresh_token': tokens['access_token']}).status_code == 401
+
+    # Changing the password voids existing refresh tokens
+    with app.app_context():
+        User.query.filter_by(username='student1').one().set_password('changed')
+        db.session.commit()
+    assert client.post('/api/auth/token/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 401
+
+
+def test_tokens_are_off_by_default(tmp_path):
+    app = _build(make_app(tmp_path), db.create_all)
+    assert app.test_client().post('/api/auth/token', json={}).status_code == 404
+
+
+def test_rehashing_on_login_keeps_refresh_tokens(app):
+    client = app.test_client()
+    tokens = _tokens(client, 'student1', 'student123')
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    _tokens(client, 'student1', 'student123')
+    with app.app_context():
+        assert User.query.filter_by(username='student1').one().password_hash.startswith('pbkdf2:sha256:2000$')
+    assert client.post('/api/auth/token/refresh', json={'refresh_token': tokens['refresh_token']}).status_code == 200
+
+
+def test_tokens_of_deleted_or_deactivated_users_are_refused(app):
+    client = app.test_client()
+    student = _bearer(_tokens(client, 'student1', 'student123')['access_token'])
+    lecturer = _bearer(_tokens(client, 'lecturer1', 'lecturer123')['access_token'])
+    with app.app_context():
+        User.query.filter_by(username='lecturer1').one().is_active = False
+        db.session.delete(User.query.filter_by(username='student1').one())
+        db.session.commit()
+    assert client.get('/api/auth/me', headers=student).status_code == 401
+    assert client.get('/api/auth/me', headers=lecturer).status_code == 401
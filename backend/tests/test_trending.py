@@ -0,0 +1,90 @@
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from tests.conftest import approve, upload
+
+
+@pytest.fixture
+def scored(app, student, lecturer):
+    """Four approved resources: one old and popular, one fresh, one older, one never downloaded."""
+    from app.models import Resource, ResourceDownload
+    from app.utils.listings import rebuild_listings
+    ids = [upload(student, f'Notes {n}') for n in range(4)]
+    approve(lecturer, *ids)
+    now = datetime.utcnow()
+    downloads = [(ids[0], timedelta(days=30), 100), (ids[1], timedelta(hours=2), 10), (ids[2], timedelta(days=3), 20)]
+    with app.app_context():
+        for resource_id, age, count in downloads:
+            db.session.execute(db.insert(ResourceDownload), [
+                {'resource_id': resource_id, 'user_id': 1, 'download_date': now - age}
+            ] * count)
+            db.session.execute(db.update(Resource).where(Resource.id == resource_id).values(download_count=count))
+        rebuild_listings()
+        db.session.commit()
+    result = app.test_cli_runner().invoke(args=['downloads', 'rollup', '--no-settle'])
+    assert result.exit_code == 0, result.output
+    return ids
+
+
+def _scores(app):
+    from app.models import Resource, ResourceListing
+    with app.app_context():
+        resources = {r.id: r.trending_score for r in Resource.query}
+        listings = {r.id: r.trending_score for r in ResourceListing.query}
+    assert resources == listings
+    return resources
+
+
+def _ids(client, url):
+    return [r['id'] for r in client.get(url).get_json()['data']['resources']]
+
+
+def test_recent_downloads_outweigh_old_ones(app, scored):
+    a, b, c, d = scored
+    scores = _scores(app)
+    assert scores[b] > scores[a] and scores[d] == 0
+    # Twenty downloads one half-life (3 days) ago weigh as much as ten now,
+    # so they beat ten downloads two hours ago by exactly those two hours
+    tau = app.config['TRENDING_HALF_LIFE'].total_seconds() / math.log(2)
+    assert math.isclose(scores[c] - scores[b], 2 * 3600 / tau, rel_tol=1e-6)
+
+
+def test_sorts(student, scored):
+    a, b, c, d = scored
+    assert _ids(student, '/api/student/browse?sort=trending') == [c, b, a, d]
+    assert _ids(student, '/api/student/browse?sort=popular') == [a, c, b, d]
+    assert _ids(student, '/api/student/browse') == [d, c, b, a]
+    response = student.get('/api/student/browse?sort=best')
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid sort. Must be newest, trending or popular.'
+
+
+def test_trending_cursor_pages(student, scored):
+    everything = _ids(student, '/api/student/browse?sort=trending')
+    first = student.get('/api/student/browse?sort=trending&cursor=&per_page=2').get_json()['data']
+    cursor = first['pagination']['next_cursor']
+    second = _ids(student, f'/api/student/browse?sort=trending&cursor={cursor}&per_page=2')
+    assert [r['id'] for r in first['resources']] + second == everything
+
+
+def test_dashboard_lists_only_downloaded_resources(student, scored):
+    trending = student.get('/api/student/dashboard').get_json()['data']['trending_resources']
+    assert {r['id'] for r in trending} == set(scored[:3])
+
+
+def test_rebuild_gives_the_same_scores(app, scored):
+    before = _scores(app)
+    result = app.test_cli_runner().invoke(args=['trending', 'rebuild'])
+    assert result.exit_code == 0, result.output
+    assert 'Scored 130 download(s).' in result.output
+    after = _scores(app)
+    assert all(math.isclose(before[i], after[i], abs_tol=1e-9) for i in before)
+
+
+def test_reviewing_keeps_the_score(app, lecturer, scored):
+    before = _scores(app)[scored[1]]
+    lecturer.post(f'/api/lecturer/review/{scored[1]}', json={'action': 'reject'})
+    assert _scores(app)[scored[1]] == before
@@ -0,0 +1,67 @@
+import hashlib
+
+import pytest
+
+from app import db
+from app.models import Resource, UploadSession
+from app.storage import get_storage
+from tests.conftest import login, upload
+
+
+@pytest.fixture
+def uploader(any_app):
+    return login(any_app.test_client(), 'student1')
+
+
+def _init(client, payload, name='big notes.pdf'):
+    response = client.post('/api/resources/upload/init', json={
+        'title': 'Big', 'category': 1, 'file_name': name, 'file_size': len(payload)
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['data']['upload_id']
+
+
+def _put(client, upload_id, data, offset):
+    return client.put(f'/api/resources/upload/{upload_id}', data=data, headers={'Upload-Offset': str(offset)})
+
+
+def test_single_request_upload(any_app, uploader):
+    resource_id = upload(uploader, 'Small', content=b'hello')
+    with any_app.app_context():
+        resource = db.session.get(Resource, resource_id)
+        assert resource.file_size == 5
+        with get_storage().open(resource.storage_key) as f:
+            assert f.read() == b'hello'
+
+
+def test_chunked_upload_resumes_and_finalizes(any_app, uploader):
+    payload = b'0123456789abcdef' * 3
+    upload_id = _init(uploader, payload)
+
+    assert _put(uploader, upload_id, payload[:10], 0).get_json()['data']['offset'] == 10
+    # A retried chunk at a stale offset is refused with the real offset
+    retried = _put(uploader, upload_id, payload[:10], 0)
+    assert retried.status_code == 409 and retried.get_json()['data']['offset'] == 10
+    early = uploader.post(f'/api/resources/upload/{upload_id}/finalize')
+    assert early.status_code == 409
+    assert _put(uploader, upload_id, payload[10:] + b'x', 10).status_code == 413
+
+    offset = uploader.get(f'/api/resources/upload/{upload_id}').get_json()['data']['offset']
+    assert _put(uploader, upload_id, payload[offset:], offset).get_json()['data']['offset'] == len(payload)
+    done = uploader.post(f'/api/resources/upload/{upload_id}/finalize')
+    assert done.status_code == 200
+    resource_id = done.get_json()['data']['id']
+    # Finalizing twice returns the same resource
+    assert uploader.post(f'/api/resources/upload/{upload_id}/finalize').get_json()['data']['id'] == resource_id
+
+    with any_app.app_context():
+        session = db.session.get(UploadSession, upload_id)
+        assert session.sha256 == hashlib.sha256(payload).hexdigest()
+        with get_storage().open(db.session.get(Resource, resource_id).storage_key) as f:
+            assert f.read() == payload
+
+
+def test_abort_discards_the_session(any_app, uploader):
+    upload_id = _init(uploader, b'abc')
+    assert uploader.delete(f'/api/resources/upload/{upload_id}').status_code == 200
+    assert uploader.get(f'/api/resources/upload/{upload_id}').status_code == 404
@@ -0,0 +1,47 @@
+import pytest
+
+from app import db
+from app.models import Student, User
+from app.utils.query_counter import count_queries
+from app.utils.user_cache import user_cache
+from tests.conftest import _build, login, make_app
+
+
+@pytest.fixture
+def app(tmp_path):
+    # The cache is per process and keyed on user id; start and end empty
+    user_cache.clear()
+    yield _build(make_app(tmp_path, USER_CACHE_TTL=60), db.create_all)
+    user_cache.clear()
+
+
+def test_authenticated_requests_skip_the_user_query(app, student, engine):
+    student.get('/api/auth/me')
+    with count_queries(engine) as queries:
+        response = student.get('/api/auth/me')
+    assert response.status_code == 200
+    assert response.get_json()['user']['student_profile']['can_upload'] is True
+    assert queries.count == 0
+
+
+def test_changes_to_the_user_reach_the_cache_at_once(app, student):
+    assert student.get('/api/auth/me').status_code == 200
+    with app.app_context():
+        Student.query.filter_by(registration_number='STU001').one().can_upload = False
+        db.session.commit()
+    assert student.get('/api/auth/me').get_json()['user']['student_profile']['can_upload'] is False
+    # upload_permission_required sends students without the permission away
+    response = student.post('/api/resources/upload', data={'title': 'x', 'category': '1'})
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/student/dashboard')
+
+    with app.app_context():
+        User.query.filter_by(username='student1').one().is_active = False
+        db.session.commit()
+    assert student.get('/api/auth/me').status_code == 401
+
+
+def test_lecturers_are_cached_too(app):
+    lecturer = login(app.test_client(), 'lecturer1')
+    assert lecturer.get('/api/lecturer/dashboard').status_code == 200
+    assert lecturer.get('/api/lecturer/dashboard').status_code == 200